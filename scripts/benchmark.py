@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Compare the XLSX engines loading time
+
+Usage: benchmark.py [-e ENGINE ...] [-n ROWS] [filename]
+
+If no file is given, a test workbook with numbers, dates and strings
+is generated in a temporary directory.
+"""
+
+import os
+import os.path
+import sys
+import time
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from xlsx_provider.loader import load_worksheet, xlsx_engines  # noqa: E402
+
+
+def generate_workbook(filename, num_rows, num_columns=20):
+    "Write a test workbook (write-only mode, without dimensions)"
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet()
+    sheet.append(['c{}'.format(i) for i in range(0, num_columns)])
+    start = datetime.datetime(2020, 1, 1)
+    for row in range(0, num_rows):
+        values = []
+        for col in range(0, num_columns):
+            kind = col % 4
+            if kind == 0:
+                values.append(row * col)
+            elif kind == 1:
+                values.append(row / (col + 1.0))
+            elif kind == 2:
+                values.append(start + datetime.timedelta(hours=row))
+            else:
+                values.append('s{}'.format(row % 100))
+        sheet.append(values)
+    wb.save(filename)
+
+
+def benchmark(filename, engine):
+    "Load all the rows of the first worksheet, return the number of rows and the time"
+    start = time.perf_counter()
+    source = load_worksheet(filename, engine=engine)
+    num_rows = sum(1 for row in source.values)
+    return num_rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the XLSX engines')
+    parser.add_argument('filename', nargs='?')
+    parser.add_argument(
+        '-e', '--engine', dest='engines', action='append', choices=sorted(xlsx_engines)
+    )
+    parser.add_argument('-n', '--rows', dest='num_rows', type=int, default=50000)
+    args = parser.parse_args()
+    engines = args.engines or sorted(xlsx_engines)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = args.filename
+        if not filename:
+            filename = os.path.join(tmp, 'benchmark.xlsx')
+            generate_workbook(filename, args.num_rows)
+        print('{} ({} bytes)'.format(filename, os.path.getsize(filename)))
+        for engine in engines:
+            num_rows, elapsed = benchmark(filename, engine)
+            print('{:10} {:10d} rows {:8.2f}s'.format(engine, num_rows, elapsed))
+
+
+if __name__ == '__main__':
+    main()
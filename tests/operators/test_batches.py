@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+import io
+import os
+import json
+import os.path
+import shutil
+import pathlib
+import tempfile
+import pyarrow
+import pyarrow.parquet
+from unittest import TestCase, main
+from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator
+
+
+class TestBatches(TestCase):
+    def setUp(self):
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+        self.target_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+
+    def convert(self, source, file_format, **kwargs):
+        target = os.path.join(
+            self.target_dir,
+            '{}.{}'.format(len(os.listdir(self.target_dir)), file_format),
+        )
+        so = FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            file_format=file_format,
+            **kwargs
+        )
+        so.execute({})
+        return target
+
+    def test_row_groups(self):
+        source = os.path.join(self.root_dir, 'types.xlsx')
+        expected = pyarrow.parquet.read_table(self.convert(source, 'parquet'))
+        target = self.convert(source, 'parquet', batch_size=3)
+        self.assertEqual(pyarrow.parquet.ParquetFile(target).num_row_groups, 4)
+        self.assertTrue(pyarrow.parquet.read_table(target).equals(expected))
+
+    def test_promotion(self):
+        source = os.path.join(self.target_dir, 'promotion.csv')
+        with open(source, 'w') as f:
+            f.write('a,c,b\n1,x\n2,y\n3.5,z,4\n')
+        target = self.convert(source, 'parquet', batch_size=2)
+        table = pyarrow.parquet.read_table(target)
+        self.assertEqual(table.schema.field('a').type, pyarrow.float64())
+        self.assertEqual(table.schema.field('b').type, pyarrow.int64())
+        self.assertEqual(table.column('a').to_pylist(), [1.0, 2.0, 3.5])
+        self.assertEqual(table.column('b').to_pylist(), [None, None, 4])
+        self.assertEqual(table.column('c').to_pylist(), ['x', 'y', 'z'])
+        self.assertEqual(
+            sorted(os.listdir(self.target_dir)), ['1.parquet', 'promotion.csv']
+        )
+
+    def test_csv_promotion(self):
+        source = os.path.join(self.target_dir, 'promotion.csv')
+        with open(source, 'w') as f:
+            f.write('a,b,c\n1,"x,1",1\n,"y\n2",2\n3,z,3\n4.25,w,4\n')
+        expected = 'a,b,c\n1.00,"x,1",1\n,"y\n2",2\n3.00,z,3\n4.25,w,4\n'
+        for engine in (None, 'csv'):
+            # The blank in the first batch and the rows already written
+            # are rewritten when the column is promoted to double
+            target = self.convert(
+                source, 'csv', batch_size=2, float_format='%.2f', engine=engine
+            )
+            with open(target, 'r') as f:
+                self.assertEqual(f.read(), expected)
+            target = io.BytesIO()
+            FromXLSXOperator(
+                task_id='test',
+                source=source,
+                target=target,
+                file_format='csv',
+                batch_size=2,
+                float_format='%.2f',
+                engine=engine,
+            ).execute({})
+            self.assertEqual(target.getvalue().decode('utf8'), expected)
+        self.assertEqual(
+            sorted(os.listdir(self.target_dir)), ['1.csv', '2.csv', 'promotion.csv']
+        )
+
+    def test_nan(self):
+        # The NaN values are written as null
+        source = os.path.join(self.target_dir, 'nan.csv')
+        with open(source, 'w') as f:
+            f.write('a,b\n1.5,x\nnan,y\n2,z\nNaN,w\n')
+        for engine in (None, 'csv'):
+            target = self.convert(source, 'parquet', batch_size=2, engine=engine)
+            table = pyarrow.parquet.read_table(target)
+            self.assertEqual(table.column('a').to_pylist(), [1.5, None, 2.0, None])
+            self.assertEqual(table.column('a').null_count, 2)
+
+    def test_schema(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        target = self.convert(source, 'parquet', nullable_int=True)
+        schema = pyarrow.parquet.read_schema(target)
+        self.assertEqual(schema.field('col1label').type, pyarrow.string())
+        self.assertEqual(schema.field('col2date').type, pyarrow.timestamp('ns'))
+        self.assertEqual(schema.field('col3number').type, pyarrow.int64())
+        self.assertEqual(schema.field('col5num').type, pyarrow.float64())
+        self.assertNotIn(b'pandas', schema.metadata or {})
+
+    def test_promotion_path(self):
+        source = os.path.join(self.target_dir, 'promotion.csv')
+        with open(source, 'w') as f:
+            f.write('a\n1\n2\n3.5\n')
+        target = pathlib.Path(self.target_dir) / 'promotion.parquet'
+        FromXLSXOperator(
+            task_id='test', source=source, target=target, batch_size=2, engine='csv'
+        ).execute({})
+        table = pyarrow.parquet.read_table(target)
+        self.assertEqual(table.column('a').to_pylist(), [1.0, 2.0, 3.5])
+        self.assertEqual(
+            sorted(os.listdir(self.target_dir)), ['promotion.csv', 'promotion.parquet']
+        )
+
+    def test_sample_size(self):
+        source = os.path.join(self.target_dir, 'sample.csv')
+        with open(source, 'w') as f:
+            f.write('a,b\n')
+            for i in range(0, 10):
+                f.write('{},{}\n'.format(i, 'x' if i < 9 else 2.5))
+            f.write('1.5,y\n')
+        # The csv engine reads the rows as strings, the types are inferred by batch
+        with self.assertLogs('airflow.task.operators', 'INFO') as logs:
+            target = self.convert(
+                source, 'parquet', batch_size=2, sample_size=5, engine='csv'
+            )
+        f = pyarrow.parquet.ParquetFile(target)
+        self.assertEqual(f.metadata.row_group(0).num_rows, 6)
+        self.assertEqual(f.schema_arrow.field('a').type, pyarrow.float64())
+        self.assertEqual(f.schema_arrow.field('b').type, pyarrow.string())
+        self.assertEqual(f.read().column('b').to_pylist()[-2:], ['2.5', 'y'])
+        promoted = [x for x in logs.output if 'promoted' in x]
+        self.assertEqual(len(promoted), 1)
+        self.assertIn('Column a type promoted from int64 to double', promoted[0])
+
+    def test_json(self):
+        source = os.path.join(self.root_dir, 'types.xlsx')
+        expected = self.convert(source, 'json')
+        target = self.convert(source, 'json', batch_size=4)
+        with open(expected, 'r') as f:
+            data = json.load(f)
+        with open(target, 'r') as f:
+            text = f.read()
+        self.assertEqual(text, json.dumps(data, indent=2))
+
+    def test_empty(self):
+        source = os.path.join(self.target_dir, 'empty.csv')
+        with open(source, 'w') as f:
+            f.write('a,b\n')
+        for file_format in ('json', 'jsonl'):
+            with open(self.convert(source, file_format), 'r') as f:
+                self.assertEqual(f.read(), '[]' if file_format == 'json' else '')
+        table = pyarrow.parquet.read_table(self.convert(source, 'parquet'))
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.column_names, ['a', 'b'])
+
+
+if __name__ == '__main__':
+    main()
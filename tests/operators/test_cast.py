@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+import math
+import datetime
+from unittest import TestCase, main
+import pyarrow
+from xlsx_provider.cast import (
+    cast_dictionary_column,
+    cast_native_column,
+    cast_string_column,
+)
+from xlsx_provider.commons import (
+    get_type,
+    prepare_value,
+    NUMERIC_TYPES,
+    TYPE_DATETIME,
+    TYPE_DOUBLE,
+    TYPE_INT,
+    TYPE_NULLABLE_INT,
+    TYPE_STRING,
+)
+
+VALUES = [
+    '1',
+    ' 2 ',
+    '+3',
+    '-4',
+    '1_000',
+    '1__0',
+    '1.5',
+    '.5',
+    '5.',
+    '1e3',
+    'nan',
+    '-Inf',
+    'abc',
+    '',
+    ' ',
+    'à§æ',
+    '1.2.3',
+    '0x10',
+    None,
+]
+
+
+def cast_cells(values, datatype, nullable_int=False):
+    "Cast the values one cell at a time"
+    result = []
+    for value in values:
+        if value is not None:
+            value = prepare_value('test', value)
+            type_ = get_type('test', value, nullable_int)
+            if datatype is None:
+                datatype = type_
+            elif datatype in (TYPE_INT, TYPE_NULLABLE_INT) and type_ == TYPE_DOUBLE:
+                datatype = type_
+            if value == '' and datatype in NUMERIC_TYPES:
+                value = None
+        result.append(value)
+    return result, datatype
+
+
+class TestCast(TestCase):
+    def assertSameCast(self, values, datatype=None, nullable_int=False):
+        result, result_type = cast_string_column('test', values, datatype, nullable_int)
+        expected, expected_type = cast_cells(values, datatype, nullable_int)
+        self.assertEqual(result_type, expected_type)
+        self.assertEqual(len(result), len(expected))
+        for x, y in zip(result, expected):
+            self.assertEqual(type(x), type(y))
+            if not (isinstance(x, float) and math.isnan(x)):
+                self.assertEqual(x, y)
+
+    def test_types(self):
+        self.assertEqual(cast_string_column('t', ['1', ' 2'])[1], TYPE_INT)
+        self.assertEqual(
+            cast_string_column('t', ['1', '2'], None, True)[1], TYPE_NULLABLE_INT
+        )
+        self.assertEqual(cast_string_column('t', ['1', '2.5'])[1], TYPE_DOUBLE)
+        self.assertEqual(cast_string_column('t', ['a', '2.5'])[1], TYPE_STRING)
+        self.assertEqual(cast_string_column('t', [None, None]), ([None, None], None))
+
+    def test_same_as_cells(self):
+        for value in VALUES:
+            for other in VALUES:
+                for datatype in (None, TYPE_INT, TYPE_STRING):
+                    self.assertSameCast([None, value, other, ''], datatype)
+                    self.assertSameCast([value, '', other], datatype, True)
+
+    def test_not_strings(self):
+        self.assertIsNone(cast_string_column('t', ['1', 2]))
+        self.assertIsNone(cast_string_column('t', ['1', '99999999999999999999']))
+
+    def test_native(self):
+        now = datetime.datetime.now()
+        for values, datatype in (
+            ([None, 1, 2], None),
+            ([1.5, 2], None),
+            ([1, 2.5], TYPE_INT),
+            ([None, now], None),
+            ([1, now, 2.5], TYPE_STRING),
+            ([None, None], TYPE_DATETIME),
+        ):
+            expected, expected_type = cast_cells(values, datatype)
+            self.assertEqual(
+                cast_native_column('t', values, datatype), (expected, expected_type)
+            )
+        self.assertEqual(
+            cast_native_column('t', [1, 2], None, True)[1], TYPE_NULLABLE_INT
+        )
+        self.assertIsNone(cast_native_column('t', [1, '2'], TYPE_INT))
+        self.assertIsNone(cast_native_column('t', [now, 1], None))
+        self.assertIsNone(cast_native_column('t', [True], None))
+
+    def test_dictionary(self):
+        for values, datatype in (
+            ([' a', None, 'b ', ' a', ''], None),
+            ([None, 'x', 'x'], TYPE_STRING),
+        ):
+            array = pyarrow.array(values).dictionary_encode()
+            result, result_type = cast_dictionary_column('t', array, datatype)
+            self.assertIsInstance(result, pyarrow.DictionaryArray)
+            self.assertEqual(
+                (result.to_pylist(), result_type), cast_cells(values, datatype)
+            )
+        for values, datatype in (
+            (['a', ' 1'], None),
+            (['a', 'b'], TYPE_INT),
+            ([None, None], None),
+        ):
+            array = pyarrow.array(values, pyarrow.string()).dictionary_encode()
+            self.assertIsNone(cast_dictionary_column('t', array, datatype))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+import random
+import datetime
+from unittest import TestCase, main
+from xlsx_provider.commons import TYPE_DATETIME, XLS_EPOC, XLSX_EPOC
+from xlsx_provider.dates import (
+    cast_datetime_column,
+    detect_date_format,
+    parse_date_strings,
+    serial_to_datetime,
+)
+from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator
+
+
+class TestDates(TestCase):
+    def test_serial(self):
+        rnd = random.Random(0)
+        values = [1, 2.5, 0.5 / 86400000000, -1.5, 44000.123456789]
+        values.extend(rnd.uniform(-1000, 100000) for i in range(0, 1000))
+        values.extend(
+            rnd.randint(0, 2 * 86400000000) / 172800000000 for i in range(0, 1000)
+        )
+        for epoc in (XLS_EPOC, XLSX_EPOC):
+            self.assertEqual(
+                serial_to_datetime(values, epoc),
+                [epoc + datetime.timedelta(days=x) for x in values],
+            )
+        self.assertEqual(serial_to_datetime([]), [])
+        with self.assertRaises(OverflowError):
+            serial_to_datetime([1e10])
+
+    def test_strings(self):
+        self.assertEqual(detect_date_format('2020-01-31'), '%Y-%m-%d')
+        self.assertEqual(detect_date_format('01/31/2020 10:00'), '%m/%d/%Y %H:%M')
+        self.assertIsNone(detect_date_format('2020-1-31'))
+        self.assertIsNone(detect_date_format('Jan 31 2020'))
+        self.assertEqual(
+            parse_date_strings(['2020-01-31', '2020-1-5', 'Feb 1, 2020']),
+            [
+                datetime.datetime(2020, 1, 31),
+                datetime.datetime(2020, 1, 5),
+                datetime.datetime(2020, 2, 1),
+            ],
+        )
+        with self.assertRaises(ValueError):
+            parse_date_strings(['2020-01-31', '2021-02-29'])
+
+    def test_same_as_cells(self):
+        so = FromXLSXOperator(task_id='test', source='test.xlsx', target='test.parquet')
+        values = [
+            None,
+            '',
+            ' 2020-01-02 ',
+            '2020-01-03 10:11:12',
+            '44000',
+            ' 1.5',
+            0,
+            44000.25,
+            True,
+            datetime.datetime(2020, 1, 1),
+            '2020-02-01',
+            'March 3, 2021',
+        ]
+        expected = [so.get_value_and_type(x, 'd', {'d': TYPE_DATETIME}) for x in values]
+        self.assertEqual(cast_datetime_column('d', values), expected)
+        self.assertIsNone(cast_datetime_column('d', [datetime.date(2020, 1, 1)]))
+
+
+if __name__ == '__main__':
+    main()
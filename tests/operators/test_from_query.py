@@ -1,14 +1,22 @@
 #!/usr/bin/env python
 
 import os
+import sys
 import csv
 import os.path
 import shutil
 import tempfile
 import json
+import pyarrow
+import pyarrow.parquet
 from unittest import TestCase, main
+from unittest.mock import patch
 from airflow.exceptions import AirflowException
-from xlsx_provider.operators.from_xlsx_query_operator import FromXLSXQueryOperator
+from xlsx_provider.loader import load_worksheet
+from xlsx_provider.operators.from_xlsx_query_operator import (
+    FromXLSXQueryOperator,
+    Result,
+)
 
 TEST_DATA = [
     ['One', '2021-09-07 00:00:00', '0.1', '1', '10', '0.1'],
@@ -129,6 +137,38 @@ class TestFromQuery(TestCase):
             data = json.loads('[' + f.read().replace('\n', ',') + ']')
             self.assertEqual(data, TEST_DATA_JSON)
 
+    def test_to_parquet(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        target = os.path.join(self.target_dir, 'test.parquet')
+        so = FromXLSXQueryOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            file_format='parquet',
+            table_name='test',
+            types={'col1': 'datetime64[ns]'},
+            query=QUERY,
+        )
+        so.execute({})
+        table = pyarrow.parquet.read_table(target)
+        self.assertEqual(table.schema.field('col0').type, pyarrow.string())
+        self.assertEqual(table.schema.field('col1').type, pyarrow.timestamp('ns'))
+        self.assertEqual(table.schema.field('col3').type, pyarrow.int64())
+        self.assertEqual(table.schema.field('col5').type, pyarrow.float64())
+        data = table.to_pydict()
+        data['col1'] = [str(x) for x in data['col1']]
+        self.assertEqual(data, {k: [x[k] for x in TEST_DATA_JSON] for k in data})
+
+    def test_to_arrow(self):
+        # The Arrow table is built without pandas
+        source = load_worksheet(os.path.join(self.root_dir, 'test.xlsx'))
+        result = Result('test', source, {})
+        result.process(QUERY)
+        with patch.dict(sys.modules, {'pandas': None}):
+            table = result.to_arrow()
+        self.assertEqual(table.column_names, list(TEST_DATA_JSON[0].keys()))
+        self.assertEqual(table.to_pylist(), TEST_DATA_JSON)
+
     @expect_exception(AirflowException)
     def test_invalid_worksheet(self):
         source = os.path.join(self.root_dir, 'test.xlsx')
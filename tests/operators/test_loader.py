@@ -0,0 +1,720 @@
+#!/usr/bin/env python
+
+import os
+import gc
+import csv
+import json
+import os.path
+import shutil
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest import TestCase, main
+from unittest.mock import patch
+from airflow.exceptions import AirflowException
+from openpyxl import Workbook, load_workbook
+import xlsx_provider.loader
+from xlsx_provider.loader import load_worksheet, RowSource
+from xlsx_provider.commons import (
+    ENGINE_CSV,
+    ENGINE_FULL,
+    ENGINE_SAX,
+    ENGINE_SPILL,
+    ENGINE_STREAMING,
+)
+from xlsx_provider.xlsx_reader import XLSXReader
+from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator, to_list
+from xlsx_provider.operators.to_xlsx_operator import ToXLSXOperator
+
+TEST_DATA = [
+    ['One', '2021-09-07 00:00:00', '10', '1', '10', '0.0001'],
+    ['Two', '2011-09-08 00:00:00', '20', '0', '30', '0.0002'],
+    ['à§æ', '2011-09-09 00:00:00', '30', '1', '60', '0.0004'],
+]
+
+
+class TestLoader(TestCase):
+    def setUp(self):
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+        self.target_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+
+    def test_streaming_engine(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        with patch('xlsx_provider.loader.load_workbook', wraps=load_workbook) as m:
+            sheet = load_worksheet(source, engine=ENGINE_STREAMING)
+            self.assertTrue(m.call_args[1]['read_only'])
+        full = load_worksheet(source, engine=ENGINE_FULL)
+        self.assertEqual(list(sheet.values), list(full.values))
+
+    def test_streaming_close(self):
+        # The read-only workbook is closed when all the rows are read
+        source = os.path.join(self.target_dir, 'test.dat')
+        shutil.copy(os.path.join(self.root_dir, 'test.xlsx'), source)
+        workbooks = []
+
+        def wrap_load_workbook(*args, **kwargs):
+            workbooks.append(load_workbook(*args, **kwargs))
+            return workbooks[-1]
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always', ResourceWarning)
+            with patch('xlsx_provider.loader.load_workbook', wrap_load_workbook):
+                sheet = load_worksheet(source, engine=ENGINE_STREAMING)
+                self.assertEqual(len(list(sheet.values)), 4)
+            self.assertIsNone(workbooks[0]._archive.fp)
+            del sheet
+            gc.collect()
+        self.assertEqual([x for x in w if x.category is ResourceWarning], [])
+
+    def test_streaming_threshold(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        with patch('xlsx_provider.loader.load_workbook', wraps=load_workbook) as m:
+            load_worksheet(source)
+            self.assertFalse(m.call_args[1]['read_only'])
+            with patch('xlsx_provider.loader.DEFAULT_STREAMING_THRESHOLD', 1):
+                load_worksheet(source)
+            self.assertTrue(m.call_args[1]['read_only'])
+
+    def test_preflight(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        with XLSXReader(source) as reader:
+            estimate = reader.estimate(0)
+        self.assertEqual(estimate.title, 'Sheet1')
+        self.assertEqual(estimate.dimension, 'A1:F4')
+        self.assertEqual(estimate.cells, 24)
+        self.assertGreater(estimate.sheet_size, estimate.compressed_size)
+        self.assertEqual(
+            estimate.xml_size, estimate.sheet_size + estimate.shared_strings_size
+        )
+        with self.assertLogs('xlsx_provider.loader', level='INFO') as logs:
+            self.assertEqual(
+                xlsx_provider.loader.choose_xlsx_engine(source), ENGINE_FULL
+            )
+        self.assertIn('dimension A1:F4 (24 cells), engine full', logs.output[0])
+        self.assertEqual(
+            xlsx_provider.loader.choose_xlsx_engine(source, limit=10),
+            ENGINE_STREAMING,
+        )
+        with patch('xlsx_provider.loader.DEFAULT_SPILL_THRESHOLD', 1):
+            self.assertEqual(
+                xlsx_provider.loader.choose_xlsx_engine(source), ENGINE_SPILL
+            )
+            sheet = load_worksheet(source)
+        self.assertEqual(
+            list(sheet.values), list(load_worksheet(source, engine=ENGINE_SAX).values)
+        )
+        # Not a zip file, fallback to the file size
+        target = os.path.join(self.target_dir, 'invalid.xlsx')
+        with open(target, 'wb') as f:
+            f.write(b'invalid')
+        self.assertIsNone(xlsx_provider.loader.preflight_xlsx(target))
+        self.assertEqual(xlsx_provider.loader.choose_xlsx_engine(target), ENGINE_FULL)
+        with patch('xlsx_provider.loader.DEFAULT_STREAMING_THRESHOLD', 1):
+            self.assertEqual(
+                xlsx_provider.loader.choose_xlsx_engine(target), ENGINE_STREAMING
+            )
+
+    def test_streaming_xlsx_to_csv(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        target = os.path.join(self.target_dir, 'test.xlsx.csv')
+        so = FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            csv_delimiter='|',
+            file_format='csv',
+            engine=ENGINE_STREAMING,
+        )
+        so.execute({})
+        with open(target, 'r') as f:
+            reader = csv.reader(f, delimiter='|')
+            rows = list(reader)
+        self.assertEqual(rows[1:], TEST_DATA)
+
+    def test_sax_engine(self):
+        for filename, limit in (
+            ('test.xlsx', None),
+            ('types.xlsx', 100),
+            ('high_tech.xlsx', 100),
+        ):
+            source = os.path.join(self.root_dir, filename)
+            for worksheet in (0, -1):
+                expected = load_worksheet(
+                    source, worksheet=worksheet, limit=limit, engine=ENGINE_STREAMING
+                )
+                sheet = load_worksheet(
+                    source, worksheet=worksheet, limit=limit, engine=ENGINE_SAX
+                )
+                self.assertEqual(sheet.title, expected.title)
+                self.assertEqual(list(sheet.values), list(expected.values))
+        with self.assertRaises(KeyError):
+            load_worksheet(source, worksheet='missing', engine=ENGINE_SAX)
+        with self.assertRaises(KeyError):
+            load_worksheet(source, engine='missing')
+
+    def test_sax_close(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        with patch.object(
+            XLSXReader, 'close', autospec=True, side_effect=XLSXReader.close
+        ) as m:
+            for engine in (ENGINE_SAX, ENGINE_SPILL):
+                sheet = load_worksheet(source, engine=engine)
+                self.assertFalse(m.called)
+                self.assertEqual(len(list(sheet.values)), 4)
+                self.assertEqual(m.call_count, 1)
+                m.reset_mock()
+            with self.assertRaises(KeyError):
+                load_worksheet(source, worksheet='missing', engine=ENGINE_SAX)
+            self.assertEqual(m.call_count, 1)
+            # The reader passed by open_workbook is not closed by the loader
+            m.reset_mock()
+            with xlsx_provider.loader.open_workbook(source, engine=ENGINE_SAX) as wb:
+                list(load_worksheet(source, workbook=wb).values)
+                self.assertFalse(m.called)
+            self.assertEqual(m.call_count, 1)
+
+    def test_sax_engine_values(self):
+        # Write-only workbooks have inline strings and no dimensions
+        target = os.path.join(self.target_dir, 'values.xlsx')
+        wb = Workbook(write_only=True)
+        sheet = wb.create_sheet('Values')
+        sheet.append(['Label', 'Date', 'Flag', 'Number'])
+        sheet.append(['One', datetime(2021, 9, 7, 10, 30), True, 1.5])
+        sheet.append([])
+        sheet.append([' Two ', None, False, 2])
+        wb.save(target)
+        expected = list(load_worksheet(target, engine=ENGINE_FULL).values)
+        sheet = load_worksheet(target, worksheet='values', engine=ENGINE_SAX)
+        self.assertEqual(list(sheet.values), expected)
+
+    def test_sax_parallel(self):
+        target = os.path.join(self.target_dir, 'rows.xlsx')
+        wb = Workbook()
+        sheet = wb.active
+        sheet.append(['Label', 'Number', 'Date'])
+        for i in range(2, 400):
+            if i % 7 and i % 50 > 3:  # missing rows
+                sheet.append(
+                    ['s{}'.format(i % 5), i * 1.5, datetime(2021, 1, i % 28 + 1)]
+                )
+            else:
+                sheet.append([])
+        wb.save(target)
+        reader = XLSXReader(target)
+        title, path = reader.get_sheet(0)
+        for batch_size in (7, 50):
+            chunks = list(
+                reader.split_rows(
+                    path, min_row=3, batch_size=batch_size, chunk_size=500
+                )
+            )
+            self.assertGreater(len(chunks), 5)
+            self.assertEqual(chunks[0][0], 3)
+            for (start, end, document), next_chunk in zip(chunks, chunks[1:]):
+                self.assertEqual((start - 3) % batch_size, 0)
+                self.assertEqual(end, next_chunk[0])
+            self.assertIsNone(chunks[-1][1])
+            for min_row, max_row, columns in (
+                (1, None, None),
+                (3, None, [0, 2]),
+                (2, 45, None),
+                (2, 500, [1]),
+            ):
+                expected = reader.iter_batches(
+                    path, min_row, max_row, columns, batch_size=batch_size
+                )
+                batches = reader.iter_batches_parallel(
+                    path,
+                    min_row,
+                    max_row,
+                    columns,
+                    batch_size=batch_size,
+                    max_workers=2,
+                    chunk_size=500,
+                )
+                self.assertEqual(
+                    [[to_list(x) for x in batch] for batch in batches],
+                    [[to_list(x) for x in batch] for batch in expected],
+                )
+        sheet = load_worksheet(target, skip_rows=1, max_workers=2)
+        self.assertEqual(
+            list(sheet.values),
+            list(load_worksheet(target, skip_rows=1, engine=ENGINE_SAX).values),
+        )
+        # The pending chunks are cancelled when the batches are not all read
+        # (Python < 3.9 shutdown has no cancel_futures argument)
+        shutdown = ProcessPoolExecutor.shutdown
+
+        def shutdown_wait(self, wait=True):
+            shutdown(self, wait=wait)
+
+        with patch.object(ProcessPoolExecutor, 'shutdown', shutdown_wait):
+            batches = reader.iter_batches_parallel(
+                path, batch_size=7, max_workers=2, chunk_size=500
+            )
+            self.assertEqual(len(next(batches)[0]), 7)
+            batches.close()
+
+    def test_sax_xlsx_to_csv(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        target = os.path.join(self.target_dir, 'test.xlsx.csv')
+        so = FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            csv_delimiter='|',
+            file_format='csv',
+            engine=ENGINE_SAX,
+        )
+        with patch('xlsx_provider.loader.load_workbook') as m:
+            so.execute({})
+            m.assert_not_called()
+        with open(target, 'r') as f:
+            rows = list(csv.reader(f, delimiter='|'))
+        self.assertEqual(rows[1:], TEST_DATA)
+
+    def write_banner_xlsx(self):
+        target = os.path.join(self.target_dir, 'banner.xlsx')
+        wb = Workbook()
+        sheet = wb.active
+        sheet.append(['Supplier report'])
+        sheet.append([])
+        sheet.append(['Code', 'Value'])
+        for i in range(0, 10):
+            sheet.append(['A{}'.format(i), i])
+        wb.save(target)
+        return target
+
+    def test_skip_rows(self):
+        source_path = self.write_banner_xlsx()
+        for engine in (ENGINE_FULL, ENGINE_STREAMING, ENGINE_SAX):
+            source = load_worksheet(source_path, skip_rows=2, engine=engine)
+            self.assertEqual(source.header, ('Code', 'Value'))
+            rows = list(source.iter_rows())
+            self.assertEqual(rows, [('A{}'.format(i), i) for i in range(0, 10)])
+
+    def test_arrow_csv(self):
+        import pyarrow.parquet
+
+        source = os.path.join(self.target_dir, 'arrow.csv')
+        with open(source, 'w') as f:
+            f.write('banner\na;b;a;d;e;f\n')
+            for i in range(0, 100):
+                f.write(
+                    '{};{};x{};{};{};"q;\n{}"\n'.format(
+                        i, i / 2.0 if i % 3 != 1 else '', i, 'NA' if i % 5 else '', i, i
+                    )
+                )
+        sheet = load_worksheet(
+            source, skip_rows=1, csv_delimiter=';', columns=[4, 1, 2, 9], limit=3
+        )
+        self.assertEqual(
+            list(sheet.values),
+            [
+                ('e', 'b', 'a', None),
+                ('0', '0.0', 'x0', None),
+                ('1', '', 'x1', None),
+                ('2', '1.0', 'x2', None),
+            ],
+        )
+        # Same output of the csv engine
+        for file_format in ('parquet', 'csv'):
+            targets = []
+            for engine in (None, ENGINE_CSV):
+                targets.append(
+                    os.path.join(self.target_dir, '{}.{}'.format(engine, file_format))
+                )
+                FromXLSXOperator(
+                    task_id='test',
+                    source=source,
+                    target=targets[-1],
+                    skip_rows=1,
+                    csv_delimiter=';',
+                    file_format=file_format,
+                    engine=engine,
+                    batch_size=30,
+                ).execute({})
+            if file_format == 'parquet':
+                tables = [pyarrow.parquet.read_table(x) for x in targets]
+                self.assertTrue(tables[0].equals(tables[1]))
+                self.assertEqual(tables[0].column('e').type, pyarrow.int64())
+            else:
+                with open(targets[0]) as f0, open(targets[1]) as f1:
+                    self.assertEqual(f0.read(), f1.read())
+        # Rows with a different number of columns are read by the csv module
+        with open(source, 'w') as f:
+            f.write('a,b\n1\n2,x\n')
+        self.assertEqual(
+            list(load_worksheet(source).values), [('a', 'b'), ('1', None), ('2', 'x')]
+        )
+
+    def test_arrow_csv_values(self):
+        # The Arrow engine returns the same values of the csv engine
+        data = {
+            'dates': 'a,b\n2021-01-01,1\n2021-01-02,2\n',
+            'leading_empty': 'a,b\n,x\n1,y\n2,z\n',
+            'empty_rows': 'a,b\n1,x\n\n2,y\n,\n"",""\n3,\n',
+            'empty_rows_one_column': 'a\n1\n\n""\n2\n',
+            'signed': 'a,b\n+5,-0\n-1,0\n 7 ,1_0\n',
+            'mixed': 'a,b\n1,2.5\n2,x\n',
+            'quoted': 'a,b\n"1\n\n2",3\n',
+        }
+        for name, text in data.items():
+            source = os.path.join(self.target_dir, name + '.csv')
+            with open(source, 'w') as f:
+                f.write(text)
+            self.assertEqual(
+                list(load_worksheet(source).values),
+                list(load_worksheet(source, engine=ENGINE_CSV).values),
+                name,
+            )
+            # Same output (or same error) of the csv engine
+            for file_format in ('parquet', 'csv', 'json', 'jsonl'):
+                results = []
+                for engine in (None, ENGINE_CSV):
+                    target = os.path.join(
+                        self.target_dir, '{}.{}.{}'.format(name, engine, file_format)
+                    )
+                    try:
+                        FromXLSXOperator(
+                            task_id='test',
+                            source=source,
+                            target=target,
+                            file_format=file_format,
+                            engine=engine,
+                            batch_size=2,
+                        ).execute({})
+                        with open(target, 'rb') as f:
+                            results.append(f.read())
+                    except AirflowException as ex:
+                        results.append(str(ex))
+                self.assertEqual(results[0], results[1], (name, file_format))
+
+    def test_arrow_csv_limit(self):
+        # The file is not read past the limit
+        source = os.path.join(self.target_dir, 'limit.csv')
+        with open(source, 'w') as f:
+            f.write('a,b\n')
+            for i in range(0, 500000):
+                f.write('{},value {}\n'.format(i, i))
+            f.write('invalid\n')
+        with self.assertNoLogs('xlsx_provider.loader', level='INFO'):
+            sheet = load_worksheet(source, limit=3)
+            self.assertEqual(
+                list(sheet.values),
+                [('a', 'b'), ('0', 'value 0'), ('1', 'value 1'), ('2', 'value 2')],
+            )
+        # Read by the csv module from the invalid row
+        with self.assertLogs('xlsx_provider.loader', level='INFO') as logs:
+            rows = list(load_worksheet(source, columns=['b']).values)
+        self.assertIn('read by the csv module from row', logs.output[0])
+        self.assertEqual(len(rows), 500002)
+        self.assertEqual(rows[-2:], [('value 499999',), (None,)])
+
+    def test_compressed(self):
+        import bz2
+        import gzip
+        import lzma
+        import pyarrow
+
+        openers = {
+            'gz': gzip.open,
+            'bz2': bz2.open,
+            'xz': lzma.open,
+            'zst': lambda filename, mode: pyarrow.output_stream(
+                filename, compression='zstd'
+            ),
+        }
+        for filename in ('test.xlsx.csv', 'test.xls.json', 'test.xls.jsonl'):
+            source = os.path.join(self.root_dir, filename)
+            with open(source, 'rb') as f:
+                data = f.read()
+            for compression, opener in openers.items():
+                target = os.path.join(
+                    self.target_dir, '{}.{}'.format(filename, compression)
+                )
+                with opener(target, 'wb') as f:
+                    f.write(data)
+                files = os.listdir(self.target_dir)
+                for engine in (None, ENGINE_CSV):
+                    self.assertEqual(
+                        list(
+                            load_worksheet(
+                                target, csv_delimiter='|', engine=engine, limit=2
+                            ).values
+                        ),
+                        list(
+                            load_worksheet(
+                                source, csv_delimiter='|', engine=engine, limit=2
+                            ).values
+                        ),
+                    )
+                # No decompressed copy is written
+                self.assertEqual(os.listdir(self.target_dir), files)
+        target = os.path.join(self.target_dir, 'test.xlsx.gz')
+        with gzip.open(target, 'wb') as f:
+            f.write(b'')
+        with self.assertRaises(KeyError):
+            load_worksheet(target)
+
+    def test_skip_rows_csv(self):
+        source = os.path.join(self.target_dir, 'banner.csv')
+        with open(source, 'w') as f:
+            f.write('Supplier report\n\ncode,value\nA1,1\nA2,2\n')
+        for engine in (None, ENGINE_CSV):
+            sheet = load_worksheet(source, skip_rows=2, engine=engine)
+            self.assertEqual(
+                list(sheet.values), [('code', 'value'), ('A1', '1'), ('A2', '2')]
+            )
+
+    def test_multiline_header_csv(self):
+        # The header and the skipped rows can span several lines
+        data = {
+            'header': '"Amount\n(EUR)",Name\n1,x\n2,y\n',
+            'banner': '"Supplier\nreport",\n"Amount\n(EUR)",Name\n1,x\n2,y\n',
+            'cr': '"Amount\r(EUR)",Name\r1,x\r2,y\r',
+        }
+        for name, text in data.items():
+            source = os.path.join(self.target_dir, name + '.csv')
+            with open(source, 'w', newline='') as f:
+                f.write(text)
+            skip_rows = 1 if name == 'banner' else 0
+            for engine in (None, ENGINE_CSV):
+                sheet = load_worksheet(source, skip_rows=skip_rows, engine=engine)
+                self.assertEqual(
+                    list(sheet.values),
+                    [('Amount\n(EUR)', 'Name'), ('1', 'x'), ('2', 'y')],
+                    (name, engine),
+                )
+        # The header is not read as a data row
+        source = os.path.join(self.target_dir, 'header.csv')
+        target = os.path.join(self.target_dir, 'header.xlsx')
+        ToXLSXOperator(task_id='test', source=source, target=target).execute({})
+        sheet = load_workbook(target).active
+        self.assertEqual(
+            list(sheet.values), [('Amount\n(EUR)', 'Name'), ('1', 'x'), ('2', 'y')]
+        )
+        source = os.path.join(self.target_dir, 'banner.csv')
+        with open(source, 'w') as f:
+            f.write('"Supplier\nreport",\namount,name\n1,x\n2,y\n')
+        target = os.path.join(self.target_dir, 'banner.json')
+        FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            file_format='json',
+            skip_rows=1,
+        ).execute({})
+        with open(target, 'r') as f:
+            self.assertEqual(
+                json.load(f), [{'amount': 1, 'name': 'x'}, {'amount': 2, 'name': 'y'}]
+            )
+
+    def test_skip_rows_xlsx_to_csv(self):
+        source = self.write_banner_xlsx()
+        target = os.path.join(self.target_dir, 'banner.csv')
+        so = FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            skip_rows=2,
+            file_format='csv',
+        )
+        so.execute({})
+        with open(target, 'r') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['code', 'value'])
+        self.assertEqual(rows[1:], [['A{}'.format(i), str(i)] for i in range(0, 10)])
+
+    def test_xls(self):
+        source = os.path.join(self.root_dir, 'test.xls')
+        sheet = load_worksheet(source, worksheet='SHEET1')
+        self.assertIsInstance(sheet, RowSource)
+        self.assertEqual(sheet.num_rows, 3)
+        rows = list(sheet.values)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][0], 'Col1Label')
+        self.assertEqual(rows[1], ('One', datetime(2021, 9, 7), 10, 1, 10, 0.0001))
+        self.assertEqual(list(load_worksheet(source, skip_rows=2).values), rows[2:])
+
+    def test_xls_batches(self):
+        source = os.path.join(self.root_dir, 'types.xls')
+        rows = list(load_worksheet(source).iter_rows())
+        batches = list(
+            xlsx_provider.loader.loaders['xls'](source, batch_size=3).iter_batches()
+        )
+        self.assertEqual([len(x[0]) for x in batches], [3, 3, 3, 1])
+        self.assertEqual([x for batch in batches for x in zip(*batch)], rows)
+
+    def test_parquet(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        source = os.path.join(self.target_dir, 'test.parquet')
+        data = {
+            'a': list(range(0, 250)),
+            'b': ['x{}'.format(i) if i % 7 else None for i in range(0, 250)],
+            'c': [i / 4.0 for i in range(0, 250)],
+        }
+        pyarrow.parquet.write_table(
+            pyarrow.Table.from_pydict(data), source, row_group_size=60
+        )
+        rows = list(zip(data['a'], data['b'], data['c']))
+        for skip_rows, limit in ((0, None), (1, 10), (125, None), (61, 100), (300, 5)):
+            source_rows = load_worksheet(
+                source, skip_rows=skip_rows, limit=limit, batch_size=25
+            )
+            expected = rows[skip_rows : None if limit is None else skip_rows + limit]
+            self.assertEqual(source_rows.num_rows, len(expected))
+            self.assertEqual(list(source_rows.values), [('a', 'b', 'c')] + expected)
+        sheet = load_worksheet(source, columns=['c', 'a'], limit=2, batch_size=1)
+        self.assertEqual(list(sheet.values), [('c', 'a'), (0.0, 0), (0.25, 1)])
+        # The row groups before skip_rows are not read
+        with patch.object(
+            pyarrow.parquet.ParquetFile,
+            'iter_batches',
+            autospec=True,
+            side_effect=pyarrow.parquet.ParquetFile.iter_batches,
+        ) as m:
+            list(load_worksheet(source, skip_rows=130).values)
+            self.assertEqual(m.call_args[1]['row_groups'], [2, 3, 4])
+
+    def test_json(self):
+        records = [
+            {'a': i, 'b': 'x,]' * (i % 3), 'c': {'d': [i]}, 'e': i / 3.0}
+            for i in range(0, 500)
+        ]
+        expected = [('a', 'b', 'c', 'e')] + [tuple(x.values()) for x in records]
+        target = os.path.join(self.target_dir, 'records.json')
+        with open(target, 'w') as f:
+            json.dump(records, f, indent=2)
+        self.assertEqual(list(load_worksheet(target).values), expected)
+        with open(target, 'r') as f:
+            self.assertEqual(
+                list(xlsx_provider.loader.iter_json_array(f, chunk_size=7)), records
+            )
+        self.assertEqual(
+            list(load_worksheet(target, skip_rows=10, limit=5).values),
+            [expected[0]] + expected[11:16],
+        )
+        # JSON Lines, with empty lines and a trailing newline
+        target = os.path.join(self.target_dir, 'records.jsonl')
+        with open(target, 'w') as f:
+            f.write('\n'.join(json.dumps(x) for x in records[:10]))
+            f.write('\n\n' + json.dumps(records[10]) + '\n\n')
+        self.assertEqual(list(load_worksheet(target).values), expected[:12])
+        self.assertEqual(
+            list(load_worksheet(target, ext='json', columns=['e', 'a']).values),
+            [(x[3], x[0]) for x in expected[:12]],
+        )
+        # Invalid JSON
+        with open(target, 'w') as f:
+            f.write('[{"a": 1}, {"a": 2}')
+        with self.assertRaises(json.decoder.JSONDecodeError):
+            list(load_worksheet(target, ext='json').values)
+
+    def test_row_source(self):
+        source = RowSource(('a', 'b'), rows=iter([(1, 2), (3,), (5, 6)]))
+        self.assertEqual(
+            list(source.iter_batches(2)), [[[1, 3], [2, None]], [[5], [6]]]
+        )
+        source = RowSource(('a', 'b'), batches=iter([[[1, 3], [2, 4]]]))
+        self.assertEqual(list(source.values), [('a', 'b'), (1, 2), (3, 4)])
+
+    def test_load_into_sheet(self):
+        source = os.path.join(self.root_dir, 'test.xlsx.csv')
+        sheet = load_worksheet(source, sheet=Workbook().active, csv_delimiter='|')
+        self.assertEqual(sheet.max_row, 4)
+        self.assertEqual(sheet['A2'].value, 'One')
+
+    def test_select_columns(self):
+        expected = [
+            ('Col4Boolean', 'Col2Date'),
+            (1, datetime(2021, 9, 7)),
+            (0, datetime(2011, 9, 8)),
+            (1, datetime(2011, 9, 9)),
+        ]
+        for filename, engine in (
+            ('test.xlsx', ENGINE_FULL),
+            ('test.xlsx', ENGINE_STREAMING),
+            ('test.xlsx', ENGINE_SAX),
+            ('test.xls', None),
+        ):
+            source = os.path.join(self.root_dir, filename)
+            sheet = load_worksheet(source, engine=engine, columns=['col4boolean', 'B'])
+            self.assertEqual(sheet.num_columns, 2)
+            self.assertEqual(list(sheet.values), expected)
+            sheet = load_worksheet(source, engine=engine, columns=[3, 1])
+            self.assertEqual(list(sheet.values), expected)
+        source = os.path.join(self.root_dir, 'test.xls.jsonl')
+        sheet = load_worksheet(source, exclude_columns=['col2date', 'col5num'])
+        self.assertEqual(
+            sheet.header, ('col1label', 'col3number', 'col4boolean', 'col4numformula')
+        )
+        source = os.path.join(self.root_dir, 'test.xls.parquet')
+        sheet = load_worksheet(source, columns=['col5num'])
+        self.assertEqual(
+            [x[0] for x in sheet.values], ['col5num', 0.0001, 0.0002, 0.0004]
+        )
+        with self.assertRaises(KeyError):
+            load_worksheet(source, columns=['missing'])
+
+    def test_select_columns_to_csv(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        target = os.path.join(self.target_dir, 'test.csv')
+        so = FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            file_format='csv',
+            select_columns=['A', 'col3number', 'col5num'],
+            drop_columns=['col5num'],
+        )
+        so.execute({})
+        with open(target) as f:
+            self.assertEqual(f.read(), 'col1label,col3number\nOne,10\nTwo,20\nà§æ,30\n')
+
+    def test_limit(self):
+        for filename in ('test.xlsx', 'test.xls', 'test.xls.jsonl', 'test.xls.parquet'):
+            source = os.path.join(self.root_dir, filename)
+            rows = list(load_worksheet(source).values)
+            sheet = load_worksheet(source, limit=2)
+            self.assertEqual(list(sheet.values), rows[:3])
+            sheet = load_worksheet(source, skip_rows=1, limit=1)
+            self.assertEqual(len(list(sheet.values)), 2)
+        source = os.path.join(self.root_dir, 'test.xlsx.csv')
+        self.assertEqual(len(list(load_worksheet(source, limit=0).values)), 1)
+        # Limited XLSX are streamed
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        with patch('xlsx_provider.loader.load_workbook', wraps=load_workbook) as m:
+            load_worksheet(source, limit=10)
+            self.assertTrue(m.call_args[1]['read_only'])
+
+    def test_cell_range(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        for engine in (ENGINE_FULL, ENGINE_STREAMING, ENGINE_SAX):
+            sheet = load_worksheet(source, cell_range='C2:D3', engine=engine)
+            self.assertEqual(list(sheet.values), [(10, 1), (20, 0)])
+            sheet = load_worksheet(source, cell_range='B:C', limit=1, engine=engine)
+            self.assertEqual(
+                list(sheet.values),
+                [('Col2Date', 'Col3Number'), (datetime(2021, 9, 7), 10)],
+            )
+        sheet = load_worksheet(source, cell_range='3:20')
+        self.assertEqual(
+            list(sheet.values),
+            [
+                ('Two', datetime(2011, 9, 8), 20, 0, 30, 0.0002),
+                ('à§æ', datetime(2011, 9, 9), 30, 1, 60, 0.0004),
+            ],
+        )
+        with self.assertRaises(KeyError):
+            load_worksheet(source, cell_range='A1:B2', columns=['A'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import shutil
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+from openpyxl import Workbook, load_workbook
+from xlsx_provider.commons import ENGINE_FULL
+from xlsx_provider.loader import load_worksheet
+from xlsx_provider.strings import read_shared_strings
+from xlsx_provider.metadata import (
+    SheetInfo,
+    get_file_format,
+    get_workbook_info,
+    get_sheet_names,
+    peek_worksheet,
+    resolve_worksheet,
+    sniff_format,
+)
+
+
+class TestMetadata(TestCase):
+    def setUp(self):
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+        self.target_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+
+    def test_workbook_info(self):
+        source = os.path.join(self.root_dir, 'high_tech.xlsx')
+        with patch('xlsx_provider.loader.load_workbook', wraps=load_workbook) as m:
+            sheets = get_workbook_info(source)
+            self.assertFalse(m.called)
+        self.assertEqual(
+            sheets,
+            (
+                SheetInfo(0, 'Figure 3', 'B1:AMJ1048576'),
+                SheetInfo(1, 'Table 2old', 'B2:K47'),
+            ),
+        )
+        self.assertEqual(sheets[1].max_row, 47)
+        self.assertEqual(sheets[1].max_column, 11)
+        self.assertEqual(get_sheet_names(source), ['Figure 3', 'Table 2old'])
+        self.assertEqual(resolve_worksheet(source, 'table 2OLD').index, 1)
+        self.assertEqual(resolve_worksheet(source, -1).title, 'Table 2old')
+        with self.assertRaises(KeyError):
+            resolve_worksheet(source, 'missing')
+        with self.assertRaises(IndexError):
+            resolve_worksheet(source, 2)
+        # XLS
+        source = os.path.join(self.root_dir, 'test.xls')
+        self.assertEqual(get_workbook_info(source), (SheetInfo(0, 'Sheet1'),))
+        self.assertIsNone(get_workbook_info(source)[0].max_row)
+
+    def test_peek(self):
+        for filename in ('test.xlsx', 'test.xls', 'types.xlsx', 'types.xls'):
+            source = os.path.join(self.root_dir, filename)
+            expected = list(load_worksheet(source, limit=2).values)
+            self.assertEqual(list(peek_worksheet(source, num_rows=3)), expected)
+            self.assertEqual(
+                list(peek_worksheet(source, num_rows=2, skip_rows=1)),
+                list(load_worksheet(source, skip_rows=1, limit=1).values),
+            )
+            self.assertEqual(peek_worksheet(source, num_rows=0), ())
+        source = os.path.join(self.root_dir, 'high_tech.xlsx')
+        rows = peek_worksheet(source, 'Table 2old', num_rows=4)
+        self.assertEqual(
+            rows, tuple(load_worksheet(source, worksheet=1, limit=3).values)
+        )
+
+    def test_peek_shared_strings(self):
+        # Only the head of the shared strings table is parsed
+        target = os.path.join(self.target_dir, 'strings.xlsx')
+        shutil.copy(os.path.join(self.root_dir, 'high_tech.xlsx'), target)
+        stores = []
+
+        def wrap_read_shared_strings(*args, **kwargs):
+            stores.append(read_shared_strings(*args, **kwargs))
+            return stores[-1]
+
+        with patch(
+            'xlsx_provider.xlsx_reader.read_shared_strings', wrap_read_shared_strings
+        ), patch('xlsx_provider.strings.CHUNK_SIZE', 64):
+            rows = peek_worksheet(target, 'Table 2old', num_rows=3)
+        self.assertEqual(
+            rows, tuple(load_worksheet(target, worksheet=1, limit=2).values)
+        )
+        self.assertEqual(len(stores), 1)
+        self.assertLess(len(stores[0]), 41)
+        self.assertIn(stores[0][14], rows[1])
+
+    def test_cache(self):
+        target = os.path.join(self.target_dir, 'test.xlsx')
+        wb = Workbook()
+        wb.active.title = 'first'
+        wb.active.append(['a', 'b'])
+        wb.save(target)
+        self.assertEqual(get_sheet_names(target), ['first'])
+        self.assertEqual(peek_worksheet(target), (('a', 'b'),))
+        with patch('xlsx_provider.xlsx_reader.XLSXReader.read_workbook') as m:
+            self.assertEqual(get_sheet_names(target), ['first'])
+            self.assertEqual(peek_worksheet(target), (('a', 'b'),))
+            self.assertFalse(m.called)
+        # The file is read again when it is modified
+        wb.create_sheet('second')
+        wb.active.append([1, 2])
+        wb.save(target)
+        stat = os.stat(target)
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        self.assertEqual(get_sheet_names(target), ['first', 'second'])
+        self.assertEqual(peek_worksheet(target), (('a', 'b'), (1, 2)))
+
+    def test_sniff(self):
+        # Files with a wrong extension
+        files = {
+            'xlsx.xls': 'test.xlsx',
+            'xls.xlsx': 'test.xls',
+            'parquet.dat': 'test.xls.parquet',
+            'csv.xls': 'test.xlsx.csv',
+        }
+        for filename, source in files.items():
+            source = os.path.join(self.root_dir, source)
+            target = os.path.join(self.target_dir, filename)
+            shutil.copy(source, target)
+            self.assertEqual(
+                list(load_worksheet(target, csv_delimiter='|').values),
+                list(load_worksheet(source, csv_delimiter='|').values),
+            )
+        self.assertEqual(
+            get_file_format(os.path.join(self.target_dir, 'xls.xlsx')), 'xls'
+        )
+        self.assertEqual(
+            get_sheet_names(os.path.join(self.target_dir, 'xls.xlsx')), ['Sheet1']
+        )
+        self.assertEqual(
+            get_sheet_names(os.path.join(self.target_dir, 'xlsx.xls')), ['Sheet1']
+        )
+        # A JSON file named .csv is still a CSV file (detected by heuristics)
+        source = os.path.join(self.root_dir, 'test.xls.json')
+        shutil.copy(source, os.path.join(self.target_dir, 'json.csv'))
+        self.assertEqual(
+            sniff_format(os.path.join(self.target_dir, 'json.csv')), 'json'
+        )
+        self.assertEqual(
+            get_file_format(os.path.join(self.target_dir, 'json.csv')), 'csv'
+        )
+        # HTML tables named .xls fail before opening the workbook
+        target = os.path.join(self.target_dir, 'html.xls')
+        with open(target, 'w') as f:
+            f.write('<html><body><table><tr><td>1</td></tr></table></body></html>')
+        with patch('xlrd.open_workbook') as m:
+            with self.assertRaises(KeyError):
+                load_worksheet(target)
+            self.assertFalse(m.called)
+        # The detected format is cached
+        with patch('xlsx_provider.metadata.sniff_bytes') as m:
+            self.assertEqual(sniff_format(target), 'html')
+            self.assertFalse(m.called)
+        # Forced file format
+        self.assertEqual(
+            list(
+                load_worksheet(
+                    os.path.join(self.target_dir, 'json.csv'), ext='json'
+                ).values
+            ),
+            list(load_worksheet(source).values),
+        )
+
+    def test_missing_worksheet(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        with patch('xlsx_provider.loader.load_workbook', wraps=load_workbook) as m:
+            with self.assertRaises(KeyError):
+                load_worksheet(source, worksheet='missing', engine=ENGINE_FULL)
+            self.assertFalse(m.called)
+            load_worksheet(source, worksheet='SHEET1', engine=ENGINE_FULL)
+            self.assertTrue(m.called)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import json
+import shutil
+import tempfile
+import pyarrow
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import Workbook
+import pyarrow.parquet
+from unittest import TestCase, main
+from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator
+from xlsx_provider.schema import SchemaStore
+
+
+def save_schemas(filename, worker, count=25):
+    store = SchemaStore(filename)
+    for i in range(0, count):
+        store.save('{}.{}'.format(worker, i), ['a'], ['a'], {'a': 'str'})
+
+
+class TestSchema(TestCase):
+    def setUp(self):
+        self.target_dir = tempfile.mkdtemp()
+        self.store = os.path.join(self.target_dir, 'schemas.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+
+    def convert(self, data, name='day.csv', **kwargs):
+        source = os.path.join(self.target_dir, name)
+        with open(source, 'w') as f:
+            f.write(data)
+        target = source + '.parquet'
+        so = FromXLSXOperator(
+            task_id='test',
+            source=source,
+            target=target,
+            file_format='parquet',
+            schema_store=self.store,
+            **kwargs
+        )
+        so.execute({})
+        return pyarrow.parquet.read_table(target).schema
+
+    def test_store(self):
+        self.convert('A a,b\n1,x\n2.5,\n')
+        with open(self.store, 'r') as f:
+            schema = json.load(f)['test']
+        self.assertEqual(schema['header'], ['A a', 'b'])
+        self.assertEqual(schema['names'], ['a_a', 'b'])
+        self.assertEqual(schema['types'], {'a_a': 'double', 'b': 'str'})
+        # Stored types are reused
+        schema = self.convert('A a,b\n1,\n2,\n')
+        self.assertEqual(schema.field('a_a').type, pyarrow.float64())
+        self.assertEqual(schema.field('b').type, pyarrow.string())
+
+    def test_mismatch(self):
+        self.convert('a,b\n1,x\n2,y\n')
+        # Incompatible types
+        schema = self.convert('a,b\nx,1\ny,2\n')
+        self.assertEqual(schema.field('a').type, pyarrow.string())
+        self.assertEqual(schema.field('b').type, pyarrow.int64())
+        # Different header
+        schema = self.convert('c,a\n1,x\n')
+        self.assertEqual(schema.names, ['c', 'a'])
+        self.assertEqual(schema.field('a').type, pyarrow.string())
+
+    def test_pattern(self):
+        SchemaStore(self.store).save(
+            os.path.join(self.target_dir, 'day_*.csv'), ['a'], ['x'], {'x': 'double'}
+        )
+        schema = self.convert('a\n1\n', name='day_1.csv', schema_key='other')
+        self.assertEqual(schema.names, ['x'])
+        self.assertEqual(schema.field('x').type, pyarrow.float64())
+        self.assertIsNotNone(SchemaStore(self.store).lookup('other'))
+
+    def test_concurrent_save(self):
+        # The updates of parallel writers are not lost
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(save_schemas, [self.store] * 4, range(0, 4)))
+        self.assertEqual(len(SchemaStore(self.store).load()), 100)
+        # Worksheets converted in parallel
+        source = os.path.join(self.target_dir, 'sheets.xlsx')
+        wb = Workbook()
+        wb.active.append(['a', 'b'])
+        wb.active.append([1, 'x'])
+        wb.create_sheet().append(['c'])
+        wb.save(source)
+        FromXLSXOperator(
+            task_id='sheets',
+            source=source,
+            worksheets={
+                0: os.path.join(self.target_dir, '0.csv'),
+                1: os.path.join(self.target_dir, '1.csv'),
+            },
+            file_format='csv',
+            schema_store=self.store,
+            max_workers=2,
+        ).execute({})
+        schemas = SchemaStore(self.store).load()
+        self.assertIn('sheets.0', schemas)
+        self.assertIn('sheets.1', schemas)
+
+
+if __name__ == '__main__':
+    main()
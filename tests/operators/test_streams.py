@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+import io
+import os
+import mmap
+import os.path
+import shutil
+import tempfile
+import pyarrow
+import pyarrow.parquet
+from unittest import TestCase, main
+from xlsx_provider.commons import ENGINE_SAX, ENGINE_STREAMING
+from xlsx_provider.loader import load_worksheet
+from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator
+from xlsx_provider.operators.from_xlsx_query_operator import FromXLSXQueryOperator
+from xlsx_provider.operators.to_xlsx_operator import ToXLSXOperator
+from xlsx_provider.streams import BufferFile
+
+
+class Stream(io.RawIOBase):
+    "Non-seekable stream"
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self.data.readinto(b)
+
+
+class TestStreams(TestCase):
+    def setUp(self):
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+        self.target_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+
+    def read(self, filename):
+        with open(os.path.join(self.root_dir, filename), 'rb') as f:
+            return f.read()
+
+    def test_buffer_file(self):
+        f = BufferFile(b'0123456789')
+        self.assertEqual(f.read(3), b'012')
+        self.assertEqual(f.seek(-2, io.SEEK_END), 8)
+        self.assertEqual(f.read(), b'89')
+        self.assertEqual(f.read(), b'')
+        f.seek(1)
+        self.assertEqual(f.tell(), 1)
+        with self.assertRaises(ValueError):
+            f.seek(-1)
+
+    def test_sources(self):
+        for filename in (
+            'test.xlsx',
+            'test.xls',
+            'test.xls.parquet',
+            'test.xlsx.csv',
+            'test.xls.json',
+            'test.xls.jsonl',
+        ):
+            source = os.path.join(self.root_dir, filename)
+            data = self.read(filename)
+            expected = list(load_worksheet(source, csv_delimiter='|').values)
+            with open(source, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                for stream in (data, io.BytesIO(data), Stream(data), mapped):
+                    self.assertEqual(
+                        list(load_worksheet(stream, csv_delimiter='|').values),
+                        expected,
+                    )
+                mapped.close()
+        data = self.read('types.xlsx')
+        expected = list(load_worksheet(data, engine=ENGINE_STREAMING).values)
+        self.assertEqual(list(load_worksheet(data, engine=ENGINE_SAX).values), expected)
+
+    def test_from_xlsx(self):
+        source = os.path.join(self.root_dir, 'types.xlsx')
+        for file_format in ('parquet', 'csv', 'json', 'jsonl'):
+            target = os.path.join(self.target_dir, 'types.' + file_format)
+            FromXLSXOperator(
+                task_id='test', source=source, target=target, file_format=file_format
+            ).execute({})
+            with open(target, 'rb') as f:
+                expected = f.read()
+            stream = io.BytesIO()
+            FromXLSXOperator(
+                task_id='test',
+                source=self.read('types.xlsx'),
+                target=stream,
+                file_format=file_format,
+            ).execute({})
+            self.assertEqual(stream.getvalue(), expected)
+            self.assertFalse(stream.closed)
+        # Text stream
+        stream = io.StringIO()
+        FromXLSXOperator(
+            task_id='test', source=source, target=stream, file_format='csv'
+        ).execute({})
+        self.assertEqual(stream.getvalue().encode('utf8'), expected_csv(self, source))
+
+    def test_promotion(self):
+        stream = io.BytesIO()
+        FromXLSXOperator(
+            task_id='test',
+            source=io.BytesIO(b'a,b\n1,x\n2,y\n3.5,z\n'),
+            target=stream,
+            file_format='parquet',
+            engine='csv',
+            batch_size=2,
+        ).execute({})
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(stream.getvalue()))
+        self.assertEqual(table.schema.field('a').type, pyarrow.float64())
+        self.assertEqual(table.column('a').to_pylist(), [1.0, 2.0, 3.5])
+        self.assertEqual(os.listdir(self.target_dir), [])
+
+    def test_worksheets(self):
+        targets = [io.BytesIO(), io.BytesIO()]
+        FromXLSXOperator(
+            task_id='test',
+            source=Stream(self.read('high_tech.xlsx')),
+            worksheets={0: targets[0], 'Table 2old': targets[1]},
+            file_format='csv',
+            max_workers=2,
+        ).execute({})
+        for i, target in enumerate(targets):
+            expected = os.path.join(self.target_dir, '{}.csv'.format(i))
+            FromXLSXOperator(
+                task_id='test',
+                source=os.path.join(self.root_dir, 'high_tech.xlsx'),
+                target=expected,
+                worksheet=i,
+                file_format='csv',
+            ).execute({})
+            with open(expected, 'rb') as f:
+                self.assertEqual(target.getvalue(), f.read())
+
+    def test_to_xlsx(self):
+        target = io.BytesIO()
+        ToXLSXOperator(
+            task_id='test',
+            source=self.read('test.xlsx.csv'),
+            target=target,
+            csv_delimiter='|',
+        ).execute({})
+        self.assertEqual(
+            list(load_worksheet(target.getvalue()).values),
+            list(
+                load_worksheet(
+                    os.path.join(self.root_dir, 'test.xlsx.csv'), csv_delimiter='|'
+                ).values
+            ),
+        )
+
+    def test_query(self):
+        for file_format in ('parquet', 'csv'):
+            target = io.BytesIO()
+            FromXLSXQueryOperator(
+                task_id='test',
+                source=io.BytesIO(self.read('test.xlsx')),
+                target=target,
+                file_format=file_format,
+                query='select count(*) as n from xls',
+            ).execute({})
+            if file_format == 'parquet':
+                table = pyarrow.parquet.read_table(
+                    pyarrow.BufferReader(target.getvalue())
+                )
+                self.assertEqual(table.column('n').to_pylist(), [4])
+            else:
+                self.assertEqual(target.getvalue().splitlines(), [b'n', b'4'])
+
+
+def expected_csv(test, source):
+    target = os.path.join(test.target_dir, 'text.csv')
+    FromXLSXOperator(
+        task_id='test', source=source, target=target, file_format='csv'
+    ).execute({})
+    with open(target, 'rb') as f:
+        return f.read()
+
+
+if __name__ == '__main__':
+    main()
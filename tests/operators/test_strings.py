@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import io
+import os
+import os.path
+import pickle
+import zipfile
+import pyarrow
+from unittest import TestCase, main
+from openpyxl.reader.strings import read_string_table
+from xlsx_provider.strings import read_shared_strings, SharedStrings
+from xlsx_provider.operators.from_xlsx_operator import to_list
+from xlsx_provider.xlsx_reader import XLSXReader
+
+SHARED_STRINGS_XML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<si><t>plain</t></si>
+<si><t xml:space="preserve">  spaces  </t></si>
+<si><t/></si>
+<si><r><rPr><b/></rPr><t>bo</t></r><r><t>ld</t></r><rPh sb="0" eb="1"><t>X</t></rPh></si>
+<si><t>a_x005F_x000D_b</t></si>
+<si><t>&#233;t&amp;&lt;</t></si>
+</sst>'''
+
+
+class TestStrings(TestCase):
+    def setUp(self):
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+
+    def test_read(self):
+        strings = read_shared_strings(io.BytesIO(SHARED_STRINGS_XML))
+        expected = read_string_table(io.BytesIO(SHARED_STRINGS_XML))
+        self.assertEqual(list(strings), expected)
+        self.assertEqual(len(strings), 6)
+        self.assertEqual(strings[-1], 'ét&<')
+        with self.assertRaises(IndexError):
+            strings[6]
+        for filename in ('test.xlsx', 'types.xlsx', 'high_tech.xlsx'):
+            reader = XLSXReader(os.path.join(self.root_dir, filename))
+            with zipfile.ZipFile(os.path.join(self.root_dir, filename)) as z:
+                with z.open(reader.shared_strings_path) as f:
+                    expected = read_string_table(f)
+            self.assertEqual(list(reader.shared_strings), expected)
+
+    def test_dictionary_array(self):
+        strings = SharedStrings()
+        for value in ('zero', 'one', 'two', 'three'):
+            strings.append(value)
+        self.assertEqual(
+            strings.to_arrow().to_pylist(), ['zero', 'one', 'two', 'three']
+        )
+        array = strings.dictionary_array([2, None, 0, 2])
+        self.assertEqual(array.to_pylist(), ['two', None, 'zero', 'two'])
+        # Only the used strings are in the dictionary
+        self.assertEqual(array.dictionary.to_pylist(), ['zero', 'two'])
+        self.assertEqual(array.dictionary.type, pyarrow.string())
+
+    def test_spill(self):
+        strings = read_shared_strings(io.BytesIO(SHARED_STRINGS_XML), spill=True)
+        self.assertIsNotNone(strings.file)
+        expected = read_string_table(io.BytesIO(SHARED_STRINGS_XML))
+        self.assertEqual(list(strings), expected)
+        self.assertEqual(strings.to_arrow().to_pylist(), expected)
+        self.assertEqual(
+            strings.dictionary_array([5, 0]).to_pylist(), ['ét&<', 'plain']
+        )
+        # Empty store
+        self.assertEqual(list(SharedStrings(spill=True)), [])
+        # The spill file is shared by the copies
+        copy = pickle.loads(pickle.dumps(strings))
+        self.assertEqual(copy.file.name, strings.file.name)
+        self.assertEqual(list(copy), expected)
+        strings.close()
+        self.assertEqual(list(copy), expected)
+
+    def test_batches(self):
+        source = os.path.join(self.root_dir, 'test.xlsx')
+        reader = XLSXReader(source)
+        title, path = reader.get_sheet(0)
+        batch = next(reader.iter_batches(path, min_row=2))
+        self.assertIsInstance(batch[0], pyarrow.DictionaryArray)
+        self.assertEqual(batch[0].to_pylist(), ['One', 'Two', 'à§æ'])
+        self.assertEqual(batch[2], [10, 20, 30])
+        self.assertEqual(
+            [list(x) for x in zip(*[to_list(x) for x in batch])],
+            [list(x) for x in reader.iter_rows(path, min_row=2)],
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+import os
+import csv
+import os.path
+import shutil
+import tempfile
+import pyarrow.parquet
+from unittest import TestCase, main
+from unittest.mock import patch
+from airflow.exceptions import AirflowException
+from openpyxl import Workbook, load_workbook
+from xlsx_provider.commons import ENGINE_FULL, ENGINE_SAX, ENGINE_STREAMING
+from xlsx_provider.loader import load_worksheet, open_workbook
+from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator
+from xlsx_provider.xlsx_reader import XLSXReader
+
+
+class TestWorksheets(TestCase):
+    def setUp(self):
+        self.root_dir = os.path.dirname(os.path.realpath(__file__))
+        self.target_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.target_dir, 'sheets.xlsx')
+        wb = Workbook()
+        sheet = wb.active
+        sheet.title = 'first'
+        sheet.append(['name', 'value'])
+        for i in range(0, 20):
+            sheet.append(['a{}'.format(i % 3), i])
+        sheet = wb.create_sheet('second')
+        sheet.append(['title'])
+        sheet.append(['code', 'amount', 'note'])
+        for i in range(0, 10):
+            sheet.append(['c{}'.format(i), i * 1.5, 'a1'])
+        sheet = wb.create_sheet('third')
+        sheet.append(['x'])
+        sheet.append(['1'])
+        wb.save(self.source)
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+
+    def read_csv(self, target):
+        with open(target, 'r') as f:
+            return list(csv.reader(f))
+
+    def test_open_workbook(self):
+        for engine in (ENGINE_FULL, ENGINE_STREAMING, ENGINE_SAX):
+            with patch('xlsx_provider.loader.load_workbook', wraps=load_workbook) as m:
+                with open_workbook(self.source, engine=engine) as workbook:
+                    for worksheet in ('first', 1, 'THIRD'):
+                        self.assertEqual(
+                            list(
+                                load_worksheet(
+                                    self.source, worksheet=worksheet, workbook=workbook
+                                ).values
+                            ),
+                            list(
+                                load_worksheet(
+                                    self.source, worksheet=worksheet, engine=engine
+                                ).values
+                            ),
+                        )
+                # The workbook is loaded once by open_workbook, once by each load_worksheet
+                if engine != ENGINE_SAX:
+                    self.assertEqual(m.call_count, 4)
+        source = os.path.join(self.root_dir, 'types.xls')
+        with open_workbook(source) as workbook:
+            self.assertEqual(
+                list(load_worksheet(source, workbook=workbook, limit=5).values),
+                list(load_worksheet(source, limit=5).values),
+            )
+        with self.assertRaises(KeyError):
+            open_workbook(self.source, engine='other')
+
+    def test_worksheets(self):
+        targets = [
+            os.path.join(self.target_dir, x) for x in ('1.csv', '2.csv', '3.parquet')
+        ]
+        worksheets = {
+            'first': targets[0],
+            '1': {
+                'target': targets[1],
+                'skip_rows': 1,
+                'types': ['amount=str'],
+            },
+            'third': {'target': targets[2], 'file_format': 'parquet'},
+        }
+        for engine in (ENGINE_FULL, ENGINE_STREAMING, ENGINE_SAX):
+            with patch.object(
+                XLSXReader,
+                'read_workbook',
+                autospec=True,
+                side_effect=XLSXReader.read_workbook,
+            ) as m:
+                FromXLSXOperator(
+                    task_id='test',
+                    source=self.source,
+                    worksheets=worksheets,
+                    file_format='csv',
+                    engine=engine,
+                ).execute({})
+                if engine == ENGINE_SAX:
+                    # The workbook is opened once
+                    self.assertEqual(m.call_count, 1)
+            rows = self.read_csv(targets[0])
+            self.assertEqual(rows[0], ['name', 'value'])
+            self.assertEqual(rows[1:3], [['a0', '0'], ['a1', '1']])
+            self.assertEqual(len(rows), 21)
+            rows = self.read_csv(targets[1])
+            self.assertEqual(rows[0], ['code', 'amount', 'note'])
+            self.assertEqual(rows[2], ['c1', '1.5', 'a1'])
+            table = pyarrow.parquet.read_table(targets[2])
+            self.assertEqual(table.to_pydict(), {'x': [1]})
+            # Same results of the single worksheet conversion
+            target = os.path.join(self.target_dir, 'single.csv')
+            FromXLSXOperator(
+                task_id='test',
+                source=self.source,
+                target=target,
+                worksheet=1,
+                skip_rows=1,
+                types={'amount': 'str'},
+                file_format='csv',
+                engine=engine,
+            ).execute({})
+            self.assertEqual(self.read_csv(target), self.read_csv(targets[1]))
+
+    def test_parallel(self):
+        worksheets = {}
+        expected = {}
+        for i, worksheet in enumerate(('first', 'second', 'third')):
+            target = os.path.join(self.target_dir, '{}.csv'.format(i))
+            worksheets[worksheet] = {'target': target, 'skip_rows': int(i == 1)}
+            expected[target] = list(
+                load_worksheet(
+                    self.source, worksheet=worksheet, skip_rows=int(i == 1)
+                ).values
+            )
+        for engine in (None, ENGINE_SAX, ENGINE_FULL):
+            FromXLSXOperator(
+                task_id='test',
+                source=self.source,
+                worksheets=worksheets,
+                file_format='csv',
+                engine=engine,
+                max_workers=2,
+            ).execute({})
+            for target, rows in expected.items():
+                self.assertEqual(len(self.read_csv(target)), len(rows))
+            self.assertEqual(
+                self.read_csv(os.path.join(self.target_dir, '1.csv'))[1],
+                ['c0', '0', 'a1'],
+            )
+        # Errors in the worker processes
+        worksheets['missing'] = os.path.join(self.target_dir, 'missing.csv')
+        with self.assertRaises(AirflowException):
+            FromXLSXOperator(
+                task_id='test', source=self.source, worksheets=worksheets, max_workers=2
+            ).execute({})
+
+    def test_worksheets_errors(self):
+        for worksheets in (
+            {'first': {'skip_rows': 1}},
+            {'first': {'target': 'x.csv', 'other': 1}},
+            {'missing': os.path.join(self.target_dir, 'x.csv')},
+        ):
+            with self.assertRaises(AirflowException):
+                FromXLSXOperator(
+                    task_id='test', source=self.source, worksheets=worksheets
+                ).execute({})
+
+
+if __name__ == '__main__':
+    main()
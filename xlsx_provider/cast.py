@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+import sys
+import datetime
+from xlsx_provider.commons import (
+    TYPE_DATETIME,
+    TYPE_DOUBLE,
+    TYPE_INT,
+    TYPE_NULLABLE_INT,
+    TYPE_STRING,
+    NUMERIC_TYPES,
+)
+
+__all__ = [
+    'cast_arrow_column',
+    'cast_dictionary_column',
+    'cast_native_column',
+    'cast_string_column',
+]
+
+#: Characters removed by str.strip()
+WHITESPACE = ''.join(chr(x) for x in range(0, sys.maxunicode + 1) if chr(x).isspace())
+#: Digits with optional underscores (as accepted by int/float)
+DIGITS = '[0-9](?:_?[0-9])*'
+#: Strings accepted by int()
+INT_PATTERN = '^[+-]?' + DIGITS + '$'
+#: Strings accepted by float() but not by int()
+FLOAT_PATTERN = (
+    '^[+-]?(?:(?:{d}(?:\\.(?:{d})?)?|\\.{d})(?:[eE][+-]?{d})?|(?i:nan|inf|infinity))$'
+).format(d=DIGITS)
+#: Non-ASCII strings that could still be accepted by int/float (e.g. unicode digits)
+MAYBE_NUMBER_PATTERN = '^[\\p{Nd}\\p{Z}\\s+\\-._eEnNaAiIfFtTyY]*$'
+
+#: Python types stored without conversion in a column of the given datatype
+NATIVE_TYPES = {
+    TYPE_INT: {int},
+    TYPE_NULLABLE_INT: {int},
+    TYPE_DOUBLE: {int, float},
+    TYPE_DATETIME: {datetime.datetime},
+    TYPE_STRING: {int, float, datetime.datetime},
+}
+
+STRING = 0
+INT = 1
+DOUBLE = 2
+NULL = 3
+
+
+def cast_string_column(name, values, datatype=None, nullable_int=False):
+    """
+    Cast a column of strings to int/double/string, one column at a time
+
+    The result is the same of calling prepare_value and get_type on each cell
+    and updating the column datatype cell by cell: the first value sets
+    the datatype, int is promoted to double, empty strings are replaced
+    with None in numeric columns.
+    Return the values and the column datatype, or None if the column
+    contains values that are not strings (or None).
+
+    :param name: column name
+    :type name: str
+    :param values: column values
+    :type values: list
+    :param datatype: current column datatype
+    :type datatype: str
+    :param nullable_int: nullable integer data type support
+    :type nullable_int: bool
+    """
+    import numpy
+    import pyarrow
+    import pyarrow.compute as pc
+
+    try:
+        array = pyarrow.array(values, type=pyarrow.string())
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        return None
+    stripped = pc.utf8_trim(array, characters=WHITESPACE)
+    # Classify the cells
+    ascii = pc.string_is_ascii(stripped)
+    is_int = pc.and_(ascii, pc.match_substring_regex(stripped, INT_PATTERN))
+    is_float = pc.and_(ascii, pc.match_substring_regex(stripped, FLOAT_PATTERN))
+    maybe_number = pc.and_(
+        pc.invert(ascii), pc.match_substring_regex(stripped, MAYBE_NUMBER_PATTERN)
+    )
+    if pc.any(maybe_number).as_py():
+        return None  # non-ASCII numbers are rare, let the caller handle them
+    kinds = numpy.full(len(array), STRING, dtype=numpy.int8)
+    kinds[pc.fill_null(is_float, False).to_numpy(zero_copy_only=False)] = DOUBLE
+    kinds[pc.fill_null(is_int, False).to_numpy(zero_copy_only=False)] = INT
+    kinds[array.is_null().to_numpy(zero_copy_only=False)] = NULL
+    # Cast the numbers
+    cleaned = pc.replace_substring_regex(
+        pc.replace_substring(stripped, '_', ''), '^\\+', ''
+    )
+    try:
+        ints = pc.cast(pc.if_else(is_int, cleaned, None), pyarrow.int64())
+    except (pyarrow.ArrowInvalid, OverflowError):
+        return None
+    floats = pc.cast(pc.if_else(is_float, cleaned, None), pyarrow.float64())
+    # Column datatype
+    present = numpy.flatnonzero(kinds != NULL)
+    numeric_from = None  # position of the first cell of a numeric column
+    if datatype is None and len(present):
+        first = present[0]
+        datatype = {STRING: TYPE_STRING, INT: TYPE_INT, DOUBLE: TYPE_DOUBLE}[
+            kinds[first]
+        ]
+        if datatype == TYPE_INT and nullable_int:
+            datatype = TYPE_NULLABLE_INT
+        if datatype in NUMERIC_TYPES:
+            numeric_from = first
+    elif datatype in NUMERIC_TYPES:
+        numeric_from = 0
+    if datatype in (TYPE_INT, TYPE_NULLABLE_INT) and (kinds == DOUBLE).any():
+        datatype = TYPE_DOUBLE
+    # Values
+    if ((kinds == INT) | (kinds == NULL)).all():
+        return ints.to_pylist(), datatype
+    if ((kinds == STRING) | (kinds == NULL)).all() and numeric_from is None:
+        return stripped.to_pylist(), datatype
+    result = []
+    for i, (kind, x, y, z) in enumerate(
+        zip(kinds, ints.to_pylist(), floats.to_pylist(), stripped.to_pylist())
+    ):
+        if kind == INT:
+            result.append(x)
+        elif kind == DOUBLE:
+            result.append(y)
+        elif kind == STRING and (z or numeric_from is None or i < numeric_from):
+            result.append(z)
+        else:
+            result.append(None)
+    return result, datatype
+
+
+def cast_native_column(name, values, datatype=None, nullable_int=False):
+    """
+    Check the types of a column of native values (e.g. numbers and dates
+    read from XLSX/XLS files) against the column datatype
+
+    If the values don't need any conversion, the only check is
+    the set of the value types (instead of converting each cell).
+    The first value sets the datatype and int is promoted to double,
+    as in the cell by cell conversion.
+    Return the values and the column datatype, or None if the column
+    contains values that have to be converted (e.g. strings).
+
+    :param name: column name
+    :type name: str
+    :param values: column values
+    :type values: list
+    :param datatype: current column datatype
+    :type datatype: str
+    :param nullable_int: nullable integer data type support
+    :type nullable_int: bool
+    """
+    types = set(map(type, values))
+    types.discard(type(None))
+    if datatype is None:
+        if not types:
+            return values, datatype
+        first = type(next(x for x in values if x is not None))
+        if first is int:
+            datatype = TYPE_NULLABLE_INT if nullable_int else TYPE_INT
+        elif first is float:
+            datatype = TYPE_DOUBLE
+        elif first is datetime.datetime:
+            datatype = TYPE_DATETIME
+        else:
+            return None
+    if types <= NATIVE_TYPES.get(datatype, set()):
+        return values, datatype
+    elif datatype in (TYPE_INT, TYPE_NULLABLE_INT) and types <= {int, float}:
+        return values, TYPE_DOUBLE
+    return None
+
+
+def cast_dictionary_column(name, values, datatype=None, nullable_int=False):
+    """
+    Cast a column of strings encoded as an Arrow dictionary array
+    (e.g. shared strings), converting only the dictionary values
+
+    The values are stripped as in cast_string_column; the column is
+    converted only if the column is a string column (no numbers in the
+    dictionary), the dictionary indices are not changed.
+    Return the dictionary array and the column datatype, or None
+    if the column has to be converted value by value.
+
+    :param name: column name
+    :type name: str
+    :param values: column values
+    :type values: pyarrow.DictionaryArray
+    :param datatype: current column datatype
+    :type datatype: str
+    :param nullable_int: nullable integer data type support
+    :type nullable_int: bool
+    """
+    import pyarrow
+
+    if datatype not in (None, TYPE_STRING) or values.null_count == len(values):
+        return None
+    result = cast_string_column(
+        name, values.dictionary.to_pylist(), TYPE_STRING, nullable_int
+    )
+    if result is None or not all(isinstance(x, str) for x in result[0]):
+        return None
+    dictionary = pyarrow.array(result[0], type=pyarrow.string())
+    return pyarrow.DictionaryArray.from_arrays(values.indices, dictionary), TYPE_STRING
+
+
+def cast_arrow_column(name, values, datatype=None, nullable_int=False):
+    """
+    Check a column of integers or floats encoded as an Arrow array
+    (e.g. typed by the Arrow CSV engine) against the column datatype,
+    without converting the values
+
+    The first value sets the datatype and int is promoted to double,
+    as in cast_native_column.
+    Return the array and the column datatype, or None if the column
+    has to be converted value by value (e.g. strings or empty columns).
+
+    :param name: column name
+    :type name: str
+    :param values: column values
+    :type values: pyarrow.Array
+    :param datatype: current column datatype
+    :type datatype: str
+    :param nullable_int: nullable integer data type support
+    :type nullable_int: bool
+    """
+    import pyarrow
+
+    if values.null_count == len(values):
+        return None
+    elif pyarrow.types.is_integer(values.type):
+        if datatype is None:
+            datatype = TYPE_NULLABLE_INT if nullable_int else TYPE_INT
+    elif pyarrow.types.is_floating(values.type):
+        if datatype in (None, TYPE_INT, TYPE_NULLABLE_INT):
+            datatype = TYPE_DOUBLE
+    else:
+        return None
+    if datatype not in NUMERIC_TYPES:
+        return None
+    return values, datatype
@@ -13,10 +13,14 @@ from enum import Enum
 __all__ = [
     'check_column_names',
     'get_column_names',
+    'get_column_indexes',
     'get_type',
+    'get_arrow_type',
+    'to_arrow_array',
     'prepare_value',
     'clean_key',
     'col_number_to_name',
+    'col_name_to_number',
     'copy_cells',
     'print_sheet',
     'quoted',
@@ -30,6 +34,16 @@ __all__ = [
     'DEFAULT_CSV_DELIMITER',
     'DEFAULT_CSV_HEADER',
     'DEFAULT_TABLE_NAME',
+    'DEFAULT_BATCH_SIZE',
+    'DEFAULT_STREAMING_THRESHOLD',
+    'DEFAULT_SPILL_THRESHOLD',
+    'DEFAULT_METADATA_CACHE_SIZE',
+    'ENGINE_FULL',
+    'ENGINE_STREAMING',
+    'ENGINE_SAX',
+    'ENGINE_SPILL',
+    'ENGINE_ARROW',
+    'ENGINE_CSV',
     'INDEX_COLUMN_NAME',
     'TYPE_DOUBLE',
     'TYPE_INT',
@@ -59,6 +73,28 @@ XLS_EPOC = datetime.datetime(1899, 12, 30)
 XLSX_EPOC = datetime.datetime(1900, 1, 1)
 #: Default Query Operator table name
 DEFAULT_TABLE_NAME = 'xls'
+#: Default number of rows processed at a time
+DEFAULT_BATCH_SIZE = 10000
+#: Uncompressed worksheet and shared strings XML size (bytes) above which
+#: XLSX files are loaded with the streaming engine
+DEFAULT_STREAMING_THRESHOLD = 64 * 1024 * 1024
+#: Uncompressed shared strings XML size (bytes) above which XLSX files
+#: are loaded with the spill engine
+DEFAULT_SPILL_THRESHOLD = 256 * 1024 * 1024
+#: Number of files whose metadata is cached (see xlsx_provider.metadata)
+DEFAULT_METADATA_CACHE_SIZE = 128
+#: Full XLSX engine (load the whole workbook in memory)
+ENGINE_FULL = 'full'
+#: Streaming XLSX engine (read-only mode, rows are parsed on demand)
+ENGINE_STREAMING = 'streaming'
+#: SAX XLSX engine (the worksheet XML is parsed directly, without openpyxl cells)
+ENGINE_SAX = 'sax'
+#: Spill XLSX engine (SAX engine, the shared strings are spilled to disk)
+ENGINE_SPILL = 'spill'
+#: Arrow CSV engine (multithreaded columnar reader, typed columns)
+ENGINE_ARROW = 'arrow'
+#: Python CSV engine (csv module, the rows are read one at a time)
+ENGINE_CSV = 'csv'
 #: Index colummn name
 INDEX_COLUMN_NAME = '_index'
 
@@ -125,6 +161,19 @@ def col_number_to_name(col_number):
         return _col_number_to_name(col_number - 1)
 
 
+def col_name_to_number(col_name):
+    """
+    Convert a column name to number (e.g. A -> 1, B -> 2, AA -> 27)
+
+    :param col_name: column name
+    :type col_name: str
+    """
+    col_number = 0
+    for char in col_name.upper():
+        col_number = col_number * 26 + ord(char) - 64
+    return col_number
+
+
 def get_type(name, value, nullable_int=False):
     if isinstance(value, float):
         return TYPE_DOUBLE
@@ -138,6 +187,53 @@ def get_type(name, value, nullable_int=False):
         raise Exception('unsupported data type {} {}'.format(name, type(value)))
 
 
+def get_arrow_type(datatype):
+    "Return the Arrow data type of a column data type"
+    import pyarrow
+
+    if datatype is None:
+        return pyarrow.null()
+    elif datatype in (TYPE_INT, TYPE_NULLABLE_INT):
+        return pyarrow.int64()
+    elif datatype == TYPE_DOUBLE:
+        return pyarrow.float64()
+    elif datatype == TYPE_DATETIME:
+        return pyarrow.timestamp('ns')
+    elif datatype == TYPE_STRING:
+        return pyarrow.string()
+    else:
+        import numpy
+
+        return pyarrow.from_numpy_dtype(numpy.dtype(datatype))
+
+
+def to_arrow_array(name, values, datatype):
+    """
+    Convert a list of values into an Arrow array of the given data type,
+    NaN values are null (as in pandas)
+    """
+    import pyarrow
+    import pyarrow.compute as pc
+
+    type_ = get_arrow_type(datatype)
+    if isinstance(values, pyarrow.Array):
+        values = values.cast(type_)
+        if pyarrow.types.is_floating(type_):
+            values = pc.if_else(pc.is_nan(values), pyarrow.scalar(None, type_), values)
+        return values
+    try:
+        return pyarrow.array(values, type=type_, from_pandas=True)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, TypeError):
+        pass
+    if datatype == TYPE_STRING:
+        values = [x if x is None or isinstance(x, str) else str(x) for x in values]
+        return pyarrow.array(values, type=type_)
+    # Let pandas convert the values (e.g. dates to timestamps)
+    import pandas as pd
+
+    return pyarrow.Array.from_pandas(pd.Series(values, dtype=datatype), type=type_)
+
+
 def prepare_value(name, value):
     "Try cast string to int and float"
     if isinstance(value, str):
@@ -154,24 +250,63 @@ def prepare_value(name, value):
 
 def get_column_names(sheet, skip_rows=0):
     """
-    Extract the column names from the first row of the worksheet
+    Extract the column names from the header of a row source
+    (or from the first row of a worksheet, or from a header row)
 
-    :param sheet: worksheet
-    :type sheet: Worksheet
-    :param skip_rows: Number of input lines to skip
+    :param sheet: row source, worksheet or header row
+    :type sheet: RowSource or Worksheet or tuple
+    :param skip_rows: Number of worksheet lines to skip
     :type skip_rows: int
     """
-    header = sheet[1 + skip_rows]
-    names = [clean_key(x.value) for x in header if x.value is not None]
+    if hasattr(sheet, 'header'):
+        header = sheet.header
+    elif isinstance(sheet, (list, tuple)):
+        header = sheet
+    else:
+        header = next(
+            sheet.iter_rows(
+                min_row=1 + skip_rows, max_row=1 + skip_rows, values_only=True
+            ),
+            (),
+        )
+    names = [clean_key(x) for x in header if x is not None]
     # Append the column to the name if the name is not unique
     return [
-        x
-        if (i == 0 or x not in names[:i])
-        else '{}_{}'.format(x, col_number_to_name(i + 1).lower())
+        (
+            x
+            if (i == 0 or x not in names[:i])
+            else '{}_{}'.format(x, col_number_to_name(i + 1).lower())
+        )
         for i, x in enumerate(names)
     ]
 
 
+def get_column_indexes(names, columns=None, exclude=None):
+    """
+    Return the zero-based indexes of the selected columns
+    (None if all the columns are selected)
+
+    :param names: column names
+    :type names: list of str
+    :param columns: columns to be selected, by name or by letter (e.g. 'A', 'AB')
+    :type columns: list of str
+    :param exclude: names of the columns to be excluded
+    :type exclude: list of str
+    """
+    if not columns and not exclude:
+        return None
+    indexes = []
+    for column in columns or names:
+        if column in names:
+            indexes.append(names.index(column))
+        elif re.match('^[A-Z]+$', column):
+            indexes.append(col_name_to_number(column) - 1)
+        else:
+            raise KeyError('Column {0} not found'.format(column))
+    excluded = set(names.index(x) for x in exclude or [] if x in names)
+    return [x for x in indexes if x not in excluded]
+
+
 def check_column_names(column_names):
     # Check unique columns
     if len(set(column_names)) != len(column_names):
@@ -185,10 +320,12 @@ def print_sheet(sheet, fileobj=sys.stdout):
     csw_writer.writerows(sheet.values)
 
 
-def copy_cells(source, target):
-    "Copy cells from source worksheet to target"
+def copy_cells(source, target, skip_rows=0):
+    "Copy cells from source worksheet to target, skipping the first skip_rows rows"
     for (row, col), source_cell in source._cells.items():
-        target_cell = target.cell(column=col, row=row)
+        if row <= skip_rows:
+            continue
+        target_cell = target.cell(column=col, row=row - skip_rows)
         target_cell._value = source_cell._value
         target_cell.data_type = source_cell.data_type
         if source_cell.has_style:
@@ -197,6 +334,7 @@ def copy_cells(source, target):
 
 class FileFormat(Enum):
     "File format enumerator (parquet/csv/json/jsonl)"
+
     parquet = 'parquet'
     csv = 'csv'
     json = 'json'
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+import datetime
+from xlsx_provider.cast import cast_string_column
+from xlsx_provider.commons import prepare_value, TYPE_STRING, XLSX_EPOC
+
+__all__ = [
+    'cast_datetime_column',
+    'detect_date_format',
+    'parse_date_strings',
+    'serial_to_datetime',
+    'DATE_FORMATS',
+]
+
+#: String date formats detected by parse_date_strings
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M:%S',
+    '%m/%d/%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+]
+
+#: Microseconds per day
+US_PER_DAY = 86400000000
+
+
+def serial_to_datetime(values, epoc=XLSX_EPOC):
+    """
+    Convert a list of serial dates (number of days since the epoc) to datetimes
+
+    The result is the same of epoc + datetime.timedelta(days=value),
+    rounding included, computed on the whole list at once.
+
+    :param values: serial dates
+    :type values: list of int or float
+    :param epoc: epoc
+    :type epoc: datetime.datetime
+    """
+    import numpy
+
+    days = numpy.asarray(values, dtype=numpy.float64)
+    if len(days) == 0:
+        return []
+    # Out of range values (e.g. nan, year > 9999) raise as timedelta/datetime do
+    low = (datetime.datetime.min - epoc).days
+    high = (datetime.datetime.max - epoc).days
+    if not (numpy.isfinite(days).all() and days.min() > low and days.max() < high):
+        return [epoc + datetime.timedelta(days=value) for value in values]
+    # Same steps of the timedelta constructor: whole days, whole microseconds
+    # of the day fraction, the microseconds fraction is rounded half to even
+    fraction, whole = numpy.modf(days)
+    fraction_us, whole_us = numpy.modf(fraction * US_PER_DAY)
+    us = whole.astype(numpy.int64) * US_PER_DAY + whole_us.astype(numpy.int64)
+    rounded = numpy.rint(fraction_us).astype(numpy.int64)
+    half = numpy.abs(fraction_us) == 0.5
+    if half.any():
+        odd = (us % 2) == 1
+        rounded[half] = numpy.where(odd[half], numpy.sign(fraction_us[half]), 0)
+    us = us + rounded
+    result = numpy.datetime64(epoc, 'us') + us.astype('timedelta64[us]')
+    return result.astype(object).tolist()
+
+
+def detect_date_format(value):
+    """
+    Detect the format of a date string, among DATE_FORMATS
+    Return None if the format is unknown
+
+    :param value: date string
+    :type value: str
+    """
+    import dateutil.parser
+
+    for date_format in DATE_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+        # The formatted date must be the same string (no missing zeros, ...)
+        if parsed.strftime(date_format) != value:
+            continue
+        try:
+            if parsed == dateutil.parser.parse(value):
+                return date_format
+        except (ValueError, OverflowError):
+            pass
+    return None
+
+
+def parse_date_strings(values):
+    """
+    Parse a list of date strings
+
+    The date format is detected from the first value, then the strings
+    are parsed at once. The strings in a different format
+    are parsed one by one with dateutil.
+
+    :param values: date strings
+    :type values: list of str
+    """
+    import dateutil.parser
+
+    if not values:
+        return []
+    date_format = detect_date_format(values[0])
+    if date_format is None:
+        return [dateutil.parser.parse(value) for value in values]
+    import pyarrow
+    import pyarrow.compute as pc
+
+    array = pyarrow.array(values, type=pyarrow.string())
+    parsed = pc.strptime(array, format=date_format, unit='s', error_is_null=True)
+    # Discard the dates normalized by strptime (e.g. February 30)
+    valid = pc.fill_null(
+        pc.equal(pc.strftime(parsed, format=date_format), array), False
+    )
+    return [
+        x if ok else dateutil.parser.parse(value)
+        for x, ok, value in zip(parsed.to_pylist(), valid.to_pylist(), values)
+    ]
+
+
+def cast_datetime_column(name, values, epoc=XLSX_EPOC):
+    """
+    Convert the values of a datetime column
+
+    The result is the same of converting the values one by one: strings are
+    stripped and numeric strings are converted to numbers (see prepare_value),
+    empty values are replaced with None, numbers are serial dates,
+    the other strings are parsed.
+    Return None if the column contains values of unsupported types.
+
+    :param name: column name
+    :type name: str
+    :param values: column values
+    :type values: list
+    :param epoc: serial dates epoc
+    :type epoc: datetime.datetime
+    """
+    strings = [x for x in values if isinstance(x, str)]
+    if strings:
+        result = cast_string_column(name, strings, TYPE_STRING)
+        if result is not None:
+            strings = iter(result[0])
+        else:
+            strings = iter([prepare_value(name, x) for x in strings])
+        values = [next(strings) if isinstance(x, str) else x for x in values]
+    numbers = []
+    texts = []
+    for value in values:
+        if isinstance(value, (int, float)):
+            if value:
+                numbers.append(value)
+        elif isinstance(value, str):
+            if value:
+                texts.append(value)
+        elif value is not None and not isinstance(value, datetime.datetime):
+            return None
+    numbers = iter(serial_to_datetime(numbers, epoc))
+    texts = iter(parse_date_strings(texts))
+    result = []
+    for value in values:
+        if not value:
+            result.append(None)
+        elif isinstance(value, (int, float)):
+            result.append(next(numbers))
+        elif isinstance(value, str):
+            result.append(next(texts))
+        else:
+            result.append(value)
+    return result
@@ -2,15 +2,46 @@
 
 import os
 import os.path
+import io
 import csv
 import json
-import datetime
-from openpyxl import load_workbook, Workbook
-from xlsx_provider.commons import copy_cells, DEFAULT_CSV_DELIMITER, XLS_EPOC
+import logging
+import re
+import zipfile
+from itertools import chain, islice
+from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
+from xlsx_provider.commons import (
+    get_column_indexes,
+    get_column_names,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CSV_DELIMITER,
+    DEFAULT_SPILL_THRESHOLD,
+    DEFAULT_STREAMING_THRESHOLD,
+    ENGINE_CSV,
+    ENGINE_FULL,
+    ENGINE_SAX,
+    ENGINE_SPILL,
+    ENGINE_STREAMING,
+    XLS_EPOC,
+)
+from xlsx_provider.dates import serial_to_datetime
+from xlsx_provider.source import RowSource
+from xlsx_provider.streams import is_path, input_file, open_input
 
-__all__ = ['load_worksheet']
+__all__ = ['load_worksheet', 'open_workbook', 'OpenWorkbook', 'RowSource']
 
+log = logging.getLogger(__name__)
+#: Number of characters of a JSON file read at a time
+JSON_CHUNK_SIZE = 1024 * 1024
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+#: File extensions accepted by openpyxl load_workbook
+OPENPYXL_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+#: File formats that can be read from a compressed file
+COMPRESSED_EXTENSIONS = ('csv', 'json', 'jsonl')
 loaders = {}
+xlsx_engines = {}
+decompressors = {}
 
 
 def extension(*exts):
@@ -24,129 +55,1032 @@ def extension(*exts):
     return wrap
 
 
-@extension('csv')
-def load_worksheet_csv(filename, sheet=None, skip_rows=0, csv_delimiter=None, **kwargs):
-    "Load a worksheet from a CSV file"
-    if sheet is None:
-        sheet = Workbook().active  # Create a new Workbook and get the active sheet
-    with open(filename, 'r', encoding='utf8') as f:
+def xlsx_engine(*names):
+    "XLSX engines decorator"
+
+    def wrap(f):
+        for name in names:
+            xlsx_engines[name] = f
+        return f
+
+    return wrap
+
+
+def get_name(filename):
+    "Return the filename (the name of a file object, '' for the other streams)"
+    if is_path(filename):
+        return os.fspath(filename)
+    name = getattr(filename, 'name', None)
+    return name if isinstance(name, str) else ''
+
+
+def get_size(filename):
+    "Return the size of a file (or of a seekable binary file)"
+    if is_path(filename):
+        return os.path.getsize(filename)
+    return filename.seek(0, os.SEEK_END)
+
+
+def open_xls(filename):
+    "Open an XLS workbook with xlrd (only the workbook globals are parsed)"
+    import xlrd
+
+    if is_path(filename):
+        return xlrd.open_workbook(filename, on_demand=True)
+    filename.seek(0)
+    return xlrd.open_workbook(file_contents=filename.read(), on_demand=True)
+
+
+def compression(*exts):
+    "Compressed file extensions decorator"
+
+    def wrap(f):
+        for ext in exts:
+            decompressors[ext] = f
+        return f
+
+    return wrap
+
+
+@compression('gz')
+def open_gzip(filename):
+    import gzip
+
+    return gzip.open(filename, 'rb')
+
+
+@compression('bz2')
+def open_bz2(filename):
+    import bz2
+
+    return bz2.open(filename, 'rb')
+
+
+@compression('xz')
+def open_xz(filename):
+    import lzma
+
+    return lzma.open(filename, 'rb')
+
+
+@compression('zst')
+def open_zstd(filename):
+    import pyarrow
+
+    # Buffered, as the other decompressed files (e.g. readline)
+    return io.BufferedReader(pyarrow.input_stream(filename, compression='zstd'))
+
+
+def get_compression(filename):
+    "Return the compression (from the filename extension, None if not compressed)"
+    ext = os.path.splitext(get_name(filename))[1].lower().lstrip('.')
+    return ext if ext in decompressors else None
+
+
+def open_source(filename, binary=False):
+    """
+    Open a file for reading, compressed files (e.g. '.csv.gz', '.jsonl.zst')
+    are decompressed while they are read (no decompressed copy is written)
+
+    :param filename: File to be opened (or seekable binary file, read from the start)
+    :type filename: str
+    :param binary: If true, return a binary stream, otherwise a UTF-8 text stream
+    :type binary: bool
+    """
+    if not is_path(filename):
+        return open_input(filename, binary)
+    compression = get_compression(filename)
+    if compression is None:
+        return open(filename, 'rb') if binary else open(filename, 'r', encoding='utf8')
+    f = decompressors[compression](filename)
+    return f if binary else io.TextIOWrapper(f, encoding='utf8')
+
+
+def skip(rows, skip_rows=0, limit=None):
+    "Lazily skip the first skip_rows rows of an iterable, returning at most limit rows"
+    skip_rows = skip_rows or 0
+    return islice(rows, skip_rows, skip_rows + limit if limit is not None else None)
+
+
+def skip_csv_records(f, records, csv_delimiter=None):
+    """
+    Skip the first records of a binary CSV file, the records are read
+    by the csv module (a record can span several lines) one line at a time,
+    so that the file is left at the start of the next record
+
+    :param f: Binary file
+    :type f: io.IOBase
+    :param records: Number of records to be skipped
+    :type records: int
+    """
+
+    def lines():
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            yield line.decode('utf8')
+
+    for row in islice(csv.reader(lines(), delimiter=csv_delimiter), records):
+        pass
+
+
+def count_rows(num_rows, skip_rows=0, limit=None):
+    "Return the number of rows after skipping the first skip_rows rows, at most limit"
+    num_rows = max(num_rows - (skip_rows or 0), 0)
+    return num_rows if limit is None else min(num_rows, limit)
+
+
+def select_columns(header, columns=None, exclude_columns=None):
+    """
+    Return the zero-based indexes of the selected columns
+    (None if all the columns are selected)
+
+    :param header: Header row
+    :type header: tuple
+    :param columns: Columns to be selected, by name, letter or zero-based index
+    :type columns: list of str or list of int
+    :param exclude_columns: Names of the columns to be excluded
+    :type exclude_columns: list of str
+    """
+    if not columns and not exclude_columns:
+        return None
+    elif columns and all(isinstance(x, int) for x in columns):
+        if not exclude_columns:
+            return list(columns)
+        names = get_column_names(header)
+        return [
+            i for i in columns if i >= len(names) or names[i] not in exclude_columns
+        ]
+    return get_column_indexes(get_column_names(header), columns, exclude_columns)
+
+
+def project(row, indexes):
+    "Return the selected values of a row (None for the missing ones)"
+    width = len(row)
+    return tuple(row[i] if i < width else None for i in indexes)
+
+
+def read_csv_rows(
+    filename,
+    skip_rows=0,
+    csv_delimiter=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+):
+    """
+    Read the rows of a CSV file, the rows shorter than the first one are padded
+    Only the selected columns and the first limit rows (header excluded) are returned
+    """
+    with open_source(filename) as f:
         reader = csv.reader(f, delimiter=csv_delimiter)
-        for i, row in enumerate(reader):
-            if i >= skip_rows:
-                sheet.append(row)
-    return sheet
+        width = None
+        indexes = None
+        # The file is not read past the limit
+        rows = skip(reader, skip_rows, limit + 1 if limit is not None else None)
+        for row in rows:
+            if width is None:
+                width = len(row)
+                indexes = select_columns(row, columns, exclude_columns)
+            if indexes is not None:
+                yield project(row, indexes)
+                continue
+            elif len(row) < width:
+                row = row + [None] * (width - len(row))
+            yield tuple(row)
 
 
-@extension('xls', 'xlt')
-def load_worksheet_xls(filename, sheet=None, skip_rows=0, worksheet=0, **kwargs):
-    "Load a worksheet from an XLS file"
+def iter_arrow_csv_batches(
+    filename,
+    width,
+    indexes=None,
+    skip_rows=0,
+    csv_delimiter=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """
+    Iterate over the column batches of a CSV file read by pyarrow.csv,
+    one block at a time, the file is not read past the limit
+
+    The values are the strings read by the csv module (the missing
+    selected columns are None). The rest of the file is read by the csv module
+    from the first block that can't be read by pyarrow (e.g. rows with
+    a different number of columns) or that contains empty rows
+    (an empty line is an empty row for the csv module).
+    The header and the skipped rows are read by the csv module.
+    """
+    import pyarrow
+    import pyarrow.compute as pc
+    import pyarrow.csv
+
+    # The header is replaced by column numbers (the names can be duplicated)
+    header = ['f{}'.format(i) for i in range(0, width)]
+    if indexes is None:
+        indexes = range(0, width)
+    names = [header[i] if i < width else None for i in indexes]
+    include = [x for x in names if x is not None]
+    count = 0  # number of rows returned
+    try:
+        with open_source(filename, binary=True) as f:
+            # pyarrow skip_rows counts the lines, not the records
+            skip_csv_records(f, (skip_rows or 0) + 1, csv_delimiter)
+            reader = pyarrow.csv.open_csv(
+                f,
+                read_options=pyarrow.csv.ReadOptions(column_names=header),
+                parse_options=pyarrow.csv.ParseOptions(
+                    delimiter=csv_delimiter,
+                    newlines_in_values=True,
+                    ignore_empty_lines=False,
+                ),
+                convert_options=pyarrow.csv.ConvertOptions(
+                    include_columns=include,
+                    column_types=dict((x, pyarrow.string()) for x in include),
+                    # Only the unquoted empty cells (and the empty lines) are null
+                    null_values=[''],
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+            # The loop is interrupted to read the rest of the file with the csv module
+            for batch in reader:
+                if limit is not None:
+                    batch = batch.slice(0, limit - count)
+                arrays = [batch.column(x) for x in include]
+                if width > 1 and arrays:
+                    empty = arrays[0].is_null()
+                    for array in arrays[1:]:
+                        empty = pc.and_(empty, array.is_null())
+                    if pc.any(empty).as_py():
+                        break  # empty lines or rows of empty cells
+                    arrays = [
+                        pc.fill_null(x, '') if x.null_count else x for x in arrays
+                    ]
+                arrays = dict(zip(include, arrays))
+                for offset in range(0, batch.num_rows, batch_size):
+                    size = min(batch_size, batch.num_rows - offset)
+                    yield [
+                        (
+                            arrays[x].slice(offset, size)
+                            if x is not None
+                            else [None] * size
+                        )
+                        for x in names
+                    ]
+                    count = count + size
+                if limit is not None and count >= limit:
+                    return
+            else:
+                return
+    except (pyarrow.ArrowInvalid, csv.Error) as e:
+        log.info('CSV %s read by the csv module from row %d: %s', filename, count, e)
+    rows = read_csv_rows(
+        filename,
+        skip_rows=skip_rows,
+        csv_delimiter=csv_delimiter,
+        columns=columns,
+        exclude_columns=exclude_columns,
+        limit=limit,
+    )
+    next(rows, None)  # header
+    yield from RowSource((), rows=islice(rows, count, None)).iter_batches(batch_size)
+
+
+def read_arrow_csv(
+    filename,
+    skip_rows=0,
+    csv_delimiter=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """
+    Read a CSV file with the multithreaded pyarrow.csv reader
+
+    The values are not typed by the reader: the columns are strings,
+    the same values of the csv engine, and they are typed by the operators
+    (see cast_string_column).
+    """
+    with open_source(filename) as f:
+        reader = csv.reader(f, delimiter=csv_delimiter)
+        header = next(skip(reader, skip_rows), None)
+    if header is None:
+        return RowSource(())
+    width = len(header)
+    indexes = select_columns(header, columns, exclude_columns)
+    if indexes is not None:
+        header = project(header, indexes)
+    return RowSource(
+        header,
+        batches=iter_arrow_csv_batches(
+            filename,
+            width,
+            indexes,
+            skip_rows=skip_rows,
+            csv_delimiter=csv_delimiter,
+            columns=columns,
+            exclude_columns=exclude_columns,
+            limit=limit,
+            batch_size=batch_size,
+        ),
+    )
+
+
+@extension('csv')
+def load_worksheet_csv(
+    filename,
+    skip_rows=0,
+    csv_delimiter=None,
+    engine=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    **kwargs
+):
+    """
+    Load a worksheet from a CSV file
+
+    By default the file is read by the Arrow CSV engine (column batches),
+    with the csv engine the rows are read one at a time by the csv module.
+    Both engines return the same string values.
+    """
+    if engine != ENGINE_CSV:
+        return read_arrow_csv(
+            filename,
+            skip_rows=skip_rows,
+            csv_delimiter=csv_delimiter,
+            columns=columns,
+            exclude_columns=exclude_columns,
+            limit=limit,
+            batch_size=batch_size,
+        )
+    rows = read_csv_rows(
+        filename,
+        skip_rows=skip_rows,
+        csv_delimiter=csv_delimiter,
+        columns=columns,
+        exclude_columns=exclude_columns,
+        limit=limit,
+    )
+    return RowSource.from_rows(rows)
+
+
+def convert_xls_column(values, types):
+    "Convert the dates, numbers and empty cells of an XLS column"
     import xlrd
 
-    if sheet is None:
-        sheet = Workbook().active  # Create a new Workbook and get the active sheet
-    wb = xlrd.open_workbook(filename)
+    kinds = set(types)
+    if xlrd.XL_CELL_NUMBER in kinds:
+        values = [
+            int(v) if t == xlrd.XL_CELL_NUMBER and v.is_integer() else v
+            for v, t in zip(values, types)
+        ]
+    if xlrd.XL_CELL_DATE in kinds:
+        dates = iter(
+            serial_to_datetime(
+                [v for v, t in zip(values, types) if t == xlrd.XL_CELL_DATE], XLS_EPOC
+            )
+        )
+        values = [
+            next(dates) if t == xlrd.XL_CELL_DATE else v for v, t in zip(values, types)
+        ]
+    if xlrd.XL_CELL_EMPTY in kinds or xlrd.XL_CELL_BLANK in kinds:
+        values = [
+            None if t in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK) else v
+            for v, t in zip(values, types)
+        ]
+    return values
+
+
+def read_xls_batches(xsheet, start, end, batch_size=DEFAULT_BATCH_SIZE, indexes=None):
+    """
+    Read the rows of an XLS sheet in column batches
+
+    The rows are read with row_values/row_types (or only the selected
+    columns with col_values/col_types) and dates, numbers
+    and empty cells are converted one column at a time.
+    """
+    if xsheet.ncols == 0:
+        return
+    for batch_start in range(start, end, batch_size):
+        batch_end = min(batch_start + batch_size, end)
+        if indexes is not None:
+            values = [xsheet.col_values(i, batch_start, batch_end) for i in indexes]
+            types = [xsheet.col_types(i, batch_start, batch_end) for i in indexes]
+        else:
+            batch = range(batch_start, batch_end)
+            values = zip(*[xsheet.row_values(row) for row in batch])
+            types = zip(*[xsheet.row_types(row) for row in batch])
+        yield [convert_xls_column(v, t) for v, t in zip(values, types)]
+
+
+@extension('xls', 'xlt')
+def load_worksheet_xls(
+    filename,
+    skip_rows=0,
+    worksheet=0,
+    batch_size=DEFAULT_BATCH_SIZE,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    book=None,
+    **kwargs
+):
+    "Load a worksheet from an XLS file"
+    # Only the requested worksheet is parsed
+    wb = book or open_xls(filename)
     if isinstance(worksheet, int):
-        xsheet = wb.sheets()[worksheet]
+        xsheet = wb.sheet_by_index(worksheet)
     else:  #  get by name
         t = [x for x in wb.sheet_names() if x.lower() == worksheet.lower()]
         if not t:
             raise KeyError('Worksheet {0} not found'.format(worksheet))
-        xsheet = t[0]
-    # Prepare an XLSX sheet
-    for row in range(skip_rows, xsheet.nrows):
-        for col in range(0, xsheet.ncols):
-            value = xsheet.cell_value(row, col)
-            cell_type = xsheet.cell_type(row, col)
-            if cell_type == xlrd.XL_CELL_DATE:
-                value = XLS_EPOC + datetime.timedelta(days=value)
-            elif cell_type == xlrd.XL_CELL_NUMBER:
-                if isinstance(value, float) and value.is_integer():
-                    value = int(value)
-                # print(value, type(value), xsheet.cell_type(row, col))
-            sheet.cell(row=row + 1, column=col + 1).value = value
-    assert sheet.max_row == xsheet.nrows
-    return sheet
+        xsheet = wb.sheet_by_name(t[0])
+    if book is None:
+        wb.release_resources()
+    if xsheet.nrows <= skip_rows:
+        return RowSource((), title=xsheet.name)
+    header = next(zip(*next(read_xls_batches(xsheet, skip_rows, skip_rows + 1))))
+    # Only the selected columns are read
+    indexes = select_columns(header, columns, exclude_columns)
+    if indexes is not None:
+        indexes = [i for i in indexes if i < xsheet.ncols]
+        header = project(header, indexes)
+    start = skip_rows + 1
+    end = xsheet.nrows if limit is None else min(xsheet.nrows, start + limit)
+    return RowSource(
+        header,
+        batches=read_xls_batches(xsheet, start, end, batch_size, indexes),
+        num_rows=count_rows(xsheet.nrows - 1, skip_rows, limit),
+        num_columns=len(indexes) if indexes is not None else xsheet.ncols,
+        title=xsheet.name,
+    )
+
+
+def iter_sheet_rows(
+    iter_rows,
+    skip_rows=0,
+    limit=None,
+    columns=None,
+    exclude_columns=None,
+    last_row=None,
+):
+    """
+    Read the rows of an XLSX worksheet, return the rows and the number of columns
+    (None if all the columns are selected)
+
+    :param iter_rows: Function returning the rows (min_row, max_row, min_col, max_col)
+    :type iter_rows: callable
+    :param last_row: Last row of the worksheet (if known)
+    :type last_row: int
+    """
+    # The skipped rows and the rows past the limit are never read (or rewritten)
+    max_row = None
+    if limit is not None:
+        max_row = 1 + skip_rows + limit
+        if last_row is not None:  # don't add empty rows
+            max_row = min(max_row, last_row)
+    rows = iter_rows(min_row=1 + skip_rows, max_row=max_row)
+    if not columns and not exclude_columns:
+        return rows, None
+    header = next(rows, ())
+    indexes = select_columns(header, columns, exclude_columns)
+    # Only the cells between the first and the last selected columns are read
+    min_col = min(indexes, default=0)
+    max_col = max(indexes, default=0)
+    rows = iter_rows(
+        min_row=2 + skip_rows, max_row=max_row, min_col=min_col + 1, max_col=max_col + 1
+    )
+    offsets = [i - min_col for i in indexes]
+    rows = chain((project(header, indexes),), (project(row, offsets) for row in rows))
+    return rows, len(indexes)
+
+
+def workbook_file(filename):
+    "Return the file to be opened by openpyxl (that checks the XLSX extensions)"
+    if not is_path(filename):
+        filename.seek(0)
+        return filename
+    elif os.path.splitext(filename)[1].lower() in OPENPYXL_EXTENSIONS:
+        return filename
+    return open(filename, 'rb')
+
+
+@xlsx_engine(ENGINE_FULL, ENGINE_STREAMING)
+def load_worksheet_openpyxl(
+    filename,
+    skip_rows=0,
+    worksheet=0,
+    engine=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    book=None,
+    **kwargs
+):
+    "Load a worksheet from an XLSX file with openpyxl"
+    read_only = engine == ENGINE_STREAMING
+    f = None
+    if book is not None:
+        wb = book
+    else:
+        if not read_only and not isinstance(worksheet, int) and is_path(filename):
+            from xlsx_provider.metadata import resolve_worksheet
+
+            # Check the worksheet title before parsing the whole workbook
+            resolve_worksheet(filename, worksheet)
+        f = workbook_file(filename)
+        wb = load_workbook(filename=f, read_only=read_only, data_only=True)
+
+    def close():
+        # Close the workbook opened here (and the file opened by workbook_file)
+        if book is None:
+            wb.close()
+            if f is not filename:
+                f.close()
+
+    def iter_rows(**kwargs):
+        return xsheet.iter_rows(values_only=True, **kwargs)
+
+    def iter_and_close(rows):
+        try:
+            for row in rows:
+                yield row
+        finally:
+            close()
+
+    try:
+        if isinstance(worksheet, int):
+            xsheet = wb.worksheets[worksheet]
+        else:  #  get by name
+            t = [x for x in wb.worksheets if x.title.lower() == worksheet.lower()]
+            if not t:
+                raise KeyError('Worksheet {0} not found'.format(worksheet))
+            xsheet = t[0]
+        # The dimensions of a read-only sheet can be wrong
+        last_row = None if read_only else xsheet.max_row
+        rows, num_columns = iter_sheet_rows(
+            iter_rows, skip_rows, limit, columns, exclude_columns, last_row
+        )
+    except Exception:
+        close()
+        raise
+    num_rows = None
+    if not read_only:
+        num_rows = count_rows(xsheet.max_row - 1, skip_rows, limit)
+    return RowSource.from_rows(
+        iter_and_close(rows),
+        num_rows=num_rows,
+        num_columns=num_columns if num_columns is not None else xsheet.max_column,
+        title=xsheet.title,
+    )
+
+
+@xlsx_engine(ENGINE_SAX, ENGINE_SPILL)
+def load_worksheet_sax(
+    filename,
+    skip_rows=0,
+    worksheet=0,
+    engine=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    book=None,
+    max_workers=None,
+    **kwargs
+):
+    """
+    Load a worksheet from an XLSX file, parsing the worksheet XML directly
+
+    The rows are returned in column batches, the columns of shared strings
+    are Arrow dictionary arrays. With the spill engine, the shared strings
+    are spilled to disk.
+    """
+    from xlsx_provider.xlsx_reader import XLSXReader
+
+    reader = book or XLSXReader(filename, spill=engine == ENGINE_SPILL)
+
+    def close():
+        # Close the reader opened here (the zip file and the spilled strings)
+        if book is None:
+            reader.close()
+
+    def iter_and_close(batches):
+        try:
+            for batch in batches:
+                yield batch
+        finally:
+            close()
+
+    try:
+        title, path = reader.get_sheet(worksheet)
+        min_row = 1 + skip_rows
+        header = next(reader.iter_rows(path, min_row=min_row, max_row=min_row), ())
+        indexes = select_columns(header, columns, exclude_columns)
+    except Exception:
+        close()
+        raise
+    if indexes is not None:
+        header = project(header, indexes)
+    max_row = min_row + limit if limit is not None else None
+    # Only the cells between the first and the last selected columns are read
+    batches = reader.iter_batches(
+        path,
+        min_row=min_row + 1,
+        max_row=max_row,
+        columns=indexes,
+        batch_size=batch_size,
+        max_workers=max_workers,
+    )
+    return RowSource(header, batches=iter_and_close(batches), title=title)
+
+
+def preflight_xlsx(filename, worksheet=0):
+    """
+    Estimate the size of an XLSX worksheet from the zip directory
+    and the worksheet dimension, without reading the cells
+    Return None if the file can not be inspected
+
+    :param filename: XLSX filename
+    :type filename: str
+    :param worksheet: Worksheet title or number (zero-based)
+    :type worksheet: str or int
+    """
+    from xlsx_provider.xlsx_reader import XLSXReader
+
+    try:
+        with XLSXReader(filename) as reader:
+            return reader.estimate(worksheet)
+    except (zipfile.BadZipFile, KeyError, IndexError):
+        return None
+
+
+def choose_xlsx_engine(filename, worksheet=0, limit=None):
+    """
+    Choose the XLSX engine from the worksheet size estimate
+
+    XLSX engines:
+
+    * full: the whole workbook is loaded by openpyxl (default for small worksheets)
+    * streaming: openpyxl read-only mode, the rows are read on demand
+      (default above 64 MB of worksheet XML, or if a limit is set)
+    * sax: the worksheet XML is parsed directly into column batches,
+      the shared strings columns are Arrow dictionary arrays
+      (default if the worksheet is parsed in parallel)
+    * spill: sax engine with the shared strings spilled to disk
+      (default above 256 MB of shared strings)
+
+    CSV engines: arrow (default), the Arrow CSV reader; csv, the csv module
+
+    :param filename: XLSX filename
+    :type filename: str
+    :param worksheet: Worksheet title or number (zero-based)
+    :type worksheet: str or int
+    :param limit: Maximum number of rows to be loaded
+    :type limit: int
+    """
+    estimate = preflight_xlsx(filename, worksheet)
+    if estimate is None:
+        xml_size = get_size(filename)
+        shared_strings_size = 0
+    else:
+        xml_size = estimate.xml_size
+        shared_strings_size = estimate.shared_strings_size
+    if shared_strings_size >= DEFAULT_SPILL_THRESHOLD:
+        engine = ENGINE_SPILL
+    elif limit is not None or xml_size >= DEFAULT_STREAMING_THRESHOLD:
+        # Stream large files (and stop reading at the limit)
+        engine = ENGINE_STREAMING
+    else:
+        engine = ENGINE_FULL
+    log.info('XLSX preflight %s: %s, engine %s', filename, estimate, engine)
+    return engine
 
 
 @extension('xlsx', 'xlsm', 'xlsb')
-def load_worksheet_xlsx(filename, sheet=None, skip_rows=0, worksheet=0, **kwargs):
+def load_worksheet_xlsx(
+    filename,
+    skip_rows=0,
+    worksheet=0,
+    engine=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    book=None,
+    max_workers=None,
+    **kwargs
+):
     "Load a worksheet from an XLSX file"
-    wb = load_workbook(filename=filename, data_only=True)
-    if isinstance(worksheet, int):
-        xsheet = wb.worksheets[worksheet]
-    else:  #  get by name
-        t = [x for x in wb.worksheets if x.title.lower() == worksheet.lower()]
-        if not t:
-            raise KeyError('Worksheet {0} not found'.format(worksheet))
-        xsheet = t[0]
-    if skip_rows:
-        xsheet.delete_rows(idx=1, amount=skip_rows)
-    if sheet is None:
-        return xsheet
+    if engine is None:
+        engine = choose_xlsx_engine(filename, worksheet, limit)
+        if (max_workers or 1) > 1 and engine != ENGINE_SPILL:
+            engine = ENGINE_SAX  # the worksheet is parsed in parallel
+    xlsx_loader = xlsx_engines.get(engine)
+    if xlsx_loader is None:
+        raise KeyError('unsupported engine {}'.format(engine))
+    return xlsx_loader(
+        filename=filename,
+        skip_rows=skip_rows,
+        worksheet=worksheet,
+        engine=engine,
+        columns=columns,
+        exclude_columns=exclude_columns,
+        limit=limit,
+        book=book,
+        max_workers=max_workers,
+        **kwargs
+    )
+
+
+class OpenWorkbook(object):
+    """
+    Workbook opened once to load several worksheets (see open_workbook)
+
+    :param filename: File to be loaded
+    :type filename: str
+    :param ext: File format
+    :type ext: str
+    :param engine: XLSX engine
+    :type engine: str
+    :param book: Opened workbook (openpyxl workbook, XLSXReader or xlrd book, None for the other formats)
+    """
+
+    def __init__(self, filename, ext, engine=None, book=None):
+        self.filename = filename
+        self.ext = ext
+        self.engine = engine
+        self.book = book
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        "Close the workbook"
+        if hasattr(self.book, 'release_resources'):  # xlrd
+            self.book.release_resources()
+        elif self.book is not None:
+            self.book.close()
+        self.book = None
+
+
+def get_extension(filename, ext=None):
+    """
+    Return the file format (from the filename extension, if ext is None)
+    The compression extension is skipped (e.g. 'data.csv.gz' is 'csv')
+    """
+    if ext is None:
+        name, ext = os.path.splitext(get_name(filename))
+        if ext.lower().lstrip('.') in decompressors:
+            ext = os.path.splitext(name)[1]
+    return ext.lower().lstrip('.')
+
+
+def check_extension(filename, ext=None):
+    """
+    Return the file format (detected by the content, if ext is None),
+    raise KeyError if the file format is not supported
+    """
+    if ext is None:
+        from xlsx_provider.metadata import get_file_format
+
+        ext = get_file_format(filename)
+    else:
+        ext = get_extension(filename, ext)
+    if loaders.get(ext) is None:
+        raise KeyError('unsupported file format {}'.format(ext))
+    compression = get_compression(filename)
+    if compression is not None and ext not in COMPRESSED_EXTENSIONS:
+        raise KeyError('unsupported compressed file format {}'.format(ext))
+    return ext
+
+
+def open_workbook(filename, ext=None, engine=None, worksheets=None):
+    """
+    Open a workbook once, to load several worksheets with load_worksheet
+    (the shared strings and the styles are parsed only once)
+
+    :param filename: File to be loaded (filename, bytes-like object or readable binary stream)
+    :type filename: str or bytes or io.IOBase
+    :param ext: Force file format (autodetect by default)
+    :type ext: str
+    :param engine: XLSX engine ('full', 'streaming', 'sax' or 'spill', default: chosen by size of the largest worksheet)
+    :type engine: str
+    :param worksheets: Worksheets to be loaded, titles or numbers (used to choose the engine, default: the first one)
+    :type worksheets: list of str or list of int
+    """
+    filename = input_file(filename)
+    ext = check_extension(filename, ext)
+    if ext in ('xls', 'xlt'):
+        return OpenWorkbook(filename, ext, book=open_xls(filename))
+    elif loaders[ext] != load_worksheet_xlsx:
+        return OpenWorkbook(filename, ext, engine)
+    if engine is None:
+        engines = [ENGINE_FULL, ENGINE_STREAMING, ENGINE_SPILL]
+        engine = max(
+            (choose_xlsx_engine(filename, x) for x in worksheets or [0]),
+            key=engines.index,
+        )
+    if engine in (ENGINE_FULL, ENGINE_STREAMING):
+        read_only = engine == ENGINE_STREAMING
+        book = load_workbook(
+            filename=workbook_file(filename), read_only=read_only, data_only=True
+        )
+    elif engine in (ENGINE_SAX, ENGINE_SPILL):
+        from xlsx_provider.xlsx_reader import XLSXReader
+
+        book = XLSXReader(filename, spill=engine == ENGINE_SPILL)
     else:
-        copy_cells(xsheet, sheet)
-        return sheet
+        raise KeyError('unsupported engine {}'.format(engine))
+    return OpenWorkbook(filename, ext, engine, book)
+
+
+def iter_parquet_batches(
+    f, names, batch_size=DEFAULT_BATCH_SIZE, skip_rows=0, limit=None
+):
+    """
+    Read the selected columns of a Parquet file one batch at a time,
+    yielding lists of Arrow arrays (the values are converted on demand)
+    The row groups before skip_rows are not read.
+    """
+    skip_rows = skip_rows or 0
+    row_groups = []
+    for i in range(0, f.metadata.num_row_groups):
+        num_rows = f.metadata.row_group(i).num_rows
+        if row_groups or skip_rows < num_rows:
+            row_groups.append(i)
+        else:
+            skip_rows = skip_rows - num_rows
+    if not row_groups:
+        return
+    batches = f.iter_batches(
+        batch_size=batch_size, row_groups=row_groups, columns=list(dict.fromkeys(names))
+    )
+    for batch in batches:
+        if skip_rows >= batch.num_rows:
+            skip_rows = skip_rows - batch.num_rows
+            continue
+        elif skip_rows:
+            batch = batch.slice(skip_rows)
+            skip_rows = 0
+        if limit is not None:
+            if limit <= 0:
+                break
+            batch = batch.slice(0, limit)
+            limit = limit - batch.num_rows
+        yield [batch.column(name) for name in names]
 
 
 @extension('parquet')
-def read_parquet(filename, sheet=None, skip_rows=0, **kwargs):
-    "Load a worksheet from a Parquet file"
-    import pandas as pd
+def read_parquet(
+    filename,
+    skip_rows=0,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    **kwargs
+):
+    "Load a worksheet from a Parquet file, one batch of rows at a time"
+    import pyarrow.parquet
 
-    if sheet is None:
-        sheet = Workbook().active  # Create a new Workbook and get the active sheet
-    f = pd.read_parquet(filename)
+    f = pyarrow.parquet.ParquetFile(filename)
+    # Only the selected columns are read
+    names = f.schema_arrow.names
+    indexes = select_columns(names, columns, exclude_columns)
+    if indexes is not None:
+        names = [names[i] for i in indexes]
+    return RowSource(
+        tuple(names),
+        batches=iter_parquet_batches(f, names, batch_size, skip_rows, limit),
+        num_rows=count_rows(f.metadata.num_rows, skip_rows, limit),
+    )
+
+
+def json_rows(data, skip_rows=0, columns=None, exclude_columns=None, limit=None):
+    "Convert an iterable of dictionaries to rows, the first row is the header"
+    data = iter(data)
+    first = next(data, None)
+    if first is None:
+        return
+    keys = list(first.keys())
+    indexes = select_columns(keys, columns, exclude_columns)
+    if indexes is not None:
+        keys = [keys[i] for i in indexes if i < len(keys)]
     # header
-    sheet.append(list(f.columns))
+    yield tuple(keys)
     # rows
-    for i, row in enumerate(f.values):
-        if i >= skip_rows:
-            sheet.append(list(row))
-    return sheet
+    for row in skip(chain((first,), data), skip_rows, limit):
+        yield tuple(row.get(key) for key in keys)
 
 
-@extension('json')
-def read_json(filename, sheet=None, skip_rows=0, **kwargs):
-    "Load a worksheet from a JSON file"
-    if sheet is None:
-        wb = Workbook()
-        sheet = wb.active
-    wb = Workbook()
-    with open(filename, 'r', encoding='utf8') as f:
-        try:
-            data = json.load(f)
-        except json.decoder.JSONDecodeError as ex:
-            # Try load as JSON Lines
+def iter_json_lines(f):
+    "Parse a JSON Lines file one line at a time, the empty lines are skipped"
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_array(f, chunk_size=JSON_CHUNK_SIZE):
+    """
+    Incrementally parse a JSON file containing a top-level array,
+    yielding one element at a time (only a chunk of the file is kept in memory)
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    expect = '['  # '[', 'value', 'first' value (or ']'), ',' (or ']')
+    while True:
+        pos = JSON_WHITESPACE.match(buf, pos).end()
+        c = buf[pos : pos + 1]
+        if c and expect == '[':
+            if c != '[':
+                raise json.decoder.JSONDecodeError("Expecting '['", buf, pos)
+            expect = 'first'
+            pos = pos + 1
+            continue
+        elif c and expect == ',':
+            if c == ']':
+                return
+            elif c != ',':
+                raise json.decoder.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            expect = 'value'
+            pos = pos + 1
+            continue
+        elif c == ']' and expect == 'first':
+            return
+        elif c:
             try:
-                f.seek(0)  # rewind
-                data = json.loads('[' + f.read().replace('\n', ',') + ']')
+                value, end = decoder.raw_decode(buf, pos)
+                # A value at the end of the buffer can be truncated (e.g. numbers)
+                if end < len(buf) or eof:
+                    yield value
+                    pos = end
+                    expect = ','
+                    continue
             except json.decoder.JSONDecodeError:
-                raise ex
-        keys = list(data[0].keys())
-        # header
-        sheet.append(keys)
-        # rows
-        for i, row in enumerate(data):
-            if i >= skip_rows:
-                sheet.append([row.get(key) for key in keys])
-    return sheet
+                if eof:
+                    raise
+        elif eof:
+            raise json.decoder.JSONDecodeError('Unterminated array', buf, pos)
+        # Read more data
+        data = f.read(chunk_size)
+        eof = not data
+        buf = buf[pos:] + data
+        pos = 0
+
+
+@extension('json')
+def read_json(
+    filename, skip_rows=0, columns=None, exclude_columns=None, limit=None, **kwargs
+):
+    """
+    Load a worksheet from a JSON file (a top-level array or JSON Lines)
+    The records are parsed while the rows are loaded
+    """
+
+    def iter_records():
+        with open_source(filename) as f:
+            head = f.read(JSON_CHUNK_SIZE)
+            while head and not head.strip():
+                head = f.read(JSON_CHUNK_SIZE)
+        # The file is opened again (compressed files can't be rewound)
+        with open_source(filename) as f:
+            if head.lstrip().startswith('['):
+                yield from iter_json_array(f)
+            else:  # JSON Lines
+                yield from iter_json_lines(f)
+
+    return RowSource.from_rows(
+        json_rows(iter_records(), skip_rows, columns, exclude_columns, limit)
+    )
 
 
 @extension('jsonl')
-def read_jsonl(filename, sheet=None, skip_rows=0, **kwargs):
-    "Load a worksheet from a JSON Lines file"
-    if sheet is None:
-        sheet = Workbook().active  # Create a new Workbook and get the active sheet
-    with open(filename, 'r', encoding='utf8') as f:
-        data = json.loads('[' + f.read().replace('\n', ',') + ']')
-        keys = list(data[0].keys())
-        # header
-        sheet.append(keys)
-        # rows
-        for i, row in enumerate(data):
-            if i >= skip_rows:
-                sheet.append([row.get(key) for key in keys])
-    return sheet
+def read_jsonl(
+    filename, skip_rows=0, columns=None, exclude_columns=None, limit=None, **kwargs
+):
+    """
+    Load a worksheet from a JSON Lines file
+    The lines are parsed while the rows are loaded
+    """
+
+    def iter_records():
+        with open_source(filename) as f:
+            yield from iter_json_lines(f)
+
+    return RowSource.from_rows(
+        json_rows(iter_records(), skip_rows, columns, exclude_columns, limit)
+    )
 
 
 def load_worksheet(
@@ -156,12 +1090,23 @@ def load_worksheet(
     skip_rows=0,
     csv_delimiter=DEFAULT_CSV_DELIMITER,
     ext=None,
+    engine=None,
+    columns=None,
+    exclude_columns=None,
+    limit=None,
+    cell_range=None,
+    workbook=None,
+    max_workers=None,
+    batch_size=DEFAULT_BATCH_SIZE,
 ):
     """
     Load a worksheet from a supported file format
 
-    :param filename: File to be loaded
-    :type filename: str
+    Return a RowSource (or the sheet, if a sheet is passed as argument)
+
+    :param filename: File to be loaded (filename, bytes-like object or readable binary stream;
+        CSV, JSON and JSON Lines files can be compressed, e.g. 'data.csv.gz')
+    :type filename: str or bytes or io.IOBase
     :param sheet: If not None, load the data into the sheet
     :type sheet: Worksheet
     :param worksheet: Worksheet title or number (zero-based)
@@ -172,17 +1117,63 @@ def load_worksheet(
     :type csv_delimiter: str
     :param ext: Force file format (autodetect by default)
     :type ext: str
+    :param engine: XLSX engine ('full', 'streaming', 'sax' or 'spill') or CSV engine ('arrow' or 'csv'),
+        default: chosen by the file size (see choose_xlsx_engine)
+    :type engine: str
+    :param columns: Columns to be loaded, by name, letter (e.g. 'A', 'AB') or zero-based index (default: all)
+    :type columns: list of str or list of int
+    :param exclude_columns: Names of the columns to be skipped
+    :type exclude_columns: list of str
+    :param limit: Maximum number of rows to be loaded, header excluded (default: all)
+    :type limit: int
+    :param cell_range: Range to be loaded (e.g. 'B5:H2000', 'B:H', '5:2000'), the first row of the range is the header
+    :type cell_range: str
+    :param workbook: Workbook opened with open_workbook (filename, ext and engine are ignored)
+    :type workbook: OpenWorkbook
+    :param max_workers: Number of worker processes parsing the worksheet in parallel
+        (sax and spill XLSX engines only, default: None, serial parsing)
+    :type max_workers: int
+    :param batch_size: Number of rows read at a time (XLS, sax XLSX engines and Parquet only)
+    :type batch_size: int
     """
-    if ext is None:
-        ext = os.path.splitext(filename)[1]
-    ext = ext.lower().lstrip('.')
-    loader = loaders.get(ext)
-    if loader is None:
-        raise KeyError('unsupported file format {}'.format(ext))
-    return loader(
+    if cell_range:
+        min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+        if min_col is not None:
+            if columns:
+                raise KeyError(
+                    'cell range {} and selected columns can not be combined'.format(
+                        cell_range
+                    )
+                )
+            columns = list(range(min_col - 1, max_col))
+        if min_row is not None:
+            skip_rows = (skip_rows or 0) + min_row - 1
+            range_limit = count_rows(max_row - 1, skip_rows)
+            limit = range_limit if limit is None else min(limit, range_limit)
+    book = None
+    if workbook is not None:
+        filename = workbook.filename
+        ext = workbook.ext
+        engine = workbook.engine
+        book = workbook.book
+    else:
+        filename = input_file(filename)
+    ext = check_extension(filename, ext)
+    source = loaders[ext](
         filename=filename,
-        sheet=sheet,
         skip_rows=skip_rows,
         worksheet=worksheet,
         csv_delimiter=csv_delimiter,
+        engine=engine,
+        columns=columns,
+        exclude_columns=exclude_columns,
+        limit=limit,
+        book=book,
+        max_workers=max_workers,
+        batch_size=batch_size,
     )
+    if sheet is None:
+        return source
+    for row in source.values:
+        sheet.append(row)
+    return sheet
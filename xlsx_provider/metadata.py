@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import logging
+import functools
+from xlsx_provider.commons import DEFAULT_METADATA_CACHE_SIZE
+
+__all__ = [
+    'SheetInfo',
+    'get_workbook_info',
+    'get_sheet_names',
+    'resolve_worksheet',
+    'peek_worksheet',
+    'sniff_format',
+    'get_file_format',
+]
+
+log = logging.getLogger(__name__)
+XLS_EXTENSIONS = ('xls', 'xlt')
+#: Number of bytes read to detect the file format
+SNIFF_SIZE = 8 * 1024
+#: ZIP local file header signature (XLSX files)
+ZIP_SIGNATURE = b'PK\x03\x04'
+#: OLE2 Compound File Binary signature (XLS files)
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+#: Parquet magic number
+PARQUET_SIGNATURE = b'PAR1'
+#: File extensions of the detected file formats
+FORMAT_EXTENSIONS = {
+    'xlsx': ('xlsx', 'xlsm', 'xlsb', 'xltx', 'xltm'),
+    'xls': XLS_EXTENSIONS,
+    'parquet': ('parquet',),
+    'json': ('json', 'jsonl'),
+    'csv': ('csv',),
+}
+#: File formats detected by the content of the first bytes (the other ones are guessed)
+TEXT_FORMATS = ('csv', 'json', 'jsonl')
+
+
+class SheetInfo(object):
+    """
+    Worksheet metadata
+
+    :param index: worksheet number (zero-based)
+    :type index: int
+    :param title: worksheet title
+    :type title: str
+    :param dimension: declared worksheet dimension (e.g. 'A1:F200', None if unknown)
+    :type dimension: str
+    """
+
+    def __init__(self, index, title, dimension=None):
+        self.index = index
+        self.title = title
+        self.dimension = dimension
+
+    @property
+    def max_row(self):
+        "Last row of the dimension (None if unknown)"
+        return self.boundaries[3]
+
+    @property
+    def max_column(self):
+        "Last column of the dimension (None if unknown)"
+        return self.boundaries[2]
+
+    @property
+    def boundaries(self):
+        "Dimension boundaries (min_col, min_row, max_col, max_row)"
+        from openpyxl.utils.cell import range_boundaries
+
+        try:
+            return range_boundaries(self.dimension)
+        except (TypeError, ValueError):
+            return (None, None, None, None)
+
+    def __eq__(self, other):
+        return isinstance(other, SheetInfo) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return 'SheetInfo({0!r}, {1!r}, {2!r})'.format(
+            self.index, self.title, self.dimension
+        )
+
+
+def sniff_bytes(head):
+    """
+    Detect the file format from the first bytes of a file
+    ('xlsx', 'xls', 'parquet', 'html', 'xml', 'json', 'csv' or None if unknown)
+    """
+    if head.startswith(ZIP_SIGNATURE):
+        return 'xlsx'
+    elif head.startswith(OLE2_SIGNATURE):
+        return 'xls'
+    elif head.startswith(PARQUET_SIGNATURE):
+        return 'parquet'
+    elif b'\x00' in head:
+        return None  # unknown binary format
+    text = head.decode('utf8', errors='replace').lstrip('\ufeff \t\r\n')
+    if not text:
+        return None
+    elif text.startswith('<'):
+        lower = text.lower()
+        return 'html' if '<html' in lower or '<table' in lower else 'xml'
+    elif text[0] in '[{':
+        return 'json'
+    return 'csv'
+
+
+@functools.lru_cache(maxsize=DEFAULT_METADATA_CACHE_SIZE)
+def read_file_format(filename, mtime):
+    "Detect the file format (cached by filename and modification time)"
+    from xlsx_provider.loader import open_source
+
+    # Compressed files are sniffed after decompression
+    try:
+        with open_source(filename, binary=True) as f:
+            return sniff_bytes(f.read(SNIFF_SIZE))
+    except (OSError, EOFError, ValueError):
+        return None
+
+
+def sniff_format(filename):
+    """
+    Detect the file format from the first bytes of a file:
+    ZIP (XLSX), OLE2 (XLS) and Parquet signatures, HTML/XML, JSON and CSV text
+    ('xlsx', 'xls', 'parquet', 'html', 'xml', 'json', 'csv' or None if unknown)
+    The results are cached per file path and modification time
+
+    :param filename: filename or seekable binary file
+    :type filename: str or io.IOBase
+    """
+    from xlsx_provider.streams import is_path, open_input
+
+    if not is_path(filename):
+        # Streams are sniffed every time
+        with open_input(filename, binary=True) as f:
+            return sniff_bytes(f.read(SNIFF_SIZE))
+    try:
+        return read_file_format(*cache_key(filename))
+    except OSError:
+        return None
+
+
+def get_file_format(filename):
+    """
+    Return the file format of a file (e.g. 'xlsx', 'csv')
+
+    The declared format (the filename extension) is replaced by the detected
+    one (see sniff_format) if the content doesn't match the extension,
+    e.g. an XLSX file or an HTML table named '.xls'.
+    Text formats detected by heuristics (CSV, JSON) don't replace
+    a text format extension.
+
+    :param filename: filename
+    :type filename: str
+    """
+    from xlsx_provider.loader import get_extension
+
+    ext = get_extension(filename)
+    sniffed = sniff_format(filename)
+    if sniffed is None or ext in FORMAT_EXTENSIONS.get(sniffed, ()):
+        return ext
+    elif sniffed in TEXT_FORMATS and ext in TEXT_FORMATS:
+        return ext
+    log.info('File %s format detected as %s', filename, sniffed)
+    return sniffed
+
+
+def cache_key(filename):
+    "Return the cache key of a file (absolute path and modification time)"
+    return os.path.realpath(filename), os.stat(filename).st_mtime_ns
+
+
+@functools.lru_cache(maxsize=DEFAULT_METADATA_CACHE_SIZE)
+def read_workbook_info(filename, mtime):
+    "Read the worksheets metadata (cached by filename and modification time)"
+    if get_file_format(filename) in XLS_EXTENSIONS:
+        import xlrd
+
+        # Only the workbook globals are parsed
+        wb = xlrd.open_workbook(filename, on_demand=True)
+        try:
+            return tuple(SheetInfo(i, x) for i, x in enumerate(wb.sheet_names()))
+        finally:
+            wb.release_resources()
+    from xlsx_provider.xlsx_reader import XLSXReader
+
+    # Only workbook.xml and the head of the worksheets are read
+    with XLSXReader(filename) as reader:
+        return tuple(
+            SheetInfo(i, title, reader.dimension(path))
+            for i, (title, path) in enumerate(reader.sheets)
+        )
+
+
+def get_workbook_info(filename):
+    """
+    Return the worksheets metadata (titles and declared dimensions)
+    of an XLSX or XLS file, without parsing the cells
+    The XLS worksheets dimensions are not available (None)
+    The results are cached per file path and modification time
+
+    :param filename: XLSX or XLS filename
+    :type filename: str
+    """
+    return read_workbook_info(*cache_key(filename))
+
+
+def get_sheet_names(filename):
+    """
+    Return the worksheets titles of an XLSX or XLS file
+
+    :param filename: XLSX or XLS filename
+    :type filename: str
+    """
+    return [x.title for x in get_workbook_info(filename)]
+
+
+def resolve_worksheet(filename, worksheet=0):
+    """
+    Return the metadata of a worksheet (see get_workbook_info),
+    the worksheet titles are case insensitive
+
+    :param filename: XLSX or XLS filename
+    :type filename: str
+    :param worksheet: Worksheet title or number (zero-based)
+    :type worksheet: str or int
+    """
+    sheets = get_workbook_info(filename)
+    if isinstance(worksheet, int):
+        return sheets[worksheet]
+    t = [x for x in sheets if x.title.lower() == worksheet.lower()]
+    if not t:
+        raise KeyError('Worksheet {0} not found'.format(worksheet))
+    return t[0]
+
+
+@functools.lru_cache(maxsize=DEFAULT_METADATA_CACHE_SIZE)
+def read_first_rows(filename, mtime, worksheet, num_rows, skip_rows):
+    "Read the first rows of a worksheet (cached by filename and modification time)"
+    if get_file_format(filename) in XLS_EXTENSIONS:
+        from xlsx_provider.loader import load_worksheet
+
+        source = load_worksheet(
+            filename, skip_rows=skip_rows, worksheet=worksheet, limit=num_rows - 1
+        )
+        return tuple(source.values)[:num_rows]
+    from xlsx_provider.xlsx_reader import XLSXReader
+
+    # The worksheet is not parsed past the last requested row,
+    # the shared strings past the last string used by the rows
+    with XLSXReader(filename) as reader:
+        title, path = reader.get_sheet(worksheet)
+        min_row = 1 + skip_rows
+        return tuple(
+            reader.read_rows(path, min_row=min_row, max_row=min_row + num_rows - 1)
+        )
+
+
+def peek_worksheet(filename, worksheet=0, num_rows=5, skip_rows=0):
+    """
+    Return the first rows of a worksheet (header included)
+    of an XLSX or XLS file, without parsing the rest of the worksheet
+    The results are cached per file path and modification time
+
+    :param filename: XLSX or XLS filename
+    :type filename: str
+    :param worksheet: Worksheet title or number (zero-based)
+    :type worksheet: str or int
+    :param num_rows: Number of rows
+    :type num_rows: int
+    :param skip_rows: Number of input lines to skip
+    :type skip_rows: int
+    """
+    if num_rows <= 0:
+        return ()
+    return read_first_rows(*cache_key(filename), worksheet, num_rows, skip_rows or 0)
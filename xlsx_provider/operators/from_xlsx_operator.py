@@ -1,18 +1,36 @@
 #!/usr/bin/env python
 
+import io
+import os
 import json
 import datetime
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import compress
 import dateutil.parser
 from airflow.exceptions import AirflowException
 from airflow.models import BaseOperator
 from airflow.utils.decorators import apply_defaults
-from xlsx_provider.loader import load_worksheet
+from xlsx_provider.loader import load_worksheet, open_workbook
+from xlsx_provider.cast import (
+    cast_arrow_column,
+    cast_dictionary_column,
+    cast_native_column,
+    cast_string_column,
+)
+from xlsx_provider.dates import cast_datetime_column
+from xlsx_provider.schema import SchemaStore, normalize_header
+from xlsx_provider.streams import is_path, open_output
 from xlsx_provider.commons import (
     check_column_names,
+    get_column_indexes,
     get_type,
     prepare_value,
+    to_arrow_array,
     get_column_names,
     FileFormat,
+    DEFAULT_BATCH_SIZE,
     DEFAULT_CSV_DELIMITER,
     DEFAULT_CSV_HEADER,
     DEFAULT_FORMAT,
@@ -25,11 +43,92 @@ from xlsx_provider.commons import (
     NUMERIC_TYPES,
     HEADER_UPPER,
     HEADER_LOWER,
+    ENGINE_SAX,
+    ENGINE_SPILL,
     XLSX_EPOC,
 )
 
 __all__ = ['FromXLSXOperator']
 
+#: Options that can be set for each worksheet (see FromXLSXOperator worksheets)
+WORKSHEET_OPTIONS = (
+    'target',
+    'skip_rows',
+    'limit',
+    'cell_range',
+    'select_columns',
+    'drop_columns',
+    'add_columns',
+    'types',
+    'column_names',
+    'file_format',
+    'schema_key',
+)
+
+
+def to_list(values):
+    "Convert a column (list or Arrow array) to a list"
+    return values.to_pylist() if hasattr(values, 'to_pylist') else values
+
+
+def slice_column(values, size):
+    "Return the first size values of a column (list or Arrow array)"
+    if hasattr(values, 'to_pylist'):
+        return values[:size]
+    return list(values[:size])
+
+
+def is_not_null(values):
+    "Return a boolean numpy array, True for the values that are not None"
+    import numpy
+
+    if hasattr(values, 'to_pylist'):
+        return values.is_valid().to_numpy(zero_copy_only=False)
+    return numpy.array([x is not None for x in values], dtype=bool)
+
+
+def parse_worksheet(worksheet):
+    "Return the worksheet number (if the worksheet is a number) or title"
+    try:
+        return int(worksheet)
+    except:
+        return worksheet
+
+
+def parse_mapping(value):
+    "Convert a list of key=value strings to a dictionary"
+    if isinstance(value, list):
+        return dict(x.split('=') for x in value)
+    return value or {}
+
+
+def convert_worksheet(operator, workbook, worksheet, options):
+    "Convert a worksheet of an opened workbook (see FromXLSXOperator worksheets)"
+    with operator.worksheet_options(worksheet, options):
+        operator.log.info(
+            'Converting worksheet %s to %s', operator.worksheet, operator.target
+        )
+        operator.convert(workbook)
+    return worksheet
+
+
+def convert_worksheet_process(operator, workbook, worksheet, options):
+    "Convert a worksheet in a worker process (see FromXLSXOperator max_workers)"
+    operator.max_workers = None  # the worksheet is parsed by this process
+    try:
+        return convert_worksheet(operator, workbook, worksheet, options)
+    finally:
+        workbook.close()
+
+
+def filter_column(values, mask):
+    "Return the values of a column (list or Arrow array) selected by a boolean mask"
+    if hasattr(values, 'to_pylist'):
+        import pyarrow
+
+        return values.filter(pyarrow.array(mask))
+    return list(compress(values, mask))
+
 
 class FromXLSXOperator(BaseOperator):
     """
@@ -37,16 +136,26 @@ class FromXLSXOperator(BaseOperator):
 
     Read an XLSX or XLS file and convert it into Parquet, CSV, JSON, JSON Lines(one line per record) file.
 
-    :param source: Source filename (XLSX or XLS, templated)
-    :type source: str
-    :param target: Target filename (templated)
-    :type target: str
+    :param source: Source filename (XLSX or XLS, templated), bytes-like object or readable binary stream
+    :type source: str or bytes or io.IOBase
+    :param target: Target filename (templated) or writable stream
+    :type target: str or io.IOBase
     :param worksheet: Worksheet title or number (zero-based, templated)
     :type worksheet: str or int
+    :param worksheets: Convert several worksheets in one pass, the workbook is opened only once (templated).
+        Mapping worksheet title or number -> target filename, or -> dictionary of worksheet options
+        (target, skip_rows, limit, cell_range, select_columns, drop_columns, add_columns, types,
+        column_names, file_format, schema_key)
+    :type worksheets: dictionary
     :param skip_rows: Number of input lines to skip (default: 0, templated)
     :type skip_rows: int
     :param limit: Row limit (default: None, templated)
     :type limit: int
+    :param cell_range: Cell range to be loaded, the first row is the header
+        (e.g. 'B5:H2000', 'B:H', '5:2000', templated)
+    :type cell_range: str
+    :param select_columns: List of columns to be loaded, by name or letter (e.g. 'A', 'AB', default: all)
+    :type select_columns: list of str
     :param drop_columns: List of columns to be dropped
     :type drop_columns: list of str
     :param add_columns: Columns to be added (dict or list column=value)
@@ -65,20 +174,46 @@ class FromXLSXOperator(BaseOperator):
     :type float_format: str
     :param nullable_int: nullable integer data type support
     :type nullable_int: bool
+    :param engine: XLSX engine ('full', 'streaming', 'sax' or 'spill') or CSV engine ('arrow' or 'csv'),
+        default: chosen by the file size (see :func:`xlsx_provider.loader.choose_xlsx_engine`)
+    :type engine: str
+    :param batch_size: Number of rows converted and written at a time (default: 10000)
+    :type batch_size: int
+    :param sample_size: Number of rows used to infer the column types (default: the first batch)
+    :type sample_size: int
+    :param schema_store: JSON file where the column names and types are stored after each run
+        and reused by the next runs (default: None, disabled)
+    :type schema_store: str
+    :param schema_key: Schema store key, task_id or source filename pattern (default: task_id)
+    :type schema_key: str
+    :param max_workers: Number of worker processes converting the worksheets in parallel (see worksheets),
+        or parsing chunks of the worksheet in parallel (XLSX files only, default: None, sequential conversion)
+    :type max_workers: int
     """
 
     FileFormat = FileFormat
-    template_fields = ('source', 'target', 'worksheet', 'limit', 'skip_rows')
+    template_fields = (
+        'source',
+        'target',
+        'worksheet',
+        'limit',
+        'skip_rows',
+        'cell_range',
+        'worksheets',
+    )
     ui_color = '#a934bd'
 
     @apply_defaults
     def __init__(
         self,
         source,
-        target,
+        target=None,
         worksheet=0,
+        worksheets=None,
         skip_rows=0,
         limit=None,
+        cell_range=None,
+        select_columns=None,
         drop_columns=None,
         add_columns=None,
         types=None,
@@ -88,46 +223,61 @@ class FromXLSXOperator(BaseOperator):
         csv_header=DEFAULT_CSV_HEADER,
         float_format=DEFAULT_FLOAT_FORMAT,
         nullable_int=False,
+        engine=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        sample_size=None,
+        schema_store=None,
+        schema_key=None,
+        max_workers=None,
         *args,
         **kwargs
     ):
         super(FromXLSXOperator, self).__init__(*args, **kwargs)
         self.source = source
         self.target = target
-        try:
-            self.worksheet = int(worksheet)
-        except:
-            self.worksheet = worksheet
+        self.worksheet = parse_worksheet(worksheet)
+        self.worksheets = worksheets
         self.skip_rows = skip_rows
         self.limit = limit
+        self.cell_range = cell_range
+        self.select_columns = select_columns
         self.drop_columns = drop_columns or []
-        if isinstance(add_columns, list):
-            self.add_columns = dict(x.split('=') for x in add_columns)
-        else:
-            self.add_columns = add_columns or {}
-        if isinstance(types, list):
-            self.types = dict(x.split('=') for x in types)
-        else:
-            self.types = types or {}
+        self.add_columns = parse_mapping(add_columns)
+        self.types = parse_mapping(types)
         self.names = column_names
         self.file_format = FileFormat.lookup(file_format)
         self.csv_delimiter = csv_delimiter
         self.csv_header = csv_header
         self.float_format = float_format
         self.nullable_int = nullable_int
+        self.engine = engine
+        self.batch_size = batch_size
+        self.sample_size = sample_size
+        self.schema_store = schema_store
+        self.schema_key = schema_key
+        self.max_workers = max_workers
 
-    def load_worksheet(self, sheet=None):
-        # Load a worksheet
+    def load_worksheet(
+        self, sheet=None, columns=None, exclude_columns=None, workbook=None
+    ):
+        # Load a worksheet (returns a RowSource)
         return load_worksheet(
             filename=self.source,
             sheet=sheet,
             worksheet=self.worksheet,
             skip_rows=self.skip_rows,
             csv_delimiter=self.csv_delimiter,
+            engine=self.engine,
+            columns=columns,
+            exclude_columns=exclude_columns,
+            limit=self.limit,
+            cell_range=self.cell_range,
+            workbook=workbook,
+            max_workers=self.max_workers,
+            batch_size=self.batch_size,
         )
 
-    def get_value_and_type(self, cel, name, datatypes):
-        value = cel.value
+    def get_value_and_type(self, value, name, datatypes):
         if value is not None:
             value = prepare_value(name, value)
             type_ = get_type(name, value, self.nullable_int)
@@ -152,58 +302,316 @@ class FromXLSXOperator(BaseOperator):
                 value = dateutil.parser.parse(value)
         return value
 
+    def lookup_schema(self, source):
+        "Return the stored schema, if the source header is unchanged"
+        if not self.schema_store:
+            return None
+        key = self.schema_key or self.task_id
+        filename = self.source if is_path(self.source) else None
+        schema = SchemaStore(self.schema_store).lookup(key, filename)
+        if schema is None:
+            return None
+        if schema['header'] != normalize_header(source.header):
+            self.log.info('Schema %s header mismatch, inferring the schema', key)
+            return None
+        self.log.info('Using schema %s', key)
+        return schema
+
+    def save_schema(self, source, names, datatypes):
+        "Store the column names and types"
+        if self.schema_store:
+            key = self.schema_key or self.task_id
+            SchemaStore(self.schema_store).save(key, source.header, names, datatypes)
+
     def execute(self, context):
         try:
-            sheet = self.load_worksheet()
-            rows = list(sheet)
-            if self.names is not None:
-                names = self.names
+            if self.worksheets:
+                self.convert_worksheets()
             else:
-                names = get_column_names(sheet, skip_rows=self.skip_rows)
-            empty_lines = 0
-            # Check unique columns
-            check_column_names(names)
-            datatypes = dict([(name, self.types.get(name)) for name in names])
-            if INDEX_COLUMN_NAME in datatypes:
-                datatypes[INDEX_COLUMN_NAME] = 'double'
-            columns = dict([(name, []) for name in names])
-            # Add the additional (fixed value) columns
-            for name, value in self.add_columns.items():
-                datatypes[name] = get_type(name, value, self.nullable_int)
-                columns[name] = []
-            for _index, row in enumerate(rows[1:]):
-                if self.limit is not None and _index >= self.limit:
-                    break
-                # Skip empty lines
-                empty = True
-                for i, name in enumerate(names):
-                    if name != INDEX_COLUMN_NAME and row[i].value is not None:
-                        empty = False
-                if empty:
-                    empty_lines = empty_lines + 1
-                    continue
-                for i, name in enumerate(names):
-                    if name == INDEX_COLUMN_NAME:
-                        columns[INDEX_COLUMN_NAME].append(_index)
-                        continue
-                    cel = row[i]
-                    value = self.get_value_and_type(cel, name, datatypes)
-                    columns[name].append(value)
-                for name, value in self.add_columns.items():
-                    if name not in names:
-                        columns[name].append(value)
-            row_num = sheet.max_row - 1
-            if self.limit is not None:
-                row_num = min(row_num, self.limit)
-            for i, name in enumerate(names):
-                assert (
-                    len(columns[name]) == row_num - empty_lines
-                )  # check rows number (skip header)
-            self.write(names, columns, datatypes)
+                self.convert()
         except Exception as e:
             raise AirflowException("XLSXToParquet operator error: {0}".format(str(e)))
         return True
 
+    @contextmanager
+    def worksheet_options(self, worksheet, options):
+        "Replace the operator options with the worksheet ones, while converting the worksheet"
+        if not isinstance(options, dict):
+            options = {'target': options}
+        unsupported = [x for x in options.keys() if x not in WORKSHEET_OPTIONS]
+        if unsupported:
+            raise KeyError(
+                'unsupported worksheet options {}'.format(', '.join(unsupported))
+            )
+        if not options.get('target'):
+            raise KeyError('missing worksheet {} target'.format(worksheet))
+        attrs = [x if x != 'column_names' else 'names' for x in WORKSHEET_OPTIONS]
+        saved = dict((x, getattr(self, x)) for x in attrs + ['worksheet'])
+        try:
+            self.worksheet = parse_worksheet(worksheet)
+            for name, value in options.items():
+                if name in ('add_columns', 'types'):
+                    value = parse_mapping(value)
+                elif name == 'drop_columns':
+                    value = value or []
+                elif name == 'file_format':
+                    value = FileFormat.lookup(value)
+                elif name == 'column_names':
+                    name = 'names'
+                setattr(self, name, value)
+            if 'schema_key' not in options:
+                # Store a schema for each worksheet
+                self.schema_key = '{0}.{1}'.format(
+                    self.schema_key or self.task_id, worksheet
+                )
+            yield
+        finally:
+            for name, value in saved.items():
+                setattr(self, name, value)
+
+    def convert_worksheets(self):
+        """
+        Convert several worksheets, the workbook is opened only once
+        (the shared strings and the styles are parsed only once)
+
+        If max_workers is greater than 1, the worksheets are converted
+        in parallel by a pool of processes with the SAX engine: each worker
+        parses only its own worksheet, the shared strings are spilled
+        to a file mapped by all the workers.
+        """
+        worksheets = [parse_worksheet(x) for x in self.worksheets.keys()]
+        engine = self.engine
+        parallel = (self.max_workers or 1) > 1 and len(worksheets) > 1
+        if parallel and not is_path(self.source):
+            self.log.info('Parallel conversion requires a source filename')
+            parallel = False
+        if parallel and engine in (None, ENGINE_SAX, ENGINE_SPILL):
+            engine = ENGINE_SPILL
+        with open_workbook(
+            self.source, engine=engine, worksheets=worksheets
+        ) as workbook:
+            if parallel and workbook.engine != ENGINE_SPILL:
+                self.log.info('Parallel conversion requires the sax engine')
+                parallel = False
+            if not parallel:
+                for worksheet, options in self.worksheets.items():
+                    convert_worksheet(self, workbook, worksheet, options)
+                return
+            workbook.book.read_shared_parts()
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        convert_worksheet_process, self, workbook, worksheet, options
+                    )
+                    for worksheet, options in self.worksheets.items()
+                ]
+                for future in futures:
+                    self.log.info('Worksheet %s converted', future.result())
+
+    def convert(self, workbook=None):
+        "Convert a worksheet"
+        # The unselected and dropped columns are not loaded
+        if self.names is not None:
+            indexes = get_column_indexes(
+                self.names, self.select_columns, self.drop_columns
+            )
+            source = self.load_worksheet(columns=indexes, workbook=workbook)
+        else:
+            source = self.load_worksheet(
+                columns=self.select_columns,
+                exclude_columns=self.drop_columns,
+                workbook=workbook,
+            )
+        schema = self.lookup_schema(source)
+        if self.names is not None:
+            names = self.names
+            if indexes is not None:
+                names = [names[i] for i in indexes]
+        elif schema is not None:
+            names = schema['names']
+        else:
+            names = get_column_names(source)
+        # Check unique columns
+        check_column_names(names)
+        datatypes = dict([(name, self.types.get(name)) for name in names])
+        if INDEX_COLUMN_NAME in datatypes:
+            datatypes[INDEX_COLUMN_NAME] = 'double'
+        # Add the additional (fixed value) columns
+        for name, value in self.add_columns.items():
+            datatypes[name] = get_type(name, value, self.nullable_int)
+        stored_types = schema['types'] if schema is not None else None
+        batches = self.iter_batches(source, names, datatypes, stored_types)
+        self.write(names, batches, datatypes)
+        self.save_schema(source, names, datatypes)
+
+    def iter_source_batches(self, source):
+        """
+        Iterate over the source column batches
+
+        The first batch contains at least sample_size rows
+        (the rows used to infer the column types).
+        """
+        batches = source.iter_batches(self.batch_size)
+        if self.sample_size:
+            sample = []
+            size = 0
+            for batch in batches:
+                sample.append(batch)
+                size = size + (len(batch[0]) if batch else 0)
+                if size >= self.sample_size:
+                    break
+            if sample:
+                width = max(len(x) for x in sample)
+                columns = [[] for i in range(0, width)]
+                for batch in sample:
+                    batch_size = len(batch[0]) if batch else 0
+                    for i, column in enumerate(columns):
+                        if i >= len(batch):
+                            column.extend([None] * batch_size)
+                        elif hasattr(batch[i], 'to_pylist'):
+                            column.extend(batch[i].to_pylist())
+                        else:
+                            column.extend(batch[i])
+                yield columns
+        for batch in batches:
+            yield batch
+
+    def iter_batches(self, source, names, datatypes, stored_types=None):
+        """
+        Convert the rows, yielding the columns every batch_size rows
+
+        The rows are converted one column at a time. The column types
+        are inferred from the first batch (or from the first sample_size rows);
+        the following batches are only checked against the inferred types
+        and promoted if required (e.g. int64 to double).
+        If stored_types is not None, the inferred types are replaced
+        by the stored ones (see merge_types).
+        At least one (possibly empty) batch is returned.
+        """
+        import numpy
+
+        all_names = names + [x for x in self.add_columns.keys() if x not in names]
+        data_columns = [i for i, x in enumerate(names) if x != INDEX_COLUMN_NAME]
+        _index = 0
+        batches = 0
+        # Rows are processed while they are loaded
+        for batch in self.iter_source_batches(source):
+            size = len(batch[0]) if batch else 0
+            if self.limit is not None:
+                size = min(size, self.limit - _index)
+                if size <= 0:
+                    break
+            batch = [
+                slice_column(batch[i], size) if i < len(batch) else [None] * size
+                for i in range(0, len(names))
+            ]
+            index = range(_index, _index + size)
+            _index = _index + size
+            # Skip empty lines
+            not_empty = numpy.zeros(size, dtype=bool)
+            for i in data_columns:
+                not_empty |= is_not_null(batch[i])
+            if not not_empty.all():
+                batch = [filter_column(x, not_empty) for x in batch]
+                index = list(compress(index, not_empty))
+            columns = {}
+            for i, name in enumerate(names):
+                if name == INDEX_COLUMN_NAME:
+                    columns[INDEX_COLUMN_NAME] = list(index)
+                else:
+                    columns[name] = self.convert_column(batch[i], name, datatypes)
+            row_num = len(index)
+            for name, value in self.add_columns.items():
+                if name not in names:
+                    columns[name] = [value] * row_num
+            if row_num:
+                if not batches:
+                    self.log.info(
+                        'Column types inferred from %d rows: %s', row_num, datatypes
+                    )
+                    if stored_types is not None:
+                        self.merge_types(datatypes, stored_types)
+                batches = batches + 1
+                yield self.check_batch(columns, row_num)
+        if not batches:
+            if stored_types is not None:
+                self.merge_types(datatypes, stored_types)
+            yield self.check_batch(dict([(name, []) for name in all_names]), 0)
+
+    def merge_types(self, datatypes, stored_types):
+        """
+        Replace the inferred types with the stored ones, if they are compatible
+        (the same type, a type inferred from empty columns or int64 stored as double).
+        On mismatch the inferred types are kept.
+        """
+        merged = dict(datatypes)
+        for name, datatype in datatypes.items():
+            stored = stored_types.get(name)
+            if name in self.types or stored is None or stored == datatype:
+                continue
+            elif datatype is None and stored == TYPE_INT:
+                continue  # int64 columns can't contain nulls
+            elif datatype is None or (
+                datatype in (TYPE_INT, TYPE_NULLABLE_INT) and stored == TYPE_DOUBLE
+            ):
+                merged[name] = stored
+            else:
+                self.log.info(
+                    'Column %s type %s does not match the stored type %s, '
+                    'ignoring the stored types',
+                    name,
+                    datatype,
+                    stored,
+                )
+                return
+        datatypes.update(merged)
+
+    def convert_column(self, values, name, datatypes):
+        "Convert the values of a column, updating the column datatype"
+        datatype = datatypes[name]
+        if hasattr(values, 'to_pylist'):
+            # Arrow dictionary arrays (e.g. shared strings) are converted at once
+            result = None
+            if hasattr(values, 'dictionary'):
+                result = cast_dictionary_column(
+                    name, values, datatype, self.nullable_int
+                )
+            else:
+                # Typed columns (e.g. Arrow CSV engine) are not converted
+                result = cast_arrow_column(name, values, datatype, self.nullable_int)
+            if result is not None:
+                values, datatypes[name] = result
+                return values
+            values = values.to_pylist()
+        # Check the native values (numbers, dates) against the column type
+        result = cast_native_column(name, values, datatype, self.nullable_int)
+        if result is None and datatype is None:
+            first = next((x for x in values if x is not None), None)
+            if isinstance(first, datetime.datetime):
+                datatypes[name] = TYPE_DATETIME
+        if result is None and datatypes[name] == TYPE_DATETIME:
+            # Convert serial dates and date strings at once
+            converted = cast_datetime_column(name, values, XLSX_EPOC)
+            if converted is not None:
+                result = converted, TYPE_DATETIME
+        elif result is None:
+            # Cast string columns at once
+            result = cast_string_column(name, values, datatype, self.nullable_int)
+        if result is not None:
+            values, datatypes[name] = result
+        else:
+            values = [self.get_value_and_type(x, name, datatypes) for x in values]
+        if datatype is not None and datatypes[name] != datatype:
+            self.log.info(
+                'Column %s type promoted from %s to %s', name, datatype, datatypes[name]
+            )
+        return values
+
+    def check_batch(self, columns, row_num):
+        for name in columns.keys():
+            assert len(columns[name]) == row_num  # check rows number
+        return columns
+
     def to_dataframe(self, names, columns, datatypes):
         import pandas as pd
 
@@ -211,68 +619,259 @@ class FromXLSXOperator(BaseOperator):
         pd_data = {}
         for name in all_names:
             if name not in self.drop_columns:
-                pd_data[name] = pd.Series(columns[name], dtype=datatypes[name])
+                values = to_list(columns[name])
+                datatype = datatypes[name]
+                if datatype == TYPE_INT and any(x is None for x in values):
+                    # The column can be promoted to double by a later batch
+                    datatype = TYPE_NULLABLE_INT
+                pd_data[name] = pd.Series(values, dtype=datatype)
         return pd.DataFrame(pd_data)
 
-    def write_parquet(self, names, columns, datatypes):
-        "Write the results in parquet format"
+    def to_arrow(self, names, columns, datatypes):
+        "Convert a batch of columns to an Arrow table"
+        import pyarrow
+
+        all_names = names + [x for x in self.add_columns.keys() if x not in names]
+        arrays = []
+        fields = []
+        for name in all_names:
+            if name not in self.drop_columns:
+                array = to_arrow_array(name, columns[name], datatypes[name])
+                arrays.append(array)
+                fields.append(pyarrow.field(name, array.type))
+        return pyarrow.Table.from_arrays(arrays, schema=pyarrow.schema(fields))
+
+    def open_parquet_writer(self, schema, where):
         import pyarrow.parquet
 
-        df = self.to_dataframe(names, columns, datatypes)
-        pyarrow.parquet.write_table(
-            table=pyarrow.Table.from_pandas(df),
-            where=self.target,
-            compression='SNAPPY',
-            flavor='spark',
+        return pyarrow.parquet.ParquetWriter(
+            where, schema, compression='SNAPPY', flavor='spark'
         )
 
-    def write_csv(self, names, columns, datatypes):
-        "Write data to CSV file"
-        with open(self.target, 'w') as f:
-            # header
-            if self.csv_header == HEADER_UPPER:
-                f.write(self.csv_delimiter.join([x.upper() for x in datatypes.keys()]))
-                f.write('\n')
-            elif self.csv_header == HEADER_LOWER:
-                f.write(self.csv_delimiter.join(datatypes.keys()))
-                f.write('\n')
-            # data
-            df = self.to_dataframe(names, columns, datatypes)
-            df.to_csv(
-                path_or_buf=f,
+    def promote_parquet(self, writer, schema, where):
+        """
+        Rewrite the row groups already written with a promoted schema
+        (e.g. int64 to double), one row group at a time
+        """
+        import pyarrow.parquet
+
+        writer.close()
+        self.log.info('Promoting the Parquet schema to %s', schema)
+        if is_path(where):
+            tmp = os.fspath(where) + '.promote'
+            os.rename(where, tmp)
+        else:  # in-memory file
+            tmp = io.BytesIO(where.getvalue())
+            where.seek(0)
+            where.truncate()
+        writer = self.open_parquet_writer(schema, where)
+        try:
+            f = pyarrow.parquet.ParquetFile(tmp)
+            for i in range(0, f.num_row_groups):
+                table = f.read_row_group(i)
+                arrays = [x.cast(t.type) for x, t in zip(table.columns, schema)]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        finally:
+            if is_path(where):
+                os.remove(tmp)
+        return writer
+
+    def promote_table(self, table, schema):
+        "Promote the schema and cast the table, the only promotions are null to any type and int to double"
+        import pyarrow
+
+        fields = []
+        for current, field in zip(schema, table.schema):
+            if current.type == field.type or pyarrow.types.is_null(field.type):
+                fields.append(current)
+            elif pyarrow.types.is_null(current.type) or (
+                pyarrow.types.is_integer(current.type)
+                and pyarrow.types.is_floating(field.type)
+            ):
+                fields.append(field)
+            else:
+                raise Exception(
+                    'column {} type {} can not be promoted to {}'.format(
+                        field.name, current.type, field.type
+                    )
+                )
+        promoted = pyarrow.schema(fields)
+        arrays = [x.cast(t.type) for x, t in zip(table.columns, promoted)]
+        return promoted, pyarrow.Table.from_arrays(arrays, schema=promoted)
+
+    def write_parquet(self, names, batches, datatypes):
+        """
+        Write the results in parquet format
+
+        Each batch is converted to Arrow (without pandas) and written as a row group.
+        String columns are written as Arrow string (UTF8) columns and the file
+        has no pandas schema metadata.
+        If a column type is promoted by a later batch (e.g. int64 to double),
+        the row groups already written are rewritten with the new schema.
+        If the target is a stream, the file is written in memory
+        (to be rewritten if required) and then copied to the stream.
+        """
+        where = self.target if is_path(self.target) else io.BytesIO()
+        writer = None
+        try:
+            for columns in batches:
+                table = self.to_arrow(names, columns, datatypes)
+                if writer is None:
+                    writer = self.open_parquet_writer(table.schema, where)
+                elif not table.schema.equals(writer.schema):
+                    schema, table = self.promote_table(table, writer.schema)
+                    if not schema.equals(writer.schema):
+                        writer = self.promote_parquet(writer, schema, where)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if where is not self.target:
+            self.target.write(where.getbuffer())
+
+    def write_csv_header(self, f, datatypes):
+        "Write the CSV header"
+        if self.csv_header == HEADER_UPPER:
+            f.write(self.csv_delimiter.join([x.upper() for x in datatypes.keys()]))
+            f.write('\n')
+        elif self.csv_header == HEADER_LOWER:
+            f.write(self.csv_delimiter.join(datatypes.keys()))
+            f.write('\n')
+
+    def write_csv_rows(self, f, df):
+        "Write the rows of a dataframe in CSV format"
+        df.to_csv(
+            path_or_buf=f,
+            sep=self.csv_delimiter,
+            header=False,
+            index=False,
+            date_format='%Y-%m-%d %M:%M:%S',
+            float_format=self.float_format,
+        )
+
+    def promote_csv(self, f, where, columns, promoted, datatypes):
+        """
+        Rewrite the rows already written with the promoted columns
+        (int64 to double), one batch at a time
+        """
+        import pandas as pd
+
+        self.log.info('Promoting the CSV columns %s to double', ', '.join(promoted))
+        if is_path(where):
+            f.close()
+            tmp = os.fspath(where) + '.promote'
+            os.rename(where, tmp)
+            source = open(tmp)
+            f = open(where, 'w')
+        else:  # in-memory file
+            source = io.StringIO(where.getvalue())
+            where.seek(0)
+            where.truncate()
+        try:
+            self.write_csv_header(f, datatypes)
+            if self.csv_header in (HEADER_UPPER, HEADER_LOWER):
+                source.readline()
+            for df in pd.read_csv(
+                source,
                 sep=self.csv_delimiter,
-                header=False,
-                index=False,
-                date_format='%Y-%m-%d %M:%M:%S',
-                float_format=self.float_format,
-            )
+                header=None,
+                names=columns,
+                dtype=str,
+                keep_default_na=False,
+                chunksize=self.batch_size,
+            ):
+                for name in promoted:
+                    df[name] = pd.to_numeric(df[name]).astype(TYPE_DOUBLE)
+                self.write_csv_rows(f, df)
+        except Exception:
+            if f is not where:
+                f.close()
+            raise
+        finally:
+            source.close()
+            if is_path(where):
+                os.remove(tmp)
+        return f
+
+    def write_csv(self, names, batches, datatypes):
+        """
+        Write data to CSV file
+
+        Each batch is written as soon as it is converted.
+        If an int64 column is promoted to double by a later batch,
+        the rows already written are rewritten as double.
+        If the target is a stream, the file is written in memory
+        (to be rewritten if required) and then copied to the stream.
+        """
+        where = self.target if is_path(self.target) else io.StringIO()
+        f = open(where, 'w') if is_path(where) else where
+        try:
+            self.write_csv_header(f, datatypes)
+            written = None  # column types of the rows already written
+            for columns in batches:
+                df = self.to_dataframe(names, columns, datatypes)
+                if written is not None:
+                    promoted = [
+                        x
+                        for x in df.columns
+                        if written.get(x) in (TYPE_INT, TYPE_NULLABLE_INT)
+                        and datatypes[x] == TYPE_DOUBLE
+                    ]
+                    if promoted:
+                        f = self.promote_csv(
+                            f, where, list(df.columns), promoted, datatypes
+                        )
+                self.write_csv_rows(f, df)
+                written = dict(datatypes)
+        finally:
+            if f is not where:
+                f.close()
+        if where is not self.target:
+            with open_output(self.target) as f:
+                f.write(where.getvalue())
 
-    def write_json(self, names, columns, datatypes):
+    def iter_records(self, batches):
+        "Iterate over the rows as dictionaries"
+        for columns in batches:
+            keys = list(columns.keys())
+            for values in zip(*[to_list(x) for x in columns.values()]):
+                yield dict(zip(keys, values))
+
+    def write_json(self, names, batches, datatypes):
         "Write data to JSON file"
-        data = list(
-            dict(q) for q in zip(*(list((k, x) for x in v) for k, v in columns.items()))
-        )
-        with open(self.target, 'w') as f:
-            f.write(json.dumps(data, indent=2, default=str))
+        with open_output(self.target) as f:
+            # Same output as json.dumps(data, indent=2), one record at a time
+            f.write('[')
+            separator = '\n'
+            for record in self.iter_records(batches):
+                f.write(separator)
+                f.write(
+                    textwrap.indent(json.dumps(record, indent=2, default=str), '  ')
+                )
+                separator = ',\n'
+            if separator != '\n':
+                f.write('\n')
+            f.write(']')
 
-    def write_jsonl(self, names, columns, datatypes):
+    def write_jsonl(self, names, batches, datatypes):
         "Write data to JSON Lines file"
-        data = list(
-            dict(q) for q in zip(*(list((k, x) for x in v) for k, v in columns.items()))
-        )
-        with open(self.target, 'w') as f:
-            f.write('\n'.join(json.dumps(x, default=str) for x in data))
+        with open_output(self.target) as f:
+            separator = ''
+            for record in self.iter_records(batches):
+                f.write(separator)
+                f.write(json.dumps(record, default=str))
+                separator = '\n'
 
-    def write(self, names, columns, datatypes):
+    def write(self, names, batches, datatypes):
         "Write data to file"
         if self.file_format == FileFormat.csv:
-            self.write_csv(names, columns, datatypes)
+            self.write_csv(names, batches, datatypes)
         elif self.file_format == FileFormat.json:
-            self.write_json(names, columns, datatypes)
+            self.write_json(names, batches, datatypes)
         elif self.file_format == FileFormat.jsonl:
-            self.write_jsonl(names, columns, datatypes)
+            self.write_jsonl(names, batches, datatypes)
         else:
-            self.write_parquet(names, columns, datatypes)
+            self.write_parquet(names, batches, datatypes)
 
 
 if __name__ == "__main__":
@@ -282,6 +881,9 @@ if __name__ == "__main__":
     parser.add_argument('filename')
     parser.add_argument('-w', '--worksheet', dest='worksheet', default=0)
     parser.add_argument('-a', '--add_col', dest='add_columns', action='append')
+    parser.add_argument('-c', '--col', dest='select_columns', action='append')
+    parser.add_argument('-l', '--limit', dest='limit', type=int)
+    parser.add_argument('-r', '--range', dest='cell_range')
     parser.add_argument('-d', '--drop_col', dest='drop_columns', action='append')
     parser.add_argument('-t', '--type', dest='types', action='append')
     parser.add_argument('--float_format', dest='float_format', default='%g')
@@ -301,12 +903,24 @@ if __name__ == "__main__":
         '--parquet', dest='file_format_csv', action='store_false', default=False
     )
     parser.add_argument('-n', '--nullable_int', action=argparse.BooleanOptionalAction)
+    parser.add_argument(
+        '-e',
+        '--engine',
+        dest='engine',
+        choices=['full', 'streaming', 'sax', 'spill', 'arrow', 'csv'],
+    )
+    parser.add_argument('-s', '--sample_size', dest='sample_size', type=int)
+    parser.add_argument('-j', '--max_workers', dest='max_workers', type=int)
+    parser.add_argument('--schema_store', dest='schema_store')
     args = parser.parse_args()
     file_format = 'csv' if args.file_format_csv else 'parquet'
     so = FromXLSXOperator(
         task_id='test',
         source=args.filename,
         target=args.output or (args.filename + '.' + file_format),
+        limit=args.limit,
+        cell_range=args.cell_range,
+        select_columns=args.select_columns,
         drop_columns=args.drop_columns,
         add_columns=args.add_columns,
         types=args.types,
@@ -316,5 +930,9 @@ if __name__ == "__main__":
         csv_header=args.csv_header,
         float_format=args.float_format,
         nullable_int=args.nullable_int,
+        engine=args.engine,
+        sample_size=args.sample_size,
+        schema_store=args.schema_store,
+        max_workers=args.max_workers,
     )
     so.execute({})
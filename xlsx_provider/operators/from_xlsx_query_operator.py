@@ -12,6 +12,7 @@ from xlsx_provider.commons import (
     get_type,
     prepare_value,
     quoted,
+    to_arrow_array,
     FileFormat,
     INDEX_COLUMN_NAME,
     DEFAULT_CSV_DELIMITER,
@@ -22,6 +23,7 @@ from xlsx_provider.commons import (
     HEADER_LOWER,
 )
 from xlsx_provider.operators.from_xlsx_operator import FromXLSXOperator
+from xlsx_provider.streams import open_output
 
 __all__ = ['FromXLSXQueryOperator']
 
@@ -34,10 +36,10 @@ class FromXLSXQueryOperator(FromXLSXOperator):
     executes a query on the db and stores the result into a Parquet, CSV, JSON, JSON Lines(one line per record) file.
     The output columns names and types are determinated by the SQL query output.
 
-    :param source: Source filename (XLSX or XLS, templated)
-    :type source: str
-    :param target: Target filename (templated)
-    :type target: str
+    :param source: Source filename (XLSX or XLS, templated), bytes-like object or readable binary stream
+    :type source: str or bytes or io.IOBase
+    :param target: Target filename (templated) or writable stream
+    :type target: str or io.IOBase
     :param worksheet: Worksheet title or number (zero-based, templated)
     :type worksheet: str or int
     :param skip_rows: Number of input lines to skip (default: 0, templated)
@@ -57,6 +59,9 @@ class FromXLSXQueryOperator(FromXLSXOperator):
     :type use_first_row_as_header: bool
     :param nullable_int: nullable integer data type support
     :type nullable_int: bool
+    :param engine: XLSX engine ('full', 'streaming', 'sax' or 'spill') or CSV engine ('arrow' or 'csv'),
+        default: chosen by the file size (see :func:`xlsx_provider.loader.choose_xlsx_engine`)
+    :type engine: str
     """
 
     FileFormat = FileFormat
@@ -85,6 +90,7 @@ class FromXLSXQueryOperator(FromXLSXOperator):
         table_name=DEFAULT_TABLE_NAME,
         use_first_row_as_header=False,
         nullable_int=False,
+        engine=None,
         *args,
         **kwargs
     ):
@@ -98,7 +104,8 @@ class FromXLSXQueryOperator(FromXLSXOperator):
             types=types,
             file_format=file_format,
             csv_delimiter=csv_delimiter,
-            csv_header=csv_header
+            csv_header=csv_header,
+            engine=engine
         )
         self.query = query
         self.table_name = table_name
@@ -107,17 +114,10 @@ class FromXLSXQueryOperator(FromXLSXOperator):
 
     def write_parquet(self, result):
         "Write the results in parquet format"
-        import pandas as pd
         import pyarrow.parquet
 
-        pd_data = {}
-        for name in result.columns.keys():
-            pd_data[name] = pd.Series(
-                result.columns[name], dtype=result.datatypes[name]
-            )
-        df = pd.DataFrame(pd_data)
         pyarrow.parquet.write_table(
-            table=pyarrow.Table.from_pandas(df),
+            table=result.to_arrow(),
             where=self.target,
             compression='SNAPPY',
             flavor='spark',
@@ -126,7 +126,7 @@ class FromXLSXQueryOperator(FromXLSXOperator):
     def write_csv(self, result):
         "Write data to CSV file"
         data = list(zip(*[result.columns[x] for x in result.columns.keys()]))
-        with open(self.target, 'w') as f:
+        with open_output(self.target) as f:
             csw_writer = csv.writer(
                 f, quoting=csv.QUOTE_MINIMAL, delimiter=self.csv_delimiter
             )
@@ -142,7 +142,7 @@ class FromXLSXQueryOperator(FromXLSXOperator):
             dict(q)
             for q in zip(*(list((k, x) for x in v) for k, v in result.columns.items()))
         )
-        with open(self.target, 'w') as f:
+        with open_output(self.target) as f:
             f.write(json.dumps(data, indent=2))
 
     def write_jsonl(self, result):
@@ -151,7 +151,7 @@ class FromXLSXQueryOperator(FromXLSXOperator):
             dict(q)
             for q in zip(*(list((k, x) for x in v) for k, v in result.columns.items()))
         )
-        with open(self.target, 'w') as f:
+        with open_output(self.target) as f:
             f.write('\n'.join(json.dumps(x) for x in data))
 
     def write(self, result):
@@ -167,16 +167,16 @@ class FromXLSXQueryOperator(FromXLSXOperator):
 
     def execute(self, context):
         try:
-            sheet = self.load_worksheet()
+            source = self.load_worksheet()
             if self.use_first_row_as_header:
                 # Extract the column names from the first row of the spreadsheet
-                column_names = get_column_names(sheet, skip_rows=self.skip_rows)
+                column_names = get_column_names(source)
                 # Check unique columns
                 check_column_names(column_names)
             else:
                 column_names = None
             result = Result(
-                self.table_name, sheet, self.types, column_names, self.nullable_int
+                self.table_name, source, self.types, column_names, self.nullable_int
             )
             result.process(self.query)
             self.write(result)
@@ -186,13 +186,22 @@ class FromXLSXQueryOperator(FromXLSXOperator):
 
 
 class Result(object):
-    def __init__(self, table_name, sheet, types, column_names=None, nullable_int=False):
+    def __init__(
+        self, table_name, source, types, column_names=None, nullable_int=False
+    ):
         self.table_name = table_name
-        self.sheet = sheet
+        self.source = source
         self.types = types
         self.column_names = column_names
         self.nullable_int = nullable_int
 
+    def fit(self, row):
+        "Pad or truncate a row to the number of columns"
+        width = self.source.num_columns
+        if len(row) == width:
+            return tuple(row)
+        return (tuple(row) + (None,) * width)[:width]
+
     def process_row(self, row):
         for i, name in enumerate(self.column_names):
             value = row[i]
@@ -215,7 +224,7 @@ class Result(object):
                 sql_columns = ','.join(
                     (
                         quoted(col_number_to_name(x))
-                        for x in range(0, self.sheet.max_column + 1)
+                        for x in range(0, self.source.num_columns + 1)
                     )
                 )
                 skip_rows = 0
@@ -228,13 +237,13 @@ class Result(object):
             insert_sql = 'insert into {table}({columns}) values({values})'.format(
                 table=self.table_name,
                 columns=sql_columns,
-                values=','.join(['?' for x in range(0, self.sheet.max_column + 1)]),
+                values=','.join(['?' for x in range(0, self.source.num_columns + 1)]),
             )
             conn.executemany(
                 insert_sql,
                 (
-                    (i,) + x
-                    for i, x in enumerate(self.sheet.values, start=1)
+                    (i,) + self.fit(x)
+                    for i, x in enumerate(self.source.values, start=1)
                     if i >= 1 + skip_rows
                 ),
             )
@@ -249,3 +258,15 @@ class Result(object):
             for row in result:
                 self.process_row(row)
             result.close()
+
+    def to_arrow(self):
+        "Convert the result columns to an Arrow table"
+        import pyarrow
+
+        arrays = []
+        fields = []
+        for name, values in self.columns.items():
+            array = to_arrow_array(name, values, self.datatypes[name])
+            arrays.append(array)
+            fields.append(pyarrow.field(name, array.type))
+        return pyarrow.Table.from_arrays(arrays, schema=pyarrow.schema(fields))
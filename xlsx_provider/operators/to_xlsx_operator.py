@@ -4,7 +4,7 @@ from openpyxl import Workbook
 from airflow.models import BaseOperator
 from airflow.utils.decorators import apply_defaults
 from xlsx_provider.loader import load_worksheet
-from xlsx_provider.commons import FileFormat, DEFAULT_CSV_DELIMITER
+from xlsx_provider.commons import FileFormat, DEFAULT_BATCH_SIZE, DEFAULT_CSV_DELIMITER
 
 __all__ = ['ToXLSXOperator']
 
@@ -15,14 +15,20 @@ class ToXLSXOperator(BaseOperator):
 
     Read a Parquest, CSV, JSON, JSON Lines(one line per record) file and convert it into XLSX
 
-    :param source: source filename (type is detected by the extension, templated)
-    :type source: str
-    :param target: target filename (templated)
-    :type target: str
+    :param source: source filename (type is detected by the extension and by the content, templated),
+        bytes-like object or readable binary stream
+    :type source: str or bytes or io.IOBase
+    :param target: target filename (templated) or writable binary stream
+    :type target: str or io.IOBase
     :param csv_delimiter: CSV delimiter (default: ',')
     :type csv_delimiter: str
     :param skip_rows: Number of input lines to skip (default: 0, templated)
     :type skip_rows: int
+    :param engine: XLSX engine ('full', 'streaming', 'sax' or 'spill') or CSV engine ('arrow' or 'csv'),
+        default: chosen by the file size (see :func:`xlsx_provider.loader.choose_xlsx_engine`)
+    :type engine: str
+    :param batch_size: Number of rows read at a time (default: 10000)
+    :type batch_size: int
     """
 
     FileFormat = FileFormat
@@ -37,6 +43,8 @@ class ToXLSXOperator(BaseOperator):
         worksheet=0,
         skip_rows=0,
         csv_delimiter=DEFAULT_CSV_DELIMITER,
+        engine=None,
+        batch_size=DEFAULT_BATCH_SIZE,
         *args,
         **kwargs
     ):
@@ -49,23 +57,29 @@ class ToXLSXOperator(BaseOperator):
             self.worksheet = worksheet
         self.skip_rows = skip_rows
         self.csv_delimiter = csv_delimiter
+        self.engine = engine
+        self.batch_size = batch_size
 
     def load_worksheet(self, sheet=None):
-        # Load a worksheet
+        # Load a worksheet (returns a RowSource)
         return load_worksheet(
             filename=self.source,
             sheet=sheet,
             worksheet=self.worksheet,
             skip_rows=self.skip_rows,
             csv_delimiter=self.csv_delimiter,
+            engine=self.engine,
+            batch_size=self.batch_size,
         )
 
     def execute(self, context):
-        # Create a new workbook
-        wb = Workbook()
-        sheet = wb.active
-        # Load a worksheet into the workbook
-        self.load_worksheet(wb.active)
+        # Create a new workbook (rows are written while they are loaded)
+        wb = Workbook(write_only=True)
+        sheet = wb.create_sheet()
+        # Copy the rows into the workbook (converted one batch at a time)
+        source = self.load_worksheet()
+        for row in source.values:
+            sheet.append(row)
         # Save the workbook
         wb.save(self.target)
         return True
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import json
+import fnmatch
+import tempfile
+from contextlib import contextmanager
+
+__all__ = ['SchemaStore', 'normalize_header']
+
+
+def normalize_header(header):
+    "Convert the header values to strings (as stored in the schema store)"
+    return [str(x) if x is not None else None for x in header]
+
+
+class SchemaStore(object):
+    """
+    Persistent store of the column names and types, saved in a JSON file
+
+    The schemas are stored by key (e.g. the task_id or a source filename
+    pattern like '/data/report_*.xlsx'). Each schema contains the source header,
+    the column names and the column types.
+    The updates are serialized by an exclusive lock on a '.lock' file
+    next to the JSON file, so the store can be shared by parallel tasks.
+
+    :param filename: JSON filename
+    :type filename: str
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def load(self):
+        "Load all the schemas"
+        try:
+            with open(self.filename, 'r', encoding='utf8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @contextmanager
+    def lock(self):
+        "Hold an exclusive lock on the store (while loading and replacing the file)"
+        try:
+            import fcntl
+        except ImportError:  # not available on Windows
+            yield
+            return
+        with open(self.filename + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def lookup(self, key, source=None):
+        """
+        Return the schema stored with the given key, or the schema
+        stored with a pattern matching the source filename (or None)
+
+        :param key: schema key
+        :type key: str
+        :param source: source filename
+        :type source: str
+        """
+        schemas = self.load()
+        if key in schemas:
+            return schemas[key]
+        if source is not None:
+            for pattern, schema in schemas.items():
+                if fnmatch.fnmatch(source, pattern):
+                    return schema
+        return None
+
+    def save(self, key, header, names, types):
+        """
+        Store a schema
+
+        :param key: schema key
+        :type key: str
+        :param header: source header
+        :type header: list
+        :param names: column names
+        :type names: list of str
+        :param types: column types
+        :type types: dictionary of string key/value pair
+        """
+        with self.lock():
+            schemas = self.load()
+            schemas[key] = {
+                'header': normalize_header(header),
+                'names': list(names),
+                'types': dict(types),
+            }
+            # Replace the file at once
+            path = os.path.dirname(os.path.abspath(self.filename))
+            fd, tmp = tempfile.mkstemp(dir=path, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf8') as f:
+                    json.dump(schemas, f, indent=2)
+                os.replace(tmp, self.filename)
+            except (OSError, TypeError, ValueError):
+                os.remove(tmp)
+                raise
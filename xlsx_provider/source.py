@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+from itertools import chain, islice
+from xlsx_provider.commons import DEFAULT_BATCH_SIZE
+
+__all__ = ['RowSource']
+
+
+class RowSource(object):
+    """
+    Engine-neutral source of rows, returned by the loaders
+
+    A row source has a header (the first row of the input) and the data rows,
+    provided either as an iterator of row tuples or as an iterator
+    of column batches (each batch is a sequence of columns,
+    each column is a list or an Arrow array of values).
+    Both accessors are available regardless of how the rows are provided.
+    The rows are read on demand and can be iterated only once.
+
+    :param header: Header row values
+    :type header: tuple
+    :param rows: Data rows (header excluded)
+    :type rows: iterable of tuple
+    :param batches: Data column batches (header excluded)
+    :type batches: iterable of list
+    :param num_rows: Number of data rows, if known
+    :type num_rows: int
+    :param num_columns: Number of columns (default: header length)
+    :type num_columns: int
+    :param title: Worksheet title
+    :type title: str
+    """
+
+    def __init__(
+        self,
+        header,
+        rows=None,
+        batches=None,
+        num_rows=None,
+        num_columns=None,
+        title=None,
+    ):
+        if rows is None and batches is None:
+            rows = ()
+        self.header = tuple(header)
+        self.rows = rows
+        self.batches = batches
+        self.num_rows = num_rows
+        self.num_columns = num_columns if num_columns is not None else len(header)
+        self.title = title
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        "Create a row source from an iterable of rows, the first row is the header"
+        rows = iter(rows)
+        header = next(rows, ())
+        return cls(header, rows=rows, **kwargs)
+
+    def iter_rows(self):
+        "Iterate over the data rows, returning tuples of values"
+        if self.rows is not None:
+            return iter(self.rows)
+        return self._batches_to_rows()
+
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE):
+        "Iterate over the data rows, returning column batches"
+        if self.batches is not None:
+            return iter(self.batches)
+        return self._rows_to_batches(batch_size)
+
+    @property
+    def values(self):
+        "Iterate over all the rows, header included"
+        return chain((self.header,), self.iter_rows())
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def _batches_to_rows(self):
+        for batch in self.batches:
+            columns = [x.to_pylist() if hasattr(x, 'to_pylist') else x for x in batch]
+            for row in zip(*columns):
+                yield row
+
+    def _rows_to_batches(self, batch_size):
+        rows = iter(self.rows)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            width = max(len(x) for x in chunk)
+            # Pad the short rows
+            chunk = [
+                x if len(x) == width else tuple(x) + (None,) * (width - len(x))
+                for x in chunk
+            ]
+            yield [list(x) for x in zip(*chunk)]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+import io
+import os
+import mmap
+from contextlib import contextmanager
+
+__all__ = ['is_path', 'input_file', 'open_input', 'open_output', 'BufferFile']
+
+#: Bytes-like sources, read without copying them
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+
+def is_path(source):
+    "Return True if the source (or target) is a filename"
+    return isinstance(source, (str, os.PathLike))
+
+
+class BufferFile(io.RawIOBase):
+    """
+    Read-only seekable binary file over a bytes-like object
+    (bytes, bytearray, memoryview or mmap), the data is not copied
+
+    :param buffer: bytes-like object
+    :type buffer: bytes or bytearray or memoryview or mmap.mmap
+    """
+
+    def __init__(self, buffer):
+        if isinstance(buffer, memoryview):
+            buffer = buffer.cast('B')
+        self.buffer = buffer
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        # Only the requested slice is read (no view of the buffer is kept)
+        data = self.buffer[self.position : self.position + len(b)]
+        size = len(data)
+        b[:size] = data
+        self.position = self.position + size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset = self.position + offset
+        elif whence == io.SEEK_END:
+            offset = len(self.buffer) + offset
+        if offset < 0:
+            raise ValueError('negative seek position {}'.format(offset))
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+def input_file(source):
+    """
+    Return the source as a filename or as a seekable binary file:
+    bytes-like objects are wrapped without copying them,
+    the non-seekable streams are read in memory
+
+    :param source: filename, bytes-like object or readable binary stream
+    :type source: str or bytes or io.IOBase
+    """
+    if is_path(source):
+        return source
+    elif isinstance(source, BUFFER_TYPES):
+        return io.BufferedReader(BufferFile(source))
+    elif not source.seekable():
+        return io.BytesIO(source.read())
+    return source
+
+
+@contextmanager
+def open_input(source, binary=False):
+    """
+    Read a binary file from the start, as binary or UTF-8 text stream
+    (the file is not closed)
+
+    :param source: seekable binary file
+    :type source: io.IOBase
+    :param binary: If true, return a binary stream, otherwise a UTF-8 text stream
+    :type binary: bool
+    """
+    source.seek(0)
+    if binary:
+        yield source
+        return
+    f = io.TextIOWrapper(source, encoding='utf8')
+    try:
+        yield f
+    finally:
+        f.detach()
+
+
+@contextmanager
+def open_output(target, binary=False):
+    """
+    Open a target file (or a writable stream) for writing,
+    as binary or UTF-8 text stream (the streams are not closed)
+
+    :param target: filename or writable stream (binary or text)
+    :type target: str or io.IOBase
+    :param binary: If true, return a binary stream, otherwise a text stream
+    :type binary: bool
+    """
+    if is_path(target):
+        with open(target, 'wb' if binary else 'w') as f:
+            yield f
+    elif binary or isinstance(target, io.TextIOBase):
+        yield target
+    else:
+        f = io.TextIOWrapper(target, encoding='utf8')
+        try:
+            yield f
+        finally:
+            f.flush()
+            f.detach()
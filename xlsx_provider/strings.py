@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+import mmap
+import tempfile
+from array import array
+from xml.etree.ElementTree import XMLParser
+
+__all__ = ['read_shared_strings', 'SharedStrings']
+
+SHEET_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+STRING_ITEM_TAG = '{%s}si' % SHEET_MAIN_NS
+TEXT_TAG = '{%s}t' % SHEET_MAIN_NS
+PHONETIC_RUN_TAG = '{%s}rPh' % SHEET_MAIN_NS
+#: Number of bytes parsed at a time
+CHUNK_SIZE = 64 * 1024
+
+
+class SharedStrings(object):
+    """
+    Compact shared strings store
+
+    The strings are stored once, UTF-8 encoded, in a single buffer
+    indexed by offsets (instead of one Python object for each string).
+    The strings are decoded on access; columns of shared strings
+    can be converted to Arrow dictionary arrays without decoding
+    the strings (see dictionary_array).
+    If spill is True, the buffer is written to a temporary file
+    and memory-mapped, only the offsets are kept in memory.
+    A spilled store sent to another process (pickled) maps the same file.
+
+    :param spill: spill the strings to disk
+    :type spill: bool
+    """
+
+    def __init__(self, spill=False):
+        self.offsets = array('q', [0])
+        self._arrow = None
+        if spill:
+            self.file = tempfile.NamedTemporaryFile(prefix='shared_strings')
+            self._data = None
+        else:
+            self.file = None
+            self._data = bytearray()
+
+    def append(self, value):
+        "Add a string to the store"
+        encoded = value.encode('utf8')
+        if self.file is not None:
+            self.file.write(encoded)
+            self._data = None
+        else:
+            self._data += encoded
+        self.offsets.append(self.offsets[-1] + len(encoded))
+        self._arrow = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_arrow'] = None
+        if self.file is not None:
+            # Only the offsets and the spill file name are sent
+            self.file.flush()
+            state['file'] = self.file.name
+            state['_data'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.file is not None:
+            self.file = open(self.file, 'rb')
+
+    def close(self):
+        "Close (and remove) the spill file"
+        if self.file is not None:
+            self.file.close()
+
+    @property
+    def data(self):
+        "Strings buffer"
+        if self._data is None:
+            # Map the spill file
+            self.file.flush()
+            if self.offsets[-1]:
+                self._data = mmap.mmap(
+                    self.file.fileno(), self.offsets[-1], access=mmap.ACCESS_READ
+                )
+            else:
+                self._data = b''
+        return self._data
+
+    @property
+    def size(self):
+        "Strings buffer size (bytes)"
+        return self.offsets[-1]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('shared string index out of range')
+        return self.data[self.offsets[index] : self.offsets[index + 1]].decode('utf8')
+
+    def __iter__(self):
+        for i in range(0, len(self)):
+            yield self[i]
+
+    def to_arrow(self):
+        "Return the strings as an Arrow array (the buffer is not copied)"
+        if self._arrow is None:
+            import pyarrow
+
+            self._arrow = pyarrow.LargeStringArray.from_buffers(
+                len(self), pyarrow.py_buffer(self.offsets), pyarrow.py_buffer(self.data)
+            )
+        return self._arrow
+
+    def dictionary_array(self, indexes):
+        """
+        Return an Arrow dictionary array of the strings at the given indexes
+        (None for missing values), the dictionary contains only
+        the strings used by the array
+
+        :param indexes: shared strings indexes
+        :type indexes: list of int
+        """
+        import numpy
+        import pyarrow
+
+        indexes = numpy.array(
+            [-1 if x is None else x for x in indexes], dtype=numpy.int64
+        )
+        mask = indexes < 0
+        used, positions = numpy.unique(indexes[~mask], return_inverse=True)
+        dictionary = self.to_arrow().take(pyarrow.array(used)).cast(pyarrow.string())
+        codes = numpy.zeros(len(indexes), dtype=numpy.int32)
+        codes[~mask] = positions
+        return pyarrow.DictionaryArray.from_arrays(
+            pyarrow.array(codes, mask=mask), dictionary
+        )
+
+
+class SharedStringsHandler(object):
+    "sharedStrings.xml parser target, the text of the string items (phonetic runs excluded) is added to the store"
+
+    def __init__(self, strings):
+        self.strings = strings
+        self.snippets = None  # text snippets of the current string item
+        self.text = None  # text of the current element, None if not collected
+        self.phonetic = False
+
+    def start(self, tag, attrib):
+        if tag == STRING_ITEM_TAG:
+            self.snippets = []
+        elif tag == TEXT_TAG:
+            if self.snippets is not None and not self.phonetic:
+                self.text = []
+        elif tag == PHONETIC_RUN_TAG:
+            self.phonetic = True
+
+    def data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+    def end(self, tag):
+        if tag == STRING_ITEM_TAG:
+            # Same as openpyxl read_string_table
+            self.strings.append(''.join(self.snippets).replace('x005F_', ''))
+            self.snippets = None
+        elif tag == TEXT_TAG:
+            if self.text is not None:
+                self.snippets.append(''.join(self.text))
+                self.text = None
+        elif tag == PHONETIC_RUN_TAG:
+            self.phonetic = False
+
+    def close(self):
+        return self.strings
+
+
+def read_shared_strings(fileobj, spill=False, count=None):
+    """
+    Read the shared strings table (sharedStrings.xml) into a SharedStrings store
+
+    :param fileobj: shared strings XML file
+    :type fileobj: file
+    :param spill: spill the strings to disk
+    :type spill: bool
+    :param count: if not None, stop parsing after the first count strings
+    :type count: int
+    """
+    handler = SharedStringsHandler(SharedStrings(spill))
+    parser = XMLParser(target=handler)
+    while True:
+        if count is not None and len(handler.strings) >= count:
+            return handler.strings
+        chunk = fileobj.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+    return parser.close()
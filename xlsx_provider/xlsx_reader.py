@@ -0,0 +1,820 @@
+#!/usr/bin/env python
+
+import io
+import os
+import re
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from xml.etree.ElementTree import XMLParser, iterparse, parse
+from xlsx_provider.commons import DEFAULT_BATCH_SIZE
+from xlsx_provider.strings import read_shared_strings, SharedStrings
+from xlsx_provider.streams import is_path
+
+__all__ = ['SheetEstimate', 'XLSXReader']
+
+SHEET_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+RELATIONSHIP_TAG = '{%s}Relationship' % PKG_REL_NS
+SHEET_TAG = '{%s}sheet' % SHEET_MAIN_NS
+WORKBOOK_PR_TAG = '{%s}workbookPr' % SHEET_MAIN_NS
+NUM_FMT_TAG = '{%s}numFmt' % SHEET_MAIN_NS
+CELL_XFS_TAG = '{%s}cellXfs' % SHEET_MAIN_NS
+XF_TAG = '{%s}xf' % SHEET_MAIN_NS
+DIMENSION_TAG = '{%s}dimension' % SHEET_MAIN_NS
+SHEET_DATA_TAG = '{%s}sheetData' % SHEET_MAIN_NS
+ROW_TAG = '{%s}row' % SHEET_MAIN_NS
+VALUE_TAG = '{%s}v' % SHEET_MAIN_NS
+INLINE_STRING_TAG = '{%s}is' % SHEET_MAIN_NS
+TEXT_TAG = '{%s}t' % SHEET_MAIN_NS
+PHONETIC_RUN_TAG = '{%s}rPh' % SHEET_MAIN_NS
+CELL_TAG = '{%s}c' % SHEET_MAIN_NS
+DIGITS = '0123456789'
+#: Number of bytes parsed at a time
+CHUNK_SIZE = 64 * 1024
+#: Worksheet XML size (bytes) of the chunks parsed by each worker process
+PARALLEL_CHUNK_SIZE = 8 * 1024 * 1024
+#: Worksheet XML read at a time while splitting the rows
+READ_SIZE = 1024 * 1024
+NAME = rb'[A-Za-z_][\w.-]*'
+ROOT_RE = re.compile(rb'<(' + NAME + rb'(?::' + NAME + rb')?)')
+SHEET_DATA_RE = re.compile(rb'<((?:' + NAME + rb':)?sheetData)(?:\s[^>]*)?(/?)>')
+ROW_START_RE = re.compile(rb'<(?:' + NAME + rb':)?row[\s/>]')
+ROW_NUM_RE = re.compile(rb'\sr\s*=\s*["\'](\d+)["\']')
+
+#: XLSX reader of the worker processes (see XLSXReader.iter_batches_parallel)
+worker_reader = None
+
+
+def init_worker(reader):
+    "Initialize a worker process"
+    global worker_reader
+    worker_reader = reader
+
+
+def parse_rows_chunk(
+    document, min_row, max_row, end_row, columns, min_col, max_col, batch_size
+):
+    "Parse a chunk of rows in a worker process, return the column batches"
+    rows = worker_reader.parse_raw_rows(
+        io.BytesIO(document), min_row, max_row, min_col, max_col, end_row
+    )
+    return list(worker_reader.rows_to_batches(rows, columns, min_col, batch_size))
+
+
+def cast_number(value):
+    "Convert numbers as string to an int or float"
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+def decode_shared_strings(rows, strings):
+    "Replace the shared strings indexes of the raw rows (see iter_raw_rows) with the strings"
+    for values, filled, shared in rows:
+        if shared:
+            values = list(values)
+            for i in shared:
+                values[i] = strings[values[i]]
+            values = tuple(values)
+        yield values
+
+
+class SheetHandler(object):
+    """
+    Worksheet parser target: the values of each row are converted
+    while the XML is parsed and appended to the rows list
+    as (row number, values, positions of the non-empty cells,
+    positions of the shared strings).
+    The shared strings are not decoded, their value is the shared string index.
+
+    :param reader: XLSX reader (shared strings, date styles, epoch)
+    :type reader: XLSXReader
+    :param min_row: the cells of the rows before min_row are not converted
+    :type min_row: int
+    :param min_col: first column (one-based)
+    :type min_col: int
+    :param max_col: last column (one-based, None for all)
+    :type max_col: int
+    """
+
+    def __init__(self, reader, min_row=1, min_col=1, max_col=None):
+        from openpyxl.utils.cell import column_index_from_string
+        from openpyxl.utils.datetime import from_excel, from_ISO8601
+
+        self.column_index_from_string = column_index_from_string
+        self.from_excel = from_excel
+        self.from_ISO8601 = from_ISO8601
+        self.dates, self.timedeltas = reader.date_styles
+        self.epoch = reader.epoch
+        self.min_row = min_row
+        self.min_col = min_col
+        self.max_col = max_col
+        self.empty_row = [None] * (max_col + 1 - min_col) if max_col else []
+        self.columns = {}  # column letters cache
+        self.rows = []
+        self.row_num = 0
+        self.values = None
+        self.filled = None  # positions of the non-empty cells in the current row
+        self.shared = None  # positions of the shared strings in the current row
+        self.col = 0
+        self.cell = None  # (type, style) of the current cell, None if skipped
+        self.value = None  # value of the current cell, as string
+        self.text = None  # text of the current element, None if not collected
+        self.inline = None  # inline string snippets
+        self.phonetic = False
+
+    def start(self, tag, attrib):
+        if tag == CELL_TAG:
+            if self.values is None:
+                return
+            ref = attrib.get('r')
+            if ref:
+                letters = ref.rstrip(DIGITS)
+                col = self.columns.get(letters)
+                if col is None:
+                    col = self.columns[letters] = self.column_index_from_string(letters)
+                self.col = col
+            else:
+                self.col = self.col + 1
+            if self.col < self.min_col or (self.max_col and self.col > self.max_col):
+                self.cell = None
+            else:
+                self.cell = (attrib.get('t', 'n'), attrib.get('s'))
+        elif tag == ROW_TAG:
+            r = attrib.get('r')
+            self.row_num = int(r) if r else self.row_num + 1
+            self.col = 0
+            self.values = list(self.empty_row) if self.row_num >= self.min_row else None
+            self.filled = []
+            self.shared = []
+        elif self.cell is None:
+            pass
+        elif tag == VALUE_TAG:
+            self.text = []
+        elif tag == INLINE_STRING_TAG:
+            self.inline = []
+        elif tag == TEXT_TAG:
+            if self.inline is not None and not self.phonetic:
+                self.text = []
+        elif tag == PHONETIC_RUN_TAG:
+            self.phonetic = True
+
+    def data(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+    def end(self, tag):
+        if tag == CELL_TAG:
+            if self.cell is not None:
+                value = self.convert()
+                if value is not None:
+                    i = self.set_value(value)
+                    self.filled.append(i)
+                    if self.cell[0] == 's':
+                        self.shared.append(i)
+                self.cell = None
+                self.inline = None
+            self.value = None
+        elif tag == ROW_TAG:
+            if self.values is not None:
+                self.rows.append(
+                    (self.row_num, tuple(self.values), self.filled, self.shared)
+                )
+        elif self.text is None:
+            if tag == PHONETIC_RUN_TAG:
+                self.phonetic = False
+        elif tag == VALUE_TAG:
+            self.value = ''.join(self.text)
+            self.text = None
+        elif tag == TEXT_TAG:
+            self.inline.append(''.join(self.text))
+            self.text = None
+
+    def close(self):
+        pass
+
+    def convert(self):
+        "Convert the value of the current cell (as openpyxl)"
+        data_type, style = self.cell
+        if data_type == 'inlineStr':
+            return ''.join(self.inline) if self.inline is not None else None
+        value = self.value or None
+        if value is None:
+            return None
+        elif data_type == 'n':
+            value = cast_number(value)
+            style_id = int(style) if style else 0
+            if style_id in self.dates:
+                try:
+                    return self.from_excel(
+                        value, self.epoch, timedelta=style_id in self.timedeltas
+                    )
+                except (OverflowError, ValueError):
+                    return '#VALUE!'
+            return value
+        elif data_type == 's':
+            return int(value)
+        elif data_type == 'b':
+            return bool(int(value))
+        elif data_type == 'd':
+            return self.from_ISO8601(value)
+        return value
+
+    def set_value(self, value):
+        values = self.values
+        i = self.col - self.min_col
+        if i >= len(values):
+            values.extend([None] * (i + 1 - len(values)))
+        values[i] = value
+        return i
+
+
+class SheetEstimate(object):
+    """
+    Worksheet size estimate (see XLSXReader.estimate)
+
+    :param title: worksheet title
+    :type title: str
+    :param compressed_size: compressed worksheet XML size (bytes)
+    :type compressed_size: int
+    :param sheet_size: uncompressed worksheet XML size (bytes)
+    :type sheet_size: int
+    :param shared_strings_size: uncompressed shared strings XML size (bytes)
+    :type shared_strings_size: int
+    :param dimension: worksheet dimension (e.g. 'A1:F200')
+    :type dimension: str
+    """
+
+    def __init__(
+        self,
+        title,
+        compressed_size,
+        sheet_size,
+        shared_strings_size=0,
+        dimension=None,
+    ):
+        self.title = title
+        self.compressed_size = compressed_size
+        self.sheet_size = sheet_size
+        self.shared_strings_size = shared_strings_size
+        self.dimension = dimension
+
+    @property
+    def xml_size(self):
+        "Uncompressed XML size (worksheet and shared strings)"
+        return self.sheet_size + self.shared_strings_size
+
+    @property
+    def cells(self):
+        "Number of cells of the dimension (None if unknown)"
+        from openpyxl.utils.cell import range_boundaries
+
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(self.dimension)
+            return (max_col + 1 - min_col) * (max_row + 1 - min_row)
+        except (TypeError, ValueError):
+            return None
+
+    def __str__(self):
+        return (
+            'worksheet {0}: {1} bytes XML ({2} compressed), '
+            '{3} bytes shared strings, dimension {4} ({5} cells)'.format(
+                self.title,
+                self.sheet_size,
+                self.compressed_size,
+                self.shared_strings_size,
+                self.dimension,
+                self.cells,
+            )
+        )
+
+
+class XLSXReader(object):
+    """
+    Lightweight XLSX reader
+
+    The worksheets are parsed SAX-style (see SheetHandler), without creating
+    cells or resolving styles: only the number formats are read,
+    to detect the dates. The values are the same of openpyxl
+    (read-only mode, cached formula values).
+
+    :param filename: XLSX filename (or seekable binary file)
+    :type filename: str or io.IOBase
+    :param spill: spill the shared strings to disk (see SharedStrings)
+    :type spill: bool
+    """
+
+    def __init__(self, filename, spill=False):
+        self.filename = filename
+        self.archive = zipfile.ZipFile(filename)
+        self.spill = spill
+        self._shared_strings = None
+        self._date_styles = None
+        self.read_workbook()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.archive.close()
+        if self._shared_strings is not None:
+            self._shared_strings.close()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['archive']
+        return state
+
+    def __setstate__(self, state):
+        # The archive is reopened, the parsed workbook parts are reused
+        self.__dict__.update(state)
+        self.archive = zipfile.ZipFile(self.filename)
+
+    def read_shared_parts(self):
+        "Parse the shared strings and the styles (e.g. before sending the reader to other processes)"
+        self.shared_strings
+        self.date_styles
+
+    def read_rels(self, path):
+        "Read a relationships file, return a dictionary id -> (type, target path)"
+        folder = posixpath.dirname(posixpath.dirname(path))
+        rels = {}
+        if path not in self.archive.namelist():
+            return rels
+        with self.archive.open(path) as f:
+            for element in parse(f).getroot().iter(RELATIONSHIP_TAG):
+                target = element.get('Target')
+                if target.startswith('/'):
+                    target = target[1:]
+                else:
+                    target = posixpath.normpath(posixpath.join(folder, target))
+                rels[element.get('Id')] = (element.get('Type'), target)
+        return rels
+
+    def read_workbook(self):
+        "Read the worksheets titles and paths, the epoch and the related parts paths"
+        from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+
+        workbook_path = 'xl/workbook.xml'
+        for rel_type, target in self.read_rels('_rels/.rels').values():
+            if rel_type.endswith('/officeDocument'):
+                workbook_path = target
+        folder, name = posixpath.split(workbook_path)
+        rels = self.read_rels(posixpath.join(folder, '_rels', name + '.rels'))
+        self.shared_strings_path = None
+        self.styles_path = None
+        for rel_type, target in rels.values():
+            if rel_type.endswith('/sharedStrings'):
+                self.shared_strings_path = target
+            elif rel_type.endswith('/styles'):
+                self.styles_path = target
+        self.sheets = []
+        self.epoch = CALENDAR_WINDOWS_1900
+        with self.archive.open(workbook_path) as f:
+            root = parse(f).getroot()
+        for element in root.iter(WORKBOOK_PR_TAG):
+            if element.get('date1904') in ('1', 'true'):
+                self.epoch = CALENDAR_MAC_1904
+        for element in root.iter(SHEET_TAG):
+            rel_type, target = rels[element.get('{%s}id' % REL_NS)]
+            if rel_type.endswith('/worksheet'):  # skip the chartsheets
+                self.sheets.append((element.get('name'), target))
+
+    @property
+    def sheet_names(self):
+        "Worksheet titles"
+        return [title for title, path in self.sheets]
+
+    def get_sheet(self, worksheet=0):
+        """
+        Return the title and the path of a worksheet
+
+        :param worksheet: Worksheet title or number (zero-based)
+        :type worksheet: str or int
+        """
+        if isinstance(worksheet, int):
+            return self.sheets[worksheet]
+        t = [x for x in self.sheets if x[0].lower() == worksheet.lower()]
+        if not t:
+            raise KeyError('Worksheet {0} not found'.format(worksheet))
+        return t[0]
+
+    @property
+    def shared_strings(self):
+        "Shared strings store"
+        if self._shared_strings is None:
+            self._shared_strings = SharedStrings()
+            if self.shared_strings_path is not None:
+                with self.archive.open(self.shared_strings_path) as f:
+                    self._shared_strings = read_shared_strings(f, self.spill)
+        return self._shared_strings
+
+    @property
+    def date_styles(self):
+        "Indexes of the cell styles with a date and with a timedelta number format"
+        if self._date_styles is None:
+            from openpyxl.styles.numbers import (
+                builtin_format_code,
+                is_date_format,
+                is_timedelta_format,
+            )
+
+            dates = set()
+            timedeltas = set()
+            if self.styles_path is not None:
+                with self.archive.open(self.styles_path) as f:
+                    root = parse(f).getroot()
+                custom = dict(
+                    (int(x.get('numFmtId')), x.get('formatCode'))
+                    for x in root.iter(NUM_FMT_TAG)
+                )
+                for xfs in root.iter(CELL_XFS_TAG):
+                    for i, xf in enumerate(xfs.iter(XF_TAG)):
+                        num_fmt_id = int(xf.get('numFmtId', 0))
+                        fmt = custom.get(num_fmt_id) or builtin_format_code(num_fmt_id)
+                        if is_date_format(fmt):
+                            dates.add(i)
+                        if is_timedelta_format(fmt):
+                            timedeltas.add(i)
+            self._date_styles = (dates, timedeltas)
+        return self._date_styles
+
+    def dimension(self, path):
+        """
+        Return the worksheet dimension (e.g. 'A1:F200', None if unknown)
+        The worksheet is read only up to the first row
+        """
+        with self.archive.open(path) as f:
+            for event, element in iterparse(f, events=('start',)):
+                if element.tag == DIMENSION_TAG:
+                    return element.get('ref')
+                elif element.tag == SHEET_DATA_TAG:
+                    return None
+        return None
+
+    def max_column(self, path):
+        "Return the last column of the worksheet dimension (None if unknown)"
+        from openpyxl.utils.cell import range_boundaries
+
+        try:
+            return range_boundaries(self.dimension(path))[2]
+        except (TypeError, ValueError):
+            return None
+
+    def estimate(self, worksheet=0):
+        """
+        Estimate the size of a worksheet, without reading the cells: the sizes
+        are read from the zip directory, the dimension from the worksheet header
+
+        :param worksheet: Worksheet title or number (zero-based)
+        :type worksheet: str or int
+        """
+        title, path = self.get_sheet(worksheet)
+        info = self.archive.getinfo(path)
+        shared_strings_size = 0
+        if self.shared_strings_path is not None:
+            shared_strings_size = self.archive.getinfo(
+                self.shared_strings_path
+            ).file_size
+        return SheetEstimate(
+            title=title,
+            compressed_size=info.compress_size,
+            sheet_size=info.file_size,
+            shared_strings_size=shared_strings_size,
+            dimension=self.dimension(path),
+        )
+
+    def iter_raw_rows(self, path, min_row=1, max_row=None, min_col=1, max_col=None):
+        """
+        Iterate over the rows of a worksheet, returning the values, the positions
+        of the non-empty cells and of the shared strings (not decoded) of each row
+        (see iter_rows)
+        """
+        max_col = max_col or self.max_column(path)
+        with self.archive.open(path) as f:
+            yield from self.parse_raw_rows(f, min_row, max_row, min_col, max_col)
+
+    def parse_raw_rows(
+        self, f, min_row=1, max_row=None, min_col=1, max_col=None, end_row=None
+    ):
+        """
+        Parse the rows of a worksheet XML file (see iter_raw_rows)
+        If end_row is not None, the missing rows before end_row are returned
+        as empty rows (the worksheet continues after this part)
+        """
+        min_row = min_row or 1
+        min_col = min_col or 1
+        handler = SheetHandler(self, min_row, min_col, max_col)
+        empty_row = tuple(handler.empty_row)
+        parser = XMLParser(target=handler)
+        counter = min_row
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+            rows = handler.rows
+            handler.rows = []
+            for row_num, values, filled, shared in rows:
+                if max_row is not None and row_num > max_row:
+                    # Missing rows up to max_row (as openpyxl)
+                    while counter <= max_row:
+                        counter = counter + 1
+                        yield empty_row, (), ()
+                    return
+                # Missing rows
+                while counter < row_num:
+                    counter = counter + 1
+                    yield empty_row, (), ()
+                counter = counter + 1
+                yield values, filled, shared
+            if not chunk:
+                break
+        if end_row is not None:
+            if max_row is not None:
+                end_row = min(end_row, max_row + 1)
+            while counter < end_row:
+                counter = counter + 1
+                yield empty_row, (), ()
+
+    def iter_rows(self, path, min_row=1, max_row=None, min_col=1, max_col=None):
+        """
+        Iterate over the rows of a worksheet, returning tuples of values
+
+        The cells outside the min_col/max_col range are not converted.
+        Missing rows are returned as empty rows.
+
+        :param path: worksheet path
+        :type path: str
+        :param min_row: first row (one-based)
+        :type min_row: int
+        :param max_row: last row (one-based, default: last)
+        :type max_row: int
+        :param min_col: first column (one-based)
+        :type min_col: int
+        :param max_col: last column (one-based, default: the sheet dimension)
+        :type max_col: int
+        """
+        strings = self.shared_strings
+        rows = self.iter_raw_rows(path, min_row, max_row, min_col, max_col)
+        yield from decode_shared_strings(rows, strings)
+
+    def read_rows(self, path, min_row=1, max_row=None):
+        """
+        Return the rows of a worksheet as a list of tuples of values (see iter_rows),
+        the shared strings table is parsed only up to the last string used by the rows
+
+        :param path: worksheet path
+        :type path: str
+        :param min_row: first row (one-based)
+        :type min_row: int
+        :param max_row: last row (one-based, default: last)
+        :type max_row: int
+        """
+        rows = list(self.iter_raw_rows(path, min_row, max_row))
+        strings = self._shared_strings
+        if strings is None:
+            count = max(
+                (x[i] + 1 for x, filled, shared in rows for i in shared), default=0
+            )
+            strings = self.read_first_shared_strings(count)
+        return list(decode_shared_strings(rows, strings))
+
+    def read_first_shared_strings(self, count):
+        """
+        Return a store of the first count shared strings
+        (the shared strings table is not parsed past them)
+
+        :param count: number of strings
+        :type count: int
+        """
+        if self.shared_strings_path is None or not count:
+            return SharedStrings()
+        with self.archive.open(self.shared_strings_path) as f:
+            return read_shared_strings(f, count=count)
+
+    def iter_batches(
+        self,
+        path,
+        min_row=1,
+        max_row=None,
+        columns=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        max_workers=None,
+    ):
+        """
+        Iterate over the rows of a worksheet, returning column batches
+
+        The columns containing only shared strings (and empty cells)
+        are returned as Arrow dictionary arrays, the strings are not decoded.
+        The other columns are lists of values.
+        If max_workers is greater than 1, the worksheet is parsed
+        in parallel (see iter_batches_parallel).
+
+        :param path: worksheet path
+        :type path: str
+        :param min_row: first row (one-based)
+        :type min_row: int
+        :param max_row: last row (one-based, default: last)
+        :type max_row: int
+        :param columns: zero-based indexes of the selected columns (default: all)
+        :type columns: list of int
+        :param batch_size: number of rows of each batch
+        :type batch_size: int
+        :param max_workers: number of worker processes (default: None, serial parsing,
+            files opened as streams are always parsed serially)
+        :type max_workers: int
+        """
+        if (max_workers or 1) > 1 and is_path(self.filename):
+            yield from self.iter_batches_parallel(
+                path, min_row, max_row, columns, batch_size, max_workers
+            )
+            return
+        min_col = max_col = None
+        if columns is not None:
+            min_col = min(columns, default=0) + 1
+            max_col = max(columns, default=0) + 1
+        rows = self.iter_raw_rows(path, min_row, max_row, min_col, max_col)
+        yield from self.rows_to_batches(rows, columns, min_col, batch_size)
+
+    def rows_to_batches(
+        self, rows, columns=None, min_col=None, batch_size=DEFAULT_BATCH_SIZE
+    ):
+        "Group the raw rows (see iter_raw_rows) into column batches"
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            yield self.to_batch(chunk, columns, min_col)
+
+    def split_rows(
+        self,
+        path,
+        min_row=1,
+        max_row=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        chunk_size=PARALLEL_CHUNK_SIZE,
+    ):
+        """
+        Split the worksheet XML on <row> boundaries into chunks of about
+        chunk_size bytes, yielding (first row, end row, XML document)
+
+        Each chunk starts at the first row of a batch (see iter_batches)
+        and contains the rows before the end row (None for the last chunk).
+        The XML document of each chunk contains the worksheet head,
+        the rows of the chunk and the closing tags.
+        """
+        min_row = min_row or 1
+        with self.archive.open(path) as f:
+            body = bytearray()
+            eof = False
+            match = None
+            while match is None and not eof:
+                data = f.read(READ_SIZE)
+                eof = not data
+                body += data
+                match = SHEET_DATA_RE.search(body)
+            if match is None or match.group(2):  # no rows
+                yield min_row, None, bytes(body) + f.read()
+                return
+            root = ROOT_RE.search(body).group(1)
+            head = bytes(body[: match.end()])
+            tail = b'</' + match.group(1) + b'></' + root + b'>'
+            del body[: match.end()]
+            start_row = min_row
+            end_row = None
+            pos = chunk_size
+            while True:
+                cut = None
+                for row in ROW_START_RE.finditer(body, pos):
+                    end = body.find(b'>', row.start())
+                    if end == -1:
+                        break
+                    pos = row.start()
+                    r = ROW_NUM_RE.search(body, row.start(), end)
+                    if r is None:
+                        continue  # only rows with a number are split points
+                    row_num = int(r.group(1))
+                    if end_row is None:
+                        # Next batch boundary
+                        batches = -(-(row_num - min_row) // batch_size)
+                        end_row = max(
+                            min_row + batches * batch_size, start_row + batch_size
+                        )
+                    if row_num >= end_row:
+                        cut = row.start()
+                        break
+                if cut is not None:
+                    yield start_row, end_row, head + bytes(body[:cut]) + tail
+                    if max_row is not None and end_row > max_row:
+                        return
+                    del body[:cut]
+                    start_row = end_row
+                    end_row = None
+                    pos = chunk_size
+                    continue
+                data = f.read(READ_SIZE)
+                if not data:
+                    yield start_row, None, head + bytes(body)
+                    return
+                body += data
+
+    def iter_batches_parallel(
+        self,
+        path,
+        min_row=1,
+        max_row=None,
+        columns=None,
+        batch_size=DEFAULT_BATCH_SIZE,
+        max_workers=None,
+        chunk_size=PARALLEL_CHUNK_SIZE,
+    ):
+        """
+        Iterate over the rows of a worksheet, returning column batches
+        (see iter_batches), the worksheet is parsed in parallel
+
+        The worksheet XML is split into row-aligned chunks (see split_rows),
+        parsed by a pool of worker processes and the batches are returned
+        in order. The chunks start at batch boundaries, the batches are
+        the same of the serial parsing.
+        """
+        min_col = max_col = None
+        if columns is not None:
+            min_col = min(columns, default=0) + 1
+            max_col = max(columns, default=0) + 1
+        max_col = max_col or self.max_column(path)
+        # The shared strings and the styles are parsed once
+        self.read_shared_parts()
+        max_workers = max_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=init_worker, initargs=(self,)
+        )
+        futures = []
+        try:
+            for start_row, end_row, document in self.split_rows(
+                path, min_row, max_row, batch_size, chunk_size
+            ):
+                futures.append(
+                    executor.submit(
+                        parse_rows_chunk,
+                        document,
+                        start_row,
+                        max_row,
+                        end_row,
+                        columns,
+                        min_col,
+                        max_col,
+                        batch_size,
+                    )
+                )
+                # Limit the chunks in memory
+                while len(futures) > 2 * max_workers:
+                    yield from futures.pop(0).result()
+            for future in futures:
+                yield from future.result()
+        finally:
+            # The pending chunks are not parsed (cancel_futures requires Python 3.9)
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def to_batch(self, chunk, columns=None, min_col=None):
+        "Convert a list of raw rows (see iter_raw_rows) into columns"
+        strings = self.shared_strings
+        size = len(chunk)
+        if columns is not None:
+            positions = [i + 1 - min_col for i in columns]
+        else:
+            positions = range(0, max(len(row[0]) for row in chunk))
+        # Number of non-empty cells and of shared strings in each column
+        filled_count = {}
+        shared_count = {}
+        for values, filled, shared in chunk:
+            for i in filled:
+                filled_count[i] = filled_count.get(i, 0) + 1
+            for i in shared:
+                shared_count[i] = shared_count.get(i, 0) + 1
+        batch = []
+        for i in positions:
+            if i not in filled_count:
+                batch.append([None] * size)
+                continue
+            column = [values[i] if i < len(values) else None for values, _, _ in chunk]
+            count = shared_count.get(i, 0)
+            if count == filled_count[i]:
+                column = strings.dictionary_array(column)
+            elif count:
+                column = [
+                    strings[x] if i in shared else x
+                    for x, (_, _, shared) in zip(column, chunk)
+                ]
+            batch.append(column)
+        return batch